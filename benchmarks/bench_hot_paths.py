@@ -0,0 +1,191 @@
+"""
+Benchmarks of the date, schedule, pricing and yield hot paths on synthetic universes of 10 to 1M bonds
+
+python benchmarks/bench_hot_paths.py --sizes 10 1000 100000 --max-scalar-bonds 1000 --output benchmarks/baseline.json   # baseline
+python benchmarks/bench_hot_paths.py --sizes 10 1000 100000 --max-scalar-bonds 1000 --baseline benchmarks/baseline.json   # exits with 1 if something got slower
+
+Scalar paths (one Python call per bond) only run up to --max-scalar-bonds, the batch paths run on every size.
+Each timing is the best of --repeat runs, a run calls the benchmark in a loop until it lasts --min-run-seconds so the
+small books are not timer noise. The comparison skips the benchmarks that took less than --min-seconds in the baseline,
+their time is mostly fixed overhead (allocations, dispatch) that moves by more than the threshold from run to run.
+benchmarks/baseline.json is the baseline of the machine in its meta (the 1M books need more than 6GB of memory, it stops at 100k),
+record a new one before comparing on another machine.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+from typing import Tuple
+
+import numpy as np
+
+import financebro.utils._math as _math
+import financebro.utils._bond as _bond
+from financebro.assets.fixed_income.bond import Bond
+from financebro.assets.fixed_income.bond_book import BondBook
+from financebro.assets.fixed_income.bond_screener import BondScreener
+from financebro.assets.fixed_income.price_yield_interpolant import PriceYieldInterpolant
+from universe import SETTLEMENT_DATE, make_book
+
+
+def setup(book: BondBook) -> dict:
+    # Inputs of the scalar paths, built outside of the timings
+    maturity_dates = list(_math.ordinals_to_dates(book.maturity_ordinal))
+    periods = [int(period) for period in book.coupon_period_days]
+    return {'maturity_dates': maturity_dates, 'periods': periods, 'bonds': build_bonds(book, maturity_dates, periods)}
+
+_prepared = {}
+
+def prepare(book: BondBook, build):
+    # Structures built once per book (screener, interpolants), their benchmarks time the queries only
+    if _prepared.get('book') is not book:
+        _prepared.clear()
+        _prepared['book'] = book
+    if build not in _prepared:
+        _prepared[build] = build(book)
+    return _prepared[build]
+
+def build_screener(book: BondBook) -> BondScreener:
+    return BondScreener(book, tax_rate=0.3)
+
+def get_screener(book: BondBook) -> BondScreener:
+    return prepare(book, build_screener)
+
+def screen(book: BondBook):
+    settlement_ordinal = int(book.settlement_ordinal[0])
+    return get_screener(book).screen(maturity_ordinal=(settlement_ordinal + 365, settlement_ordinal + 5*365),
+                                     ytm_percent=(4, 6), annual_coupon_rate=(None, 0.05))
+
+def build_bonds(book: BondBook, maturity_dates: list, periods: list) -> list:
+    return [Bond(cusip, price, ytm, 100*rate, maturity_date, coupon_period_days=period, settlement_date=SETTLEMENT_DATE)
+            for cusip, price, ytm, rate, maturity_date, period in zip(book.cusips, book.price_percent, book.ytm_percent,
+                                                                       book.annual_coupon_rate, maturity_dates, periods)]
+
+def clear_schedule_cache():
+    # Schedules are memoized, every repeat starts cold
+    _bond.get_coupons_ordinals.cache_clear()
+
+
+# name -> (scalar path, function(book, inputs))
+BENCHMARKS = {
+    'day_diff': (True, lambda book, inputs: [_math.day_diff(SETTLEMENT_DATE, maturity_date) for maturity_date in inputs['maturity_dates']]),
+    'remove_days': (True, lambda book, inputs: [_math.remove_days(maturity_date, period)
+                                                for maturity_date, period in zip(inputs['maturity_dates'], inputs['periods'])]),
+    'get_coupons_date': (True, lambda book, inputs: (clear_schedule_cache(),
+                                                     [_bond.get_coupons_date(SETTLEMENT_DATE, maturity_date, period)
+                                                      for maturity_date, period in zip(inputs['maturity_dates'], inputs['periods'])])),
+    'Bond.__init__': (True, lambda book, inputs: build_bonds(book, inputs['maturity_dates'], inputs['periods'])),
+    'Bond.compute_price_excel': (True, lambda book, inputs: [bond.compute_price(method='excel') for bond in inputs['bonds']]),
+    'Bond.compute_price_textbook': (True, lambda book, inputs: [bond.compute_price(method='textbook') for bond in inputs['bonds']]),
+    'Bond.compute_ytm_percent': (True, lambda book, inputs: [bond.compute_ytm_percent() for bond in inputs['bonds']]),
+    'Bond.infer_coupons_dates': (True, lambda book, inputs: (clear_schedule_cache(),
+                                                             [bond.infer_coupons_dates() for bond in inputs['bonds']])),
+    'day_diff_array': (False, lambda book, inputs: _math.day_diff_array(book.settlement_ordinal, book.maturity_ordinal)),
+    'remove_days_array': (False, lambda book, inputs: _math.remove_days_array(book.maturity_ordinal, book.coupon_period_days.astype(np.int64))),
+    'get_coupons_ordinals_batch': (False, lambda book, inputs: book.get_coupon_schedules()),
+    'BondBook.from_dates': (False, lambda book, inputs: BondBook.from_dates(book.cusips, book.price_percent, book.ytm_percent,
+                                                                            book.annual_coupon_rate, book.maturity_ordinal,
+                                                                            book.settlement_ordinal, book.coupon_period_days)),
+    'BondBook.compute_price': (False, lambda book, inputs: book.compute_price()),
+    'BondBook.compute_ytm_percent': (False, lambda book, inputs: book.compute_ytm_percent()),
+    'infer_coupon_period_days_batch': (False, lambda book, inputs: _bond.infer_coupon_period_days_batch(
+        book.price_percent, book.ytm_percent, book.annual_coupon_rate, 100, book.settlement_ordinal, book.maturity_ordinal)),
+    'PriceYieldInterpolant.__init__': (False, lambda book, inputs: PriceYieldInterpolant(book)),
+    'PriceYieldInterpolant.compute_ytm_percent': (False, lambda book, inputs: prepare(book, PriceYieldInterpolant).compute_ytm_percent()),
+    'BondScreener.screen': (False, lambda book, inputs: screen(book)),
+    'BondScreener.top_k': (False, lambda book, inputs: get_screener(book).top_k('after_tax_ytm_percent', 20, where=screen(book))),
+}
+
+
+def measure(function, book: BondBook, inputs: dict, repeat: int, min_run_seconds: float) -> Tuple[float, int]:
+    # Seconds per call, best of repeat runs of `loops` calls each, and the number of loops
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            function(book, inputs)
+        seconds = time.perf_counter() - start
+        if seconds >= min_run_seconds:
+            break
+        loops *= 10
+    timings = [seconds]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            function(book, inputs)
+        timings.append(time.perf_counter() - start)
+    return min(timings) / loops, loops
+
+
+def run(sizes, maturities, names, repeat: int, max_scalar_bonds: int, min_run_seconds: float= 0) -> list:
+    results = []
+    for maturity in maturities:
+        for size in sizes:
+            book = make_book(size, maturity)
+            inputs = setup(book) if size <= max_scalar_bonds and any(BENCHMARKS[name][0] for name in names) else None
+            for name in names:
+                scalar, function = BENCHMARKS[name]
+                if scalar and inputs is None:
+                    continue
+                best, loops = measure(function, book, inputs, repeat, min_run_seconds)
+                results.append({'name': name, 'bonds': size, 'maturity': maturity, 'seconds': best,
+                                'us_per_bond': 1e6 * best / size, 'loops': loops})
+                print(f"{name:<32} {maturity:>6} {size:>8} {best:>12.6f}s {1e6*best/size:>10.3f}us/bond", flush=True)
+    return results
+
+
+def compare(results: list, baseline: list, threshold: float, min_seconds: float= 0) -> Tuple[list, int]:
+    """
+    Results slower than the baseline by more than threshold (relative), matched on (name, bonds, maturity)
+    Baseline timings under min_seconds are not compared, they are returned as a count.
+    """
+    reference = {(entry['name'], entry['bonds'], entry['maturity']): entry['seconds'] for entry in baseline}
+    regressions = []
+    skipped = 0
+    for entry in results:
+        key = (entry['name'], entry['bonds'], entry['maturity'])
+        if key not in reference:
+            continue
+        if reference[key] < min_seconds:
+            skipped += 1
+        elif entry['seconds'] > reference[key] * (1 + threshold):
+            regressions.append({**entry, 'baseline_seconds': reference[key], 'ratio': entry['seconds'] / reference[key]})
+    return regressions, skipped
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 100_000, 1_000_000])
+    parser.add_argument('--maturities', nargs='+', default=['short', 'long'], choices=['short', 'long', 'mixed'])
+    parser.add_argument('--benchmarks', nargs='+', default=list(BENCHMARKS), choices=list(BENCHMARKS))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-run-seconds', type=float, default=0.05, help='Minimum duration of a timed run, small books loop')
+    parser.add_argument('--max-scalar-bonds', type=int, default=100_000)
+    parser.add_argument('--output', help='JSON file to write the results to')
+    parser.add_argument('--baseline', help='JSON results of a previous run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Relative slowdown flagged as a regression')
+    parser.add_argument('--min-seconds', type=float, default=1e-4, help='Baseline timings below it are not compared')
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.maturities, args.benchmarks, args.repeat, args.max_scalar_bonds, args.min_run_seconds)
+    report = {'meta': {'date': datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+                       'numpy': np.__version__, 'machine': platform.machine(), 'platform': platform.platform(),
+                       'sizes': args.sizes, 'maturities': args.maturities, 'max_scalar_bonds': args.max_scalar_bonds,
+                       'repeat': args.repeat, 'min_run_seconds': args.min_run_seconds},
+              'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions, skipped = compare(results, json.load(f)['results'], args.threshold, args.min_seconds)
+        for entry in regressions:
+            print(f"REGRESSION {entry['name']} {entry['maturity']} {entry['bonds']}: "
+                  f"{entry['seconds']:.4f}s vs {entry['baseline_seconds']:.4f}s ({entry['ratio']:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regression above {args.threshold:.0%} against {args.baseline} "
+              f"({skipped} timings under {args.min_seconds}s in the baseline not compared)")
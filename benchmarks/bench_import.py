@@ -0,0 +1,22 @@
+"""
+Import time of the package and the heavy dependencies each import loads, each measure runs in a fresh interpreter
+The budget itself is asserted by tests/test_import.py, this only reports the timings.
+
+python benchmarks/bench_import.py --repeat 5
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests'))
+from test_import import STATEMENTS, measure
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    for statement in STATEMENTS:
+        result = measure(statement, args.repeat)
+        print(f"{statement:<50} {1000*result['seconds']:>8.1f}ms  loads {result['loaded'] or 'nothing heavy'}")
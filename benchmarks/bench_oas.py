@@ -0,0 +1,59 @@
+"""
+Monte Carlo OAS of a book of callable bonds under Hull-White, serial and with workers
+The bonds are priced by the engine at random spreads first, the OAS solve must find them back.
+
+python benchmarks/bench_oas.py --bonds 2000 --paths 100000 --workers 1 4
+"""
+import argparse
+import time
+
+import numpy as np
+
+import financebro.utils._math as _math
+from financebro.assets.fixed_income.oas_engine import OASEngine
+from financebro.assets.fixed_income.short_rate_model import ShortRateModel
+from universe import SETTLEMENT_DATE, make_book
+
+
+def make_calls(book, seed: int= 0):
+    # Calls at par every year, from a first call 1 to 5 years after settlement until maturity
+    rng = np.random.default_rng(seed)
+    first = book.settlement_ordinal + 360*rng.integers(1, 6, len(book))
+    counts = np.maximum((book.maturity_ordinal - first) // 360, 0)
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    owner = np.repeat(np.arange(len(book)), counts)
+    call_ordinals = first[owner] + 360*(np.arange(offsets[-1]) - offsets[owner])
+    return offsets, call_ordinals, np.full(len(call_ordinals), 100.)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--bonds', type=int, default=2000)
+    parser.add_argument('--paths', type=int, default=100_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1])
+    parser.add_argument('--max-memory-mb', type=float, default=256)
+    args = parser.parse_args()
+
+    book = make_book(args.bonds, maturity='long')
+    model = ShortRateModel.vasicek(_math.date_to_ordinal(SETTLEMENT_DATE), 0.045, 0.04, mean_reversion=0.05, volatility=0.01)
+    offsets, call_ordinals, call_prices_percent = make_calls(book)
+    print(f"{args.bonds} bonds, {len(call_ordinals)} calls, {args.paths} paths")
+    # Market prices from the model at known spreads, on the same paths
+    engine = OASEngine(model, book, offsets, call_ordinals, call_prices_percent, num_paths=args.paths,
+                       max_memory_bytes=int(args.max_memory_mb*2**20))
+    true_oas_percent = np.random.default_rng(0).uniform(0, 2, len(book))
+    start = time.perf_counter()
+    book.price_percent = engine.compute_price(true_oas_percent)
+    print(f"one valuation {time.perf_counter() - start:.2f}s")
+    results = []
+    for workers in args.workers:
+        engine.max_workers = workers
+        start = time.perf_counter()
+        oas_percent, option_value_percent = engine.compute_oas_percent()
+        seconds = time.perf_counter() - start
+        results.append(oas_percent)
+        print(f"workers {workers:<3} chunks {len(engine._chunks):<5} OAS solve {seconds:>8.2f}s  "
+              f"max error {np.nanmax(np.abs(oas_percent - true_oas_percent)):.2g}%  solved {np.count_nonzero(~np.isnan(oas_percent))}/{len(book)}  "
+              f"median option value {np.nanmedian(option_value_percent):.3f}%")
+    # Same chunks and seeds, the workers must not change the results
+    print(f"max OAS difference between runs {max(np.nanmax(np.abs(oas - results[0])) for oas in results):.3g}%")
@@ -0,0 +1,35 @@
+"""
+Throughput of evaluate_book_parallel (price, YTM and APY) as the number of worker processes grows
+
+python benchmarks/bench_parallel.py --bonds 1000000 --chunk-size 50000
+"""
+import argparse
+import os
+import time
+
+from financebro.utils._parallel import evaluate_book_parallel
+from universe import make_book
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--bonds', type=int, default=1_000_000)
+    parser.add_argument('--chunk-size', type=int, default=50_000)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    book = make_book(args.bonds)
+    workers = sorted({1, *[2**i for i in range(1, args.max_workers.bit_length())], args.max_workers})
+    print(f"{args.bonds} bonds, shards of {args.chunk_size}, {os.cpu_count()} cores")
+    print(f"{'workers':>8} {'seconds':>10} {'bonds/s':>12} {'speedup':>8}")
+    baseline = None
+    for max_workers in workers:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            evaluate_book_parallel(book, max_workers=max_workers, chunk_size=args.chunk_size)
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        baseline = baseline or best
+        print(f"{max_workers:>8} {best:>10.3f} {args.bonds/best:>12.0f} {baseline/best:>8.2f}")
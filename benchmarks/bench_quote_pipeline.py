@@ -0,0 +1,96 @@
+"""
+End-to-end latency of QuotePipeline on a fake feed, in process or through a local socket
+The feed sends bursts of quotes at a given rate, a few hot CUSIPs get most of the ticks so bursts coalesce. The quotes carry
+their send time, the latency is from the send until the analytics are in the subscriber queue.
+
+python benchmarks/bench_quote_pipeline.py --bonds 100000 --quotes 200000 --rate 50000 --feed memory socket
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from financebro.assets.fixed_income.quote_pipeline import QuotePipeline
+from financebro.assets.fixed_income.yield_service import YieldService
+from universe import make_book
+
+
+async def generate_quotes(book, num_quotes: int, rate: float, burst_size: int= 100, tick_size: float= 0.05, seed: int= 0):
+    # Random walk of the prices, CUSIPs drawn from a Zipf law so the same bonds tick again and again
+    rng = np.random.default_rng(seed)
+    price_percent = book.price_percent.tolist()
+    cusips = book.cusips.tolist()
+    start = time.perf_counter()
+    for first in range(0, num_quotes, burst_size):
+        size = min(burst_size, num_quotes - first)
+        index = (rng.zipf(1.2, size) - 1) % len(book)
+        moves = np.round(rng.normal(0, tick_size, size), 3)
+        for position, move in zip(index.tolist(), moves.tolist()):
+            price_percent[position] += move
+            yield cusips[position], round(price_percent[position], 3), time.perf_counter()
+        # Pace the bursts to the rate
+        await asyncio.sleep(max(start + (first + size)/rate - time.perf_counter(), 0))
+
+
+async def serve_quotes(quotes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    # One text line per quote, drain() is where the socket pushes back on the feed
+    async for cusip, price_percent, timestamp in quotes:
+        writer.write(f"{cusip},{price_percent!r},{timestamp!r}\n".encode())
+        if writer.transport.get_write_buffer_size() > 2**16:
+            await writer.drain()
+    await writer.drain()
+    writer.close()
+
+
+async def read_quotes(reader: asyncio.StreamReader):
+    async for line in reader:
+        cusip, price_percent, timestamp = line.decode().split(',')
+        yield cusip, float(price_percent), float(timestamp)
+
+
+async def consume(queue: asyncio.Queue, delay: float):
+    # Subscriber, a slow one (delay per batch) makes the pipeline coalesce more
+    count = 0
+    while (update := await queue.get()) is not None:
+        count += len(update['cusips'])
+        if delay:
+            await asyncio.sleep(delay)
+    return count
+
+
+async def run(book, args, feed: str):
+    pipeline = QuotePipeline(YieldService(book), max_batch_size=args.batch_size, max_batch_delay=args.batch_delay)
+    consumer = asyncio.ensure_future(consume(pipeline.subscribe(), args.subscriber_delay))
+    quotes = generate_quotes(book, args.quotes, args.rate)
+    start = time.perf_counter()
+    if feed == 'memory':
+        await pipeline.run(quotes)
+    else:
+        server = await asyncio.start_server(lambda reader, writer: serve_quotes(quotes, reader, writer), '127.0.0.1', 0)
+        reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+        await pipeline.run(read_quotes(reader))
+        writer.close()
+        server.close()
+    seconds = time.perf_counter() - start
+    received = await consumer
+    stats = pipeline.get_stats()
+    print(f"{feed} feed, {seconds:.2f}s, {stats['quotes']/seconds:,.0f} quotes/s, {received} analytics received")
+    for name, value in stats.items():
+        print(f"  {name:<20} {value:>12.3f}" if isinstance(value, float) else f"  {name:<20} {value:>12}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--bonds', type=int, default=100_000)
+    parser.add_argument('--quotes', type=int, default=200_000)
+    parser.add_argument('--rate', type=float, default=50_000, help='Quotes per second sent by the feed')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--batch-delay', type=float, default=0.001)
+    parser.add_argument('--subscriber-delay', type=float, default=0, help='Seconds the subscriber spends on each batch')
+    parser.add_argument('--feed', nargs='+', default=['memory', 'socket'], choices=['memory', 'socket'])
+    args = parser.parse_args()
+
+    book = make_book(args.bonds)
+    for feed in args.feed:
+        asyncio.run(run(book, args, feed))
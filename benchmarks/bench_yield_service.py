@@ -0,0 +1,65 @@
+"""
+Solver work of YieldService on a simulated tick stream: random bonds move by a few cents at every tick, some quotes repeat
+The service is seeded with the opening prices of the whole book first (not timed), like at the start of a trading day. The
+iterations saved are estimated by the service from its own cold solves, the opening ones here.
+
+python benchmarks/bench_yield_service.py --bonds 100000 --ticks 50 --quotes-per-tick 5000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from financebro.assets.fixed_income.yield_service import YieldService
+from universe import make_book
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--bonds', type=int, default=100_000)
+    parser.add_argument('--ticks', type=int, default=50)
+    parser.add_argument('--quotes-per-tick', type=int, default=5_000)
+    parser.add_argument('--tick-size', type=float, default=0.05, help='Standard deviation of the price moves in percent')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-open', action='store_true', help='Do not seed the service with the opening prices')
+    args = parser.parse_args()
+
+    book = make_book(args.bonds)
+    rng = np.random.default_rng(args.seed)
+    price_percent = book.price_percent.copy()
+    ticks = []
+    for _ in range(args.ticks):
+        index = rng.choice(args.bonds, args.quotes_per_tick, replace=False)
+        price_percent[index] += np.round(rng.normal(0, args.tick_size, index.size), 3)
+        ticks.append((index, book.cusips[index], price_percent[index]))
+
+    service = YieldService(book)
+    # Same, the caller passes the rows of the quotes in the book instead of their CUSIPs
+    service_rows = YieldService(book)
+    if not args.no_open:
+        for yield_service in (service, service_rows):
+            yield_service.get_ytm_percent(book.cusips, book.price_percent)
+    # Each one goes through the whole stream on its own, the others do not evict its data from the caches in between.
+    # The cold solves look the CUSIPs up in the same dict as the service, or get the rows like service_rows
+    seconds = {}
+    start = time.perf_counter()
+    for index, cusips, quotes in ticks:
+        book[service.get_rows(cusips)].compute_ytm_percent(quotes)
+    seconds['cold batch solves'] = time.perf_counter() - start
+    start = time.perf_counter()
+    for index, cusips, quotes in ticks:
+        service.get_ytm_percent(cusips, quotes)
+    seconds['service'] = time.perf_counter() - start
+    start = time.perf_counter()
+    for index, cusips, quotes in ticks:
+        book[index].compute_ytm_percent(quotes)
+    seconds['cold batch solves, rows given'] = time.perf_counter() - start
+    start = time.perf_counter()
+    for index, cusips, quotes in ticks:
+        service_rows.get_ytm_percent(None, quotes, rows=index)
+    seconds['service, rows given'] = time.perf_counter() - start
+
+    for name, value in service.get_stats().items():
+        print(f"{name:<30} {value:>12.3f}" if isinstance(value, float) else f"{name:<30} {value:>12}")
+    for name, value in seconds.items():
+        print(f"{name:<30} {value:>11.3f}s")
@@ -0,0 +1,37 @@
+"""
+Synthetic bond universes shared by the benchmarks
+"""
+import numpy as np
+
+import financebro.utils._math as _math
+from financebro.assets.fixed_income.bond_book import BondBook
+
+SETTLEMENT_DATE = '04/27/2024'
+# Days to maturity of each maturity profile
+MATURITY_DAYS = {'short': (10, 720), 'long': (3650, 10800), 'mixed': (10, 9000)}
+
+
+def make_book(num_bonds: int, maturity: str= 'mixed', seed: int= 0) -> BondBook:
+    """
+    Random inventory settling on SETTLEMENT_DATE, quoted prices are the Excel prices rounded to 3 decimals like Fidelity quotes
+    so the coupon period inference finds them back
+
+    Args:
+        num_bonds (int): Number of bonds
+        maturity (str, optional): Maturity profile, key of MATURITY_DAYS. Defaults to 'mixed'.
+        seed (int, optional): Seed of the generator. Defaults to 0.
+
+    Returns:
+        BondBook: The inventory, with its dates
+    """
+    rng = np.random.default_rng(seed)
+    settlement = _math.date_to_ordinal(SETTLEMENT_DATE)
+    book = BondBook.from_dates(np.char.mod('%09d', np.arange(num_bonds)),
+                               100,
+                               np.round(rng.uniform(1, 8, num_bonds), 3),
+                               np.round(rng.uniform(0, 0.08, num_bonds), 5),
+                               settlement + rng.integers(*MATURITY_DAYS[maturity], num_bonds),
+                               settlement,
+                               rng.choice([30, 90, 180, 360], num_bonds))
+    book.price_percent = np.round(book.compute_price(), 3)
+    return book
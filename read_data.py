@@ -1,34 +1,24 @@
 #%%
 import pandas as pd
 
+import financebro
 
-df = pd.read_csv('data/fidelity_data.csv')
 #%%
-df.head()
-# %%
-df.columns
-# %%
-# Get 1 row as dict
-example = df.iloc[0].to_dict()
-print(example)
-example['Cusip'] = example['Cusip'][2:-1]
-print(example)
+# Stream the inventory chunk by chunk, malformed rows end up in rejected
+rejected = []
+for book, callable_book in financebro.read_fidelity_data('data/fidelity_data.csv', chunksize=10000, rejects=rejected.append):
+    print(f"Chunk: {len(book)} bonds, {len(callable_book)} callable bonds")
+    print(f"Fidelity Price: {book.compute_price()[:5]}")
+    print(f"Fidelity Yield to Maturity: {book.compute_ytm_percent()[:5]}")
+    print(f"Coupon period days: {book.coupon_period_days[:5]}")
 
 # %%
-import financebro
-
-bond = financebro.Bond(example['Cusip'],
-                        example['Price Ask'],
-                        example['Ask Yield to Maturity'],
-                        example['Coupon'],
-                        example['Maturity Date']
-                        )
+if rejected:
+    rejected = pd.concat(rejected)
+    print(rejected['Reject Reason'].value_counts())
 
-print(f"Return: {bond.total_return}")
-print(f"APY: {bond.apy}")
-print(f"Fidelity Price YTM 5%: {bond.compute_price(method='excel')}")
-print(f"Fidelity Yield to Maturity 1000$: {bond.compute_ytm()}")
-print(f"Number of coupons: {bond.num_coupons}, {bond.num_coupons_per_year}")
-print(bond.coupon_dates)
-print(f"Coupon period days: {bond.coupon_period_days}")
+# %%
+# Or load everything at once
+bonds, callable_bonds = financebro.preprocess_fidelity_data('data/fidelity_data.csv')
+print(f"{len(bonds)} bonds, {len(callable_bonds)} callable bonds")
 # %%
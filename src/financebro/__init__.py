@@ -1,7 +1,69 @@
-from .assets.fixed_income.bond import Bond, CallableBond
-from .assets.fixed_income.fixed_income_asset import FixedIncomeAsset
-from .tax.config import TAX_RATE_SEATTLE
+import importlib
 
-from .utils._math import *
-from .utils._bond import *
-from .utils._preprocess import *
\ No newline at end of file
+# Nothing is imported with the package, the submodules (and numpy, scipy, pandas, requests...) are only loaded when one
+# of their names is first accessed, e.g. `financebro.Bond`, through the module __getattr__ below (PEP 562)
+
+# Public name -> module, relative to the package
+_LAZY_ATTRIBUTES = {
+    'Bond': '.assets.fixed_income.bond',
+    'CallableBond': '.assets.fixed_income.bond',
+    'FixedIncomeAsset': '.assets.fixed_income.fixed_income_asset',
+    'BondBook': '.assets.fixed_income.bond_book',
+    'YieldCurve': '.assets.fixed_income.yield_curve',
+    'CashFlowLadder': '.assets.fixed_income.cash_flow_ladder',
+    'BondScreener': '.assets.fixed_income.bond_screener',
+    'YieldService': '.assets.fixed_income.yield_service',
+    'PriceYieldInterpolant': '.assets.fixed_income.price_yield_interpolant',
+    'ShortRateModel': '.assets.fixed_income.short_rate_model',
+    'OASEngine': '.assets.fixed_income.oas_engine',
+    'QuotePipeline': '.assets.fixed_income.quote_pipeline',
+    'IdentifierResolver': '.utils._resolver',
+    'MarketWatchSource': '.utils._resolver',
+    'evaluate_book_parallel': '.utils._parallel',
+}
+# Modules exported whole, public name -> module
+_LAZY_MODULES = {
+    'stats': '.utils._stats',
+}
+# Public names of the utils modules, they used to be star-imported
+_UTILS_EXPORTS = {
+    '.utils._math': ('date_to_ordinal', 'ordinal_to_date', 'dates_to_ordinals', 'ordinals_to_dates', 'ordinals_to_ymd',
+                     'ymd_to_ordinals', 'day_diff', 'day_diff_ordinal', 'day_diff_normal', 'day_diff_us_nasd_30_360',
+                     'day_diff_us_nasd_30_360_ordinal', 'day_diff_array', 'day_diff_us_nasd_30_360_array', 'remove_days',
+                     'remove_days_ordinal', 'remove_days_normal', 'remove_days_us_nasd_30_360',
+                     'remove_days_us_nasd_30_360_ordinal', 'remove_days_array', 'remove_days_us_nasd_30_360_array',
+                     'remove_days_us_nasd_30_360_ymd', 'solve_newton', 'solve_halley_batch', 'solve_secant_batch',
+                     'solve_bisection_batch', 'get_chebyshev_nodes', 'fit_chebyshev_batch', 'evaluate_chebyshev_batch'),
+    '.utils._bond': ('get_isin_from_cusip', 'get_isin_from_cusip_array', 'validate_isin_array', 'validate_cusip_array',
+                     'get_cusip_from_isin', 'get_cusip_from_sedol', 'get_sedol_from_cusip', 'get_sedol_from_isin',
+                     'get_isin_from_sedol', 'get_cusip_from_ticker', 'get_ticker_from_cusip', 'get_ticker_from_isin',
+                     'get_ticker_from_sedol', 'get_ticker_from_ticker', 'get_isin_from_ticker', 'get_sedol_from_ticker',
+                     'compute_ytm_excel_1_coupon', 'compute_price_excel', 'compute_price_duration_convexity_excel',
+                     'compute_price_excel_batch', 'compute_price_excel_derivatives_batch', 'compute_ytm_excel_batch',
+                     'compute_ytr_excel_batch', 'compute_approx_ytm_percent_batch', 'compute_apy_batch',
+                     'compute_price_textbook', 'get_coupons_date', 'get_coupons_ordinals', 'get_coupons_ordinals_batch',
+                     'get_coupons_count_batch', 'COUPON_PERIOD_DAYS_TRIALS', 'infer_coupon_period_days_batch'),
+    '.utils._preprocess': ('FIDELITY_COLUMNS', 'FIDELITY_REQUIRED_COLUMNS', 'read_fidelity_data', 'preprocess_fidelity_chunk',
+                           'preprocess_fidelity_data'),
+    '.utils._snapshot': ('SNAPSHOT_VERSION', 'SNAPSHOT_ANALYTICS', 'hash_file', 'save_book_snapshot', 'load_book_snapshot',
+                         'compute_snapshot_analytics', 'load_or_build_fidelity_snapshot'),
+}
+for _module, _names in _UTILS_EXPORTS.items():
+    _LAZY_ATTRIBUTES.update(dict.fromkeys(_names, _module))
+del _module, _names
+
+__all__ = sorted([*_LAZY_ATTRIBUTES, *_LAZY_MODULES])
+
+
+def __getattr__(name: str):
+    if name in _LAZY_MODULES:
+        value = importlib.import_module(_LAZY_MODULES[name], __name__)
+    elif name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value # later accesses don't go through __getattr__
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,9 +1,13 @@
-from typing import Tuple
-from datetime import date
+import bisect
+from itertools import islice
+from typing import Iterable, Iterator, Tuple, Union
 
-from financebro.assets.fixed_income.fixed_income_asset import FixedIncomeAsset
+import numpy as np
+
+from financebro.assets.fixed_income.fixed_income_asset import FixedIncomeAsset, slot_cached_property
 import financebro.utils._math as _math
 import financebro.utils._bond as _bond
+import financebro.utils._stats as _stats
 
 
 class Bond(FixedIncomeAsset):
@@ -19,17 +23,22 @@ class Bond(FixedIncomeAsset):
         coupon_period_days (int): Number of days between two coupons
         next_coupon_date (str): Next coupon date of the bond in format 'MM-DD-YYYY'
         maturity_date (str): Maturity date of the bond in format 'MM-DD-YYYY'
-        settlement_date (str, optional): Settlement date of the bond in format 'MM-DD-YYYY'. Defaults to date.today().strftime("%m-%d-%Y").
+        settlement_date (str, optional): Settlement date of the bond in format 'MM-DD-YYYY'. Defaults to today.
         face_value (int, optional): Face value of the bond. Defaults to 1000.
         date_convention (str, optional): Date convention for the bond. Can be 'us_nasd_30_360' | 'not_retarded'. Defaults to 'us_nasd_30_360'.
     """    
+    # Analytics are computed lazily on first access and dropped when the price or the settlement date changes
+    _CACHED_SLOTS = ('_coupon_ordinals', '_coupon_dates', '_incomes', '_total_return', '_apy')
+    __slots__ = ('cusip', 'coupon_period_days', 'num_coupons_per_year', 'coupon_rate_percent', 'coupon_rate', 'coupon',
+                 '_isin') + _CACHED_SLOTS
+
     def __init__(self,
                  cusip: str,
                  price_percent: float, ytm_percent: float,
                  annual_coupon_rate_percent: float,
                  maturity_date: str,
                  coupon_period_days: int= None,
-                 settlement_date: str= date.today().strftime("%m/%d/%Y"),
+                 settlement_date: str= None,
                  face_value: int= 1000,
                  date_convention: str= 'us_nasd_30_360'
                  ):
@@ -38,23 +47,89 @@ class Bond(FixedIncomeAsset):
                          maturity_date, settlement_date, 
                          face_value, date_convention)
         self.cusip = cusip
-        self.isin = _bond.get_isin_from_cusip(cusip, 'US')
 
         # Couponing
         if coupon_period_days is None:
-            self.coupon_dates, self.coupon_period_days = self.infer_coupons_dates()
+            self.coupon_ordinals, self.coupon_period_days = self._infer_coupons_ordinals()
         else:
             self.coupon_period_days = coupon_period_days
-            self.coupon_dates = _bond.get_coupons_date(settlement_date, maturity_date, coupon_period_days, date_convention)
         self.num_coupons_per_year = (360/self.coupon_period_days) if date_convention == 'us_nasd_30_360' else (365/self.coupon_period_days)
         self.coupon_rate_percent = annual_coupon_rate_percent / self.num_coupons_per_year# in %
         self.coupon_rate = self.coupon_rate_percent/100
         self.coupon = self.coupon_rate * face_value
-        self.num_coupons = len(self.coupon_dates)
 
-        
+    @slot_cached_property
+    def isin(self) -> str:
+        return _bond.get_isin_from_cusip(self.cusip, 'US')
+
+    @slot_cached_property
+    def coupon_ordinals(self):
+        return _bond.get_coupons_ordinals(self.settlement_ordinal, self.maturity_ordinal, self.coupon_period_days, self.date_convention)
+
+    @slot_cached_property
+    def coupon_dates(self) -> list:
+        return [_math.ordinal_to_date(coupon_ordinal) for coupon_ordinal in self.coupon_ordinals]
+
+    @property
+    def num_coupons(self) -> int:
+        return len(self.coupon_ordinals)
+
+    @property
+    def DSC(self) -> int:
+        # Days from settlement to the next coupon (Excel notation)
+        return _math.day_diff_ordinal(self.settlement_ordinal, self.coupon_ordinals[0]) if self.num_coupons else 0
+
+    @property
+    def accrued_interest(self) -> float:
+        # Coupon accrued since the previous coupon date, paid by the buyer on top of the clean price
+        return self.coupon * (self.coupon_period_days - self.DSC) / self.coupon_period_days if self.num_coupons else 0
+
+    @slot_cached_property
+    def incomes(self) -> dict:
+        self.incomes, self.total_return = self.compute_return()
+        return self._incomes
+
+    @slot_cached_property
+    def total_return(self) -> float:
         self.incomes, self.total_return = self.compute_return()
-        self.apy = self.compute_apy()
+        return self._total_return
+
+    @slot_cached_property
+    def apy(self) -> float:
+        return self.compute_apy()
+
+    def roll_forward(self, settlement_date: str):
+        """
+        Move the settlement date forward without rebuilding the bond
+        The schedule never changes with the settlement (it is walked back from maturity), so the coupons paid in between are
+        dropped from the cached schedule, coupon dates and incomes instead of regenerating them. Only the APY is recomputed.
+
+        Args:
+            settlement_date (str): New settlement date in format 'MM/DD/YYYY', on or after the current one
+
+        Raises:
+            ValueError: The new settlement date is before the current one
+
+        Returns:
+            int: Number of coupons paid between the two settlement dates
+        """
+        settlement_ordinal = _math.date_to_ordinal(settlement_date)
+        if settlement_ordinal < self.settlement_ordinal:
+            raise ValueError(f"Can only roll forward but {settlement_date} is before {self.settlement_date}")
+        coupon_ordinals = self.coupon_ordinals
+        paid = bisect.bisect_left(coupon_ordinals, settlement_ordinal)
+        cached = {slot: getattr(self, slot) for slot in ('_coupon_dates', '_incomes', '_total_return') if hasattr(self, slot)}
+        self._settlement_date = settlement_date
+        self.settlement_ordinal = settlement_ordinal
+        self._invalidate()
+        self._coupon_ordinals = coupon_ordinals[paid:]
+        # Coupon dates and incomes are in chronological order, the paid coupons are the first ones
+        if '_coupon_dates' in cached:
+            self._coupon_dates = cached['_coupon_dates'][paid:]
+        if '_incomes' in cached:
+            self._incomes = dict(islice(cached['_incomes'].items(), paid, None))
+            self._total_return = cached['_total_return'] - paid*self.coupon
+        return paid
 
     def compute_return(self) -> Tuple[dict, float]:
         """
@@ -67,7 +142,7 @@ class Bond(FixedIncomeAsset):
         incomes = {}
         for coupon_date in self.coupon_dates:
             incomes[coupon_date] = self.coupon
-        incomes[self.maturity_date] += self.face_value
+        incomes[_math.ordinal_to_date(self.maturity_ordinal)] += self.face_value
 
         interest_return = self.num_coupons * self.coupon
         redemption_return = self.face_value - self.price
@@ -82,20 +157,20 @@ class Bond(FixedIncomeAsset):
         Returns:
             float: The APY of the bond in percentage
         """        
-        diff_days = _math.day_diff(self.settlement_date, self.maturity_date)
-        _, total_return = self.compute_return()
-        yield_percent =  100 *(total_return / self.price)
+        diff_days = _math.day_diff_ordinal(self.settlement_ordinal, self.maturity_ordinal)
+        yield_percent =  100 *(self.total_return / self.price)
         daily_yield_percent = yield_percent / diff_days
         apy = daily_yield_percent * self.YEAR_DAYS
         return apy
     
-    def compute_ytm_percent(self, price_percent: float= None) -> float:
+    def compute_ytm_percent(self, price_percent: float= None, x0: float= 5) -> float:
         """
         Compute the Yield to Maturity of the bond in percentage
         From https://support.microsoft.com/en-gb/office/yield-function-f5f5ca43-c4bd-434f-8bd2-ed3c9727a4fe
 
         Args:
             price (float, optional): Price in percentage of the face value. If None it uses the price of the bond. Defaults to None.
+            x0 (float, optional): Initial guess in percentage, e.g. the last yield or compute_approx_ytm_percent(). Defaults to 5.
 
         Returns:
             float: The Yield to Maturity of the bond in percentage
@@ -108,13 +183,13 @@ class Bond(FixedIncomeAsset):
                 approx_price_percent = self.compute_price(x)
                 diff = approx_price_percent - price_percent
                 return diff
-            ytm_percent: float = _math.solve_newton(f, 5)
+            ytm_percent: float = _math.solve_newton(f, x0)
         elif self.num_coupons == 1:
             ytm_percent = _bond.compute_ytm_excel_1_coupon(price_percent,
                                                     self.annual_coupon_rate,
                                                     self.num_coupons_per_year,
                                                     self.face_value_percent,
-                                                    _math.day_diff(self.settlement_date, self.coupon_dates[0]),
+                                                    _math.day_diff_ordinal(self.settlement_ordinal, self.coupon_ordinals[0]),
                                                     self.coupon_period_days)
         return ytm_percent
     
@@ -133,7 +208,7 @@ class Bond(FixedIncomeAsset):
         # https://www.wallstreetprep.com/knowledge/yield-to-maturity-ytm/
         price = self.price if price_percent is None else price_percent/100 * self.face_value
         total_interest = self.num_coupons * self.coupon_rate * self.face_value
-        days_to_maturity = _math.day_diff(self.settlement_date, self.maturity_date)
+        days_to_maturity = _math.day_diff_ordinal(self.settlement_ordinal, self.maturity_ordinal)
         interest_per_day = total_interest / days_to_maturity
         interest_per_year = interest_per_day * self.YEAR_DAYS
         num_years = days_to_maturity / self.YEAR_DAYS
@@ -160,7 +235,7 @@ class Bond(FixedIncomeAsset):
         
         if method == 'excel':
             # Excel Notation for the formula
-            DSC = _math.day_diff(self.settlement_date, self.coupon_dates[0])
+            DSC = _math.day_diff_ordinal(self.settlement_ordinal, self.coupon_ordinals[0])
             price_percent = _bond.compute_price_excel(ytm_percent, 
                                                     self.annual_coupon_rate, 
                                                     self.num_coupons, 
@@ -170,7 +245,7 @@ class Bond(FixedIncomeAsset):
                                                     self.coupon_period_days)        
         elif method == 'textbook':
             # Textbook Notation for the formula
-            days_to_maturity = _math.day_diff(self.settlement_date, self.maturity_date)
+            days_to_maturity = _math.day_diff_ordinal(self.settlement_ordinal, self.maturity_ordinal)
             num_years = days_to_maturity // self.YEAR_DAYS
             price_percent = _bond.compute_price_textbook(ytm_percent, 
                                                         self.annual_coupon, 
@@ -179,6 +254,30 @@ class Bond(FixedIncomeAsset):
         
         return price_percent
 
+    def compute_duration_convexity(self, ytm_percent: float= None) -> Tuple[float, float, float, float]:
+        """
+        Compute the Excel price of the bond with its Macaulay duration, modified duration and convexity in one evaluation
+
+        Args:
+            ytm_percent (float, optional): Yield to Maturity of the bond in percentage. If None, it uses the ytm of the bond. Defaults to None.
+
+        Returns:
+            float: The price of the bond in percentage of the face value
+            float: The Macaulay duration in years
+            float: The modified duration in years
+            float: The convexity in years^2
+        """
+        if ytm_percent is None:
+            ytm_percent = self.ytm_percent
+        DSC = _math.day_diff_ordinal(self.settlement_ordinal, self.coupon_ordinals[0])
+        return _bond.compute_price_duration_convexity_excel(ytm_percent,
+                                                            self.annual_coupon_rate,
+                                                            self.num_coupons,
+                                                            self.num_coupons_per_year,
+                                                            self.face_value_percent,
+                                                            DSC,
+                                                            self.coupon_period_days)
+
     def infer_coupons_dates(self) -> Tuple[list, int]:
         """
         Infer the number of coupons of the bond from the price computation
@@ -189,16 +288,21 @@ class Bond(FixedIncomeAsset):
         Returns:
             int: The number of coupons of the bond
         """
+        coupon_ordinals, trial = self._infer_coupons_ordinals()
+        return [_math.ordinal_to_date(coupon_ordinal) for coupon_ordinal in coupon_ordinals], trial
+
+    def _infer_coupons_ordinals(self) -> Tuple[list, int]:
+        # Same as infer_coupons_dates but returns the coupon dates as day serials
         trials = [15, 30, 60, 90, 120, 180, 360]
         found = False
         log_tried = []
         for trial in trials:
-            coupon_dates = _bond.get_coupons_date(self.settlement_date, self.maturity_date, trial, self.date_convention)
-            DSC = _math.day_diff(self.settlement_date, coupon_dates[0])
+            coupon_ordinals = _bond.get_coupons_ordinals(self.settlement_ordinal, self.maturity_ordinal, trial, self.date_convention)
+            DSC = _math.day_diff_ordinal(self.settlement_ordinal, coupon_ordinals[0])
             num_coupons_per_year = (360/trial)
             price_percent = _bond.compute_price_excel(self.ytm_percent,
                                                       self.annual_coupon_rate, 
-                                                      len(coupon_dates), 
+                                                      len(coupon_ordinals), 
                                                       num_coupons_per_year, 
                                                       self.face_value_percent, 
                                                       DSC, 
@@ -208,26 +312,158 @@ class Bond(FixedIncomeAsset):
                 found = True
                 break
         if found:
-            return coupon_dates, trial
+            if _stats.enabled:
+                _stats.record_iterations('Bond.infer_coupons_dates', len(log_tried))
+            return coupon_ordinals, trial
         else:
-            raise ValueError("Could not infer the number of coupons of the bond")
+            if _stats.enabled:
+                _stats.record_event('Bond.infer_coupons_dates', 'not found', cusip=self.cusip, price_percent=self.price_percent, tried=log_tried)
+            raise ValueError(f"Could not infer the number of coupons of the bond, tried (period, price): {log_tried}")
 
 
 
-# TODO To simplify for now, consider worst case which is CallableBond are called on first day of call date
 class CallableBond(Bond):
+    """
+    A bond the issuer can redeem before maturity, on the dates of its call schedule at the call prices.
+    The yields to every call date and to maturity are solved together, the yield to worst is the lowest of them.
+
+    Args:
+        cusip (str): CUSIP number of the bond
+        price_percent (float): Price of the bond in percentage of the face value
+        ytm_percent (float): Yield to Maturity of the bond in percentage
+        annual_coupon_rate_percent (float): Annual coupon rate of the bond in percentage
+        maturity_date (str): Maturity date of the bond in format 'MM/DD/YYYY'
+        call_dates (Iterable[str], optional): Call dates of the bond in format 'MM/DD/YYYY', the ones after maturity are ignored. Defaults to no call.
+        call_prices_percent (Iterable[float], optional): Redemption price on each call date in percentage of the face value, or one for all. Defaults to 100.
+        coupon_period_days (int, optional): Number of days between two coupons. Defaults to inferring it from the price.
+        settlement_date (str, optional): Settlement date of the bond in format 'MM/DD/YYYY'. Defaults to today.
+        face_value (int, optional): Face value of the bond. Defaults to 1000.
+        date_convention (str, optional): Date convention for the bond. Can be 'us_nasd_30_360' | 'not_retarded'. Defaults to 'us_nasd_30_360'.
+    """
+    __slots__ = ('call_ordinals', 'call_prices_percent')
+
     def __init__(self,
                  cusip: str,
-                 price_percent:float , ytm_percent: float,
+                 price_percent: float, ytm_percent: float,
                  annual_coupon_rate_percent: float,
-                 call_date: str, # Same as maturity date if not callable
-                 coupon_period_days:int = None,
-                 settlement_date=date.today().strftime("%m-%d-%Y"),
-                 face_value: float= 1000,
+                 maturity_date: str,
+                 call_dates: Iterable[str]= (),
+                 call_prices_percent: Union[Iterable[float], float]= 100,
+                 coupon_period_days: int= None,
+                 settlement_date: str= None,
+                 face_value: int= 1000,
                  date_convention: str= 'us_nasd_30_360'
                  ):
-        super().__init__(cusip, 
-                         price_percent, ytm_percent, 
-                         annual_coupon_rate_percent, coupon_period_days, 
-                         call_date, settlement_date,
+        super().__init__(cusip,
+                         price_percent, ytm_percent,
+                         annual_coupon_rate_percent, maturity_date,
+                         coupon_period_days, settlement_date,
                          face_value, date_convention)
+        call_ordinals = [_math.date_to_ordinal(call_date) for call_date in call_dates]
+        # Any scalar, NumPy ones included. np.ndim of a generator is 0 too
+        if np.ndim(call_prices_percent) == 0 and not isinstance(call_prices_percent, Iterator):
+            call_prices_percent = [call_prices_percent] * len(call_ordinals)
+        call_prices_percent = list(call_prices_percent)
+        if len(call_prices_percent) != len(call_ordinals):
+            raise ValueError(f"Got {len(call_ordinals)} call dates but {len(call_prices_percent)} call prices")
+        calls = sorted((ordinal, price) for ordinal, price in zip(call_ordinals, call_prices_percent) if ordinal < self.maturity_ordinal)
+        self.call_ordinals = [ordinal for ordinal, _ in calls]
+        self.call_prices_percent = [price for _, price in calls]
+
+    @property
+    def call_dates(self) -> list:
+        return [_math.ordinal_to_date(call_ordinal) for call_ordinal in self.call_ordinals]
+
+    def get_redemptions(self) -> Tuple[list, list]:
+        """
+        Possible redemptions of the bond after settlement: the call dates still ahead, then maturity at par
+
+        Returns:
+            list: Day serials of the redemption dates
+            list: Redemption values in percentage of the face value
+        """
+        first = bisect.bisect_right(self.call_ordinals, self.settlement_ordinal)
+        return (self.call_ordinals[first:] + [self.maturity_ordinal],
+                self.call_prices_percent[first:] + [self.face_value_percent])
+
+    def compute_yields_percent(self, price_percent: float= None) -> np.ndarray:
+        """
+        Compute the yield to every call date still ahead and to maturity, with one batched solve
+
+        Args:
+            price_percent (float, optional): Price in percentage of the face value. If None it uses the price of the bond. Defaults to None.
+
+        Returns:
+            np.ndarray: The yields in percentage, in the order of get_redemptions (maturity last)
+        """
+        return CallableBond.compute_ytw_percent_batch([self], None if price_percent is None else [price_percent])[3]
+
+    def compute_ytc_percent(self, price_percent: float= None) -> np.ndarray:
+        """
+        Compute the Yield to Call of every call date still ahead
+
+        Args:
+            price_percent (float, optional): Price in percentage of the face value. If None it uses the price of the bond. Defaults to None.
+
+        Returns:
+            np.ndarray: The yields to each call date in percentage
+        """
+        return self.compute_yields_percent(price_percent)[:-1]
+
+    def compute_ytw_percent(self, price_percent: float= None) -> Tuple[float, str]:
+        """
+        Compute the Yield to Worst of the bond, the lowest of the yields to call and to maturity
+
+        Args:
+            price_percent (float, optional): Price in percentage of the face value. If None it uses the price of the bond. Defaults to None.
+
+        Returns:
+            float: The Yield to Worst in percentage
+            str: The redemption date of the worst case in format 'MM/DD/YYYY'
+        """
+        ytw_percent, worst_ordinal, _, _ = CallableBond.compute_ytw_percent_batch([self], None if price_percent is None else [price_percent])
+        return float(ytw_percent[0]), _math.ordinal_to_date(int(worst_ordinal[0]))
+
+    @staticmethod
+    def compute_ytw_percent_batch(bonds: Iterable['CallableBond'], price_percent: np.ndarray= None
+                                  ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Compute the yields to every redemption of many callable bonds with one batched solve, and their Yield to Worst
+        The bonds must share the same date convention.
+
+        Args:
+            bonds (Iterable[CallableBond]): The bonds
+            price_percent (np.ndarray, optional): Prices in percentage of the face value. If None it uses the prices of the bonds. Defaults to None.
+
+        Returns:
+            np.ndarray: The Yields to Worst in percentage
+            np.ndarray: Day serials of the redemption dates of the worst cases
+            np.ndarray: Offsets of the yields of each bond in the flat yields (CSR layout, like the coupon schedules)
+            np.ndarray: The flat yields to every redemption in percentage, maturity last for each bond
+        """
+        bonds = list(bonds)
+        date_conventions = {bond.date_convention for bond in bonds}
+        if len(date_conventions) > 1:
+            raise ValueError(f"All the bonds must share the same date convention but got {date_conventions}")
+        if price_percent is None:
+            price_percent = [bond.price_percent for bond in bonds]
+        redemptions = [bond.get_redemptions() for bond in bonds]
+        counts = np.array([len(ordinals) for ordinals, _ in redemptions], dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        # Ragged schedules are padded with maturity at par, which does not change the worst case
+        width = int(counts.max(initial=1))
+        redemption = np.array([ordinals + ordinals[-1:]*(width - len(ordinals)) for ordinals, _ in redemptions], dtype=np.int64).reshape(-1, width)
+        redemption_percent = np.array([values + values[-1:]*(width - len(values)) for _, values in redemptions], dtype=float).reshape(-1, width)
+        column = lambda values, dtype= float: np.array(values, dtype=dtype)[:, None]
+        yields_percent = _bond.compute_ytr_excel_batch(column(price_percent),
+                                                       column([bond.annual_coupon_rate for bond in bonds]),
+                                                       column([bond.settlement_ordinal for bond in bonds], np.int64),
+                                                       redemption,
+                                                       redemption_percent,
+                                                       column([bond.coupon_period_days for bond in bonds], np.int64),
+                                                       date_conventions.pop() if date_conventions else 'us_nasd_30_360')
+        # NaN only if no yield could be solved at all
+        worst = np.argmin(np.where(np.isnan(yields_percent), np.inf, yields_percent), axis=1)
+        rows = np.arange(len(bonds))
+        ytw_percent = yields_percent[rows, worst]
+        return ytw_percent, redemption[rows, worst], offsets, yields_percent[np.arange(width) < counts[:, None]]
@@ -0,0 +1,438 @@
+from typing import Iterable, Tuple
+
+import numpy as np
+
+import financebro.utils._math as _math
+import financebro.utils._bond as _bond
+
+# Number of bonds x scenarios float arrays alive at once inside compute_price_excel_batch, used to size the scenario chunks
+_SCENARIO_TEMPORARIES = 16
+
+
+class BondBook:
+    """
+    Columnar container of bonds. Instead of one Python object per bond, the inputs of the Excel PRICE formula are stored as NumPy arrays
+    so a whole inventory can be priced in one vectorized call.
+
+    Args:
+        cusips (Iterable[str]): CUSIP numbers of the bonds
+        price_percent (np.ndarray): Prices of the bonds in percentage of the face value
+        ytm_percent (np.ndarray): Yields to Maturity of the bonds in percentage
+        annual_coupon_rate (np.ndarray): Annual coupon rates of the bonds (not in percentage)
+        num_coupons (np.ndarray): Number of coupons left for each bond (N in Excel notation)
+        num_coupons_per_year (np.ndarray): Number of coupons per year (frequency in Excel notation)
+        DSC (np.ndarray): Number of days from settlement to the next coupon date
+        coupon_period_days (np.ndarray): Number of days between two coupons (E in Excel notation)
+        face_value_percent (np.ndarray, optional): Redemption value in percentage of the face value. Defaults to 100.
+        maturity_ordinal (np.ndarray, optional): Day serials of the maturity dates, needed for schedules. Defaults to None.
+        settlement_ordinal (np.ndarray, optional): Day serials of the settlement dates, needed for schedules. Defaults to None.
+        date_convention (str, optional): Date convention of the whole book. Can be 'us_nasd_30_360' | 'not_retarded'. Defaults to 'us_nasd_30_360'.
+    """
+    # Per-bond columns, all of them have the same length (the date columns can be None)
+    FIELDS = ('cusips', 'price_percent', 'ytm_percent', 'annual_coupon_rate', 'num_coupons',
+              'num_coupons_per_year', 'DSC', 'coupon_period_days', 'face_value_percent',
+              'maturity_ordinal', 'settlement_ordinal')
+
+    def __init__(self,
+                 cusips: Iterable[str],
+                 price_percent: np.ndarray, ytm_percent: np.ndarray,
+                 annual_coupon_rate: np.ndarray,
+                 num_coupons: np.ndarray,
+                 num_coupons_per_year: np.ndarray,
+                 DSC: np.ndarray,
+                 coupon_period_days: np.ndarray,
+                 face_value_percent: np.ndarray= 100,
+                 maturity_ordinal: np.ndarray= None,
+                 settlement_ordinal: np.ndarray= None,
+                 date_convention: str= 'us_nasd_30_360'
+                 ):
+        # Own writable copies, the book never aliases the caller's arrays (scalars are broadcast to full columns)
+        self.cusips = np.array(cusips, dtype=str)
+        size = len(self.cusips)
+        column = lambda x, dtype: np.array(np.broadcast_to(x, (size,)), dtype=dtype, copy=True)
+        self.price_percent = column(price_percent, float)
+        self.ytm_percent = column(ytm_percent, float)
+        self.annual_coupon_rate = column(annual_coupon_rate, float)
+        self.num_coupons = column(num_coupons, np.int64)
+        self.num_coupons_per_year = column(num_coupons_per_year, float)
+        self.DSC = column(DSC, float)
+        self.coupon_period_days = column(coupon_period_days, float)
+        self.face_value_percent = column(face_value_percent, float)
+        self.maturity_ordinal = None if maturity_ordinal is None else column(maturity_ordinal, np.int64)
+        self.settlement_ordinal = None if settlement_ordinal is None else column(settlement_ordinal, np.int64)
+        self.date_convention = date_convention
+        self._next_coupon_ordinal = None # first coupon on or after settlement, kept for roll_forward
+
+    @classmethod
+    def from_bonds(cls, bonds: Iterable) -> 'BondBook':
+        """
+        Build a BondBook from Bond objects
+
+        Args:
+            bonds (Iterable[Bond]): The bonds to put in the book
+
+        Returns:
+            BondBook: The columnar book, in the same order as the bonds
+        """
+        bonds = list(bonds)
+        date_conventions = {bond.date_convention for bond in bonds}
+        if len(date_conventions) > 1:
+            raise ValueError(f"All the bonds of a book must share the same date convention but got {date_conventions}")
+        return cls([bond.cusip for bond in bonds],
+                   [bond.price_percent for bond in bonds],
+                   [bond.ytm_percent for bond in bonds],
+                   [bond.annual_coupon_rate for bond in bonds],
+                   [bond.num_coupons for bond in bonds],
+                   [bond.num_coupons_per_year for bond in bonds],
+                   [_math.day_diff_ordinal(bond.settlement_ordinal, bond.coupon_ordinals[0]) for bond in bonds],
+                   [bond.coupon_period_days for bond in bonds],
+                   [bond.face_value_percent for bond in bonds],
+                   [bond.maturity_ordinal for bond in bonds],
+                   [bond.settlement_ordinal for bond in bonds],
+                   date_conventions.pop() if date_conventions else 'us_nasd_30_360')
+
+    @classmethod
+    def from_dates(cls,
+                   cusips: Iterable[str],
+                   price_percent: np.ndarray, ytm_percent: np.ndarray,
+                   annual_coupon_rate: np.ndarray,
+                   maturity_ordinal: np.ndarray,
+                   settlement_ordinal: np.ndarray,
+                   coupon_period_days: np.ndarray,
+                   face_value_percent: np.ndarray= 100,
+                   date_convention: str= 'us_nasd_30_360'
+                   ) -> 'BondBook':
+        """
+        Build a BondBook from the dates of the bonds, the coupon schedules of the whole book are generated in bulk
+
+        Args:
+            cusips (Iterable[str]): CUSIP numbers of the bonds
+            price_percent (np.ndarray): Prices of the bonds in percentage of the face value
+            ytm_percent (np.ndarray): Yields to Maturity of the bonds in percentage
+            annual_coupon_rate (np.ndarray): Annual coupon rates of the bonds (not in percentage)
+            maturity_ordinal (np.ndarray): Day serials of the maturity dates
+            settlement_ordinal (np.ndarray): Day serials of the settlement dates
+            coupon_period_days (np.ndarray): Number of days between two coupons
+            face_value_percent (np.ndarray, optional): Redemption value in percentage of the face value. Defaults to 100.
+            date_convention (str, optional): Date convention of the whole book. Can be 'us_nasd_30_360' | 'not_retarded'. Defaults to 'us_nasd_30_360'.
+
+        Returns:
+            BondBook: The columnar book
+        """
+        book = cls(cusips, price_percent, ytm_percent, annual_coupon_rate,
+                   0, 0, 0, coupon_period_days, face_value_percent,
+                   maturity_ordinal, settlement_ordinal, date_convention)
+        book._set_coupons(*book.get_coupon_schedules())
+        return book
+
+    @classmethod
+    def concatenate(cls, books: Iterable['BondBook']) -> 'BondBook':
+        """
+        Stack several books into one
+
+        Args:
+            books (Iterable[BondBook]): The books to stack, they must share the same date convention
+
+        Returns:
+            BondBook: The stacked book, in order
+        """
+        books = list(books)
+        if not books:
+            return cls([], [], [], [], [], [], [], [], [], [], [])
+        date_conventions = {book.date_convention for book in books}
+        if len(date_conventions) > 1:
+            raise ValueError(f"All the books must share the same date convention but got {date_conventions}")
+        columns = {}
+        for field in cls.FIELDS:
+            values = [getattr(book, field) for book in books]
+            columns[field] = None if any(v is None for v in values) else np.concatenate(values)
+        return cls._from_columns(columns, date_conventions.pop())
+
+    @classmethod
+    def _from_columns(cls, columns: dict, date_convention: str) -> 'BondBook':
+        # Wrap already built columns without copying them (slices, memory-mapped arrays...)
+        book = object.__new__(cls)
+        for field in cls.FIELDS:
+            setattr(book, field, columns.get(field))
+        book.date_convention = date_convention
+        book._next_coupon_ordinal = None
+        return book
+
+    def _set_coupons(self, offsets: np.ndarray, coupon_ordinals: np.ndarray):
+        # Derive N, frequency and DSC from the coupon schedules, same rules as Bond
+        self.num_coupons = np.diff(offsets)
+        has_coupons = self.num_coupons > 0
+        first_coupon = self.maturity_ordinal.copy()
+        first_coupon[has_coupons] = coupon_ordinals[offsets[:-1][has_coupons]]
+        self.DSC = _math.day_diff_array(self.settlement_ordinal, first_coupon).astype(float)
+        self._next_coupon_ordinal = first_coupon
+        year_days = 360 if self.date_convention == 'us_nasd_30_360' else 365
+        self.num_coupons_per_year = year_days / self.coupon_period_days
+
+    def __len__(self) -> int:
+        return len(self.cusips)
+
+    def __getitem__(self, index) -> 'BondBook':
+        """
+        Select a sub-book with a slice, an array of indices or a boolean mask
+        """
+        columns = {field: getattr(self, field) for field in self.FIELDS}
+        return self._from_columns({field: None if values is None else values[index] for field, values in columns.items()},
+                                  self.date_convention)
+
+    def get_coupon_schedules(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Coupon schedules of every bond of the book, generated in bulk
+        The schedule of bond i is coupon_ordinals[offsets[i]:offsets[i+1]].
+
+        Raises:
+            ValueError: The book was built without its dates
+
+        Returns:
+            np.ndarray: Offsets of each schedule in the flat array (size number of bonds + 1)
+            np.ndarray: Flat array of the coupon dates as day serials
+        """
+        if self.maturity_ordinal is None or self.settlement_ordinal is None:
+            raise ValueError("The book needs maturity_ordinal and settlement_ordinal to build the coupon schedules")
+        return _bond.get_coupons_ordinals_batch(self.settlement_ordinal,
+                                                self.maturity_ordinal,
+                                                self.coupon_period_days.astype(np.int64),
+                                                self.date_convention)
+
+    def roll_forward(self, settlement_ordinal: np.ndarray) -> np.ndarray:
+        """
+        Move the settlement date of the book forward in place, for daily reruns over the same universe
+        DSC is updated for every bond in one vectorized pass, but only the bonds that paid a coupon (or matured) in between
+        get their remaining coupons recounted, so a day without coupons costs a couple of array operations.
+
+        Args:
+            settlement_ordinal (np.ndarray): Day serials of the new settlement dates, on or after the current ones
+
+        Raises:
+            ValueError: The book was built without its dates or a settlement date goes backwards
+
+        Returns:
+            np.ndarray: Boolean mask of the bonds that paid a coupon between the two settlement dates
+        """
+        if self.maturity_ordinal is None or self.settlement_ordinal is None:
+            raise ValueError("The book needs maturity_ordinal and settlement_ordinal to roll forward")
+        settlement_ordinal = np.ascontiguousarray(np.broadcast_to(np.asarray(settlement_ordinal, dtype=np.int64), (len(self),)))
+        if np.any(settlement_ordinal < self.settlement_ordinal):
+            raise ValueError("Can only roll the settlement dates forward")
+        if self._next_coupon_ordinal is None:
+            _, self._next_coupon_ordinal = _bond.get_coupons_count_batch(self.settlement_ordinal,
+                                                                         self.maturity_ordinal,
+                                                                         self.coupon_period_days.astype(np.int64),
+                                                                         self.date_convention)
+        crossed = (self.num_coupons > 0) & (self._next_coupon_ordinal < settlement_ordinal)
+        # New arrays rather than in place writes, columns can be read-only (memory-mapped snapshots)
+        if np.any(crossed):
+            index = np.flatnonzero(crossed)
+            self.num_coupons, self._next_coupon_ordinal = self.num_coupons.copy(), self._next_coupon_ordinal.copy()
+            self.num_coupons[index], self._next_coupon_ordinal[index] = _bond.get_coupons_count_batch(settlement_ordinal[index],
+                                                                                                      self.maturity_ordinal[index],
+                                                                                                      self.coupon_period_days[index].astype(np.int64),
+                                                                                                      self.date_convention)
+        self.DSC = _math.day_diff_array(settlement_ordinal, self._next_coupon_ordinal).astype(float)
+        self.settlement_ordinal = settlement_ordinal
+        return crossed
+
+    def compute_accrued_interest(self) -> np.ndarray:
+        """
+        Accrued interest of every bond of the book since its previous coupon, same convention as the Excel PRICE formula
+
+        Returns:
+            np.ndarray: The accrued interests in percentage of the face value
+        """
+        coupon = 100*self.annual_coupon_rate/self.num_coupons_per_year
+        return np.where(self.num_coupons > 0, coupon * (self.coupon_period_days - self.DSC) / self.coupon_period_days, 0)
+
+    def compute_price(self, ytm_percent: np.ndarray= None) -> np.ndarray:
+        """
+        Compute the Excel price of every bond of the book in percentage of the face value
+        From https://support.microsoft.com/en-us/office/price-function-3ea9deac-8dfa-436f-a7c8-17ea02c21b0a
+
+        Args:
+            ytm_percent (np.ndarray, optional): Yields to Maturity in percentage. If None, it uses the ytm of the bonds. Defaults to None.
+
+        Returns:
+            np.ndarray: The prices of the bonds in percentage of the face value
+        """
+        if ytm_percent is None:
+            ytm_percent = self.ytm_percent
+        return _bond.compute_price_excel_batch(ytm_percent,
+                                               self.annual_coupon_rate,
+                                               self.num_coupons,
+                                               self.num_coupons_per_year,
+                                               self.face_value_percent,
+                                               self.DSC,
+                                               self.coupon_period_days)
+
+    def compute_ytm_percent(self, price_percent: np.ndarray= None, x0: np.ndarray= 5, iterations: np.ndarray= None) -> np.ndarray:
+        """
+        Compute the Yield to Maturity of every bond of the book in percentage, with one batched solve
+        From https://support.microsoft.com/en-gb/office/yield-function-f5f5ca43-c4bd-434f-8bd2-ed3c9727a4fe
+
+        Args:
+            price_percent (np.ndarray, optional): Prices in percentage of the face value. If None it uses the price of the bonds. Defaults to None.
+            x0 (np.ndarray, optional): Initial guess of the yields in percentage. Defaults to 5.
+            iterations (np.ndarray, optional): Integer array the size of the book, filled in place with the number of solver
+                iterations of each bond. Defaults to None.
+
+        Returns:
+            np.ndarray: The Yields to Maturity of the bonds in percentage
+        """
+        if price_percent is None:
+            price_percent = self.price_percent
+        return _bond.compute_ytm_excel_batch(price_percent,
+                                             self.annual_coupon_rate,
+                                             self.num_coupons,
+                                             self.num_coupons_per_year,
+                                             self.face_value_percent,
+                                             self.DSC,
+                                             self.coupon_period_days,
+                                             x0=x0,
+                                             iterations=iterations)
+
+    def compute_approx_ytm_percent(self, price_percent: np.ndarray= None) -> np.ndarray:
+        """
+        Compute the approximate Yield to Maturity of every bond of the book in percentage, same formula as Bond.compute_approx_ytm_percent
+        A good initial guess for compute_ytm_percent.
+
+        Args:
+            price_percent (np.ndarray, optional): Prices in percentage of the face value. If None it uses the price of the bonds. Defaults to None.
+
+        Raises:
+            ValueError: The book was built without its dates
+
+        Returns:
+            np.ndarray: An approximate Yield to Maturity of the bonds in percentage
+        """
+        if self.maturity_ordinal is None or self.settlement_ordinal is None:
+            raise ValueError("The book needs maturity_ordinal and settlement_ordinal to compute the approximate YTM")
+        if price_percent is None:
+            price_percent = self.price_percent
+        year_days = 360 if self.date_convention == 'us_nasd_30_360' else 365
+        return _bond.compute_approx_ytm_percent_batch(price_percent,
+                                                      self.annual_coupon_rate,
+                                                      self.num_coupons,
+                                                      self.num_coupons_per_year,
+                                                      self.face_value_percent,
+                                                      _math.day_diff_array(self.settlement_ordinal, self.maturity_ordinal),
+                                                      year_days)
+
+    def compute_apy(self, price_percent: np.ndarray= None) -> np.ndarray:
+        """
+        Compute the APY of every bond of the book in percentage, same formula as Bond.compute_apy
+
+        Args:
+            price_percent (np.ndarray, optional): Prices in percentage of the face value. If None it uses the price of the bonds. Defaults to None.
+
+        Raises:
+            ValueError: The book was built without its dates
+
+        Returns:
+            np.ndarray: The APY of the bonds in percentage
+        """
+        if self.maturity_ordinal is None or self.settlement_ordinal is None:
+            raise ValueError("The book needs maturity_ordinal and settlement_ordinal to compute the APY")
+        if price_percent is None:
+            price_percent = self.price_percent
+        year_days = 360 if self.date_convention == 'us_nasd_30_360' else 365
+        return _bond.compute_apy_batch(price_percent,
+                                       self.annual_coupon_rate,
+                                       self.num_coupons,
+                                       self.num_coupons_per_year,
+                                       self.face_value_percent,
+                                       _math.day_diff_array(self.settlement_ordinal, self.maturity_ordinal),
+                                       year_days)
+
+    def compute_duration_convexity(self, ytm_percent: np.ndarray= None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Compute the Excel price of every bond of the book with its Macaulay duration, modified duration and convexity in one evaluation
+
+        Args:
+            ytm_percent (np.ndarray, optional): Yields to Maturity in percentage. If None, it uses the ytm of the bonds. Defaults to None.
+
+        Returns:
+            np.ndarray: The prices of the bonds in percentage of the face value
+            np.ndarray: The Macaulay durations in years
+            np.ndarray: The modified durations in years
+            np.ndarray: The convexities in years^2
+        """
+        if ytm_percent is None:
+            ytm_percent = self.ytm_percent
+        return _bond.compute_price_duration_convexity_excel(ytm_percent,
+                                                            self.annual_coupon_rate,
+                                                            self.num_coupons,
+                                                            self.num_coupons_per_year,
+                                                            self.face_value_percent,
+                                                            self.DSC,
+                                                            self.coupon_period_days)
+
+    def get_twist_shocks(self, short_shocks_percent: np.ndarray, long_shocks_percent: np.ndarray,
+                         short_years: float= 2, long_years: float= 10) -> np.ndarray:
+        """
+        Yield shocks of twist scenarios for every bond, interpolated linearly on the time to maturity
+        Bonds maturing before short_years get the short shock, after long_years the long shock.
+
+        Args:
+            short_shocks_percent (np.ndarray): Shock of the short end of each scenario, in percentage points
+            long_shocks_percent (np.ndarray): Shock of the long end of each scenario, in percentage points
+            short_years (float, optional): Maturity of the short end in years. Defaults to 2.
+            long_years (float, optional): Maturity of the long end in years. Defaults to 10.
+
+        Returns:
+            np.ndarray: The shocks, bonds x scenarios, to pass to compute_scenarios
+        """
+        short_shocks_percent = np.atleast_1d(np.asarray(short_shocks_percent, dtype=float))
+        long_shocks_percent = np.atleast_1d(np.asarray(long_shocks_percent, dtype=float))
+        # Same time grid as the Excel formula, the last coupon is paid at maturity
+        years = (self.DSC/self.coupon_period_days + self.num_coupons - 1) / self.num_coupons_per_year
+        weight = np.clip((years - short_years) / (long_years - short_years), 0, 1)[:, None]
+        return (1 - weight)*short_shocks_percent[None, :] + weight*long_shocks_percent[None, :]
+
+    def compute_scenarios(self,
+                          shocks_percent: np.ndarray,
+                          ytm_percent: np.ndarray= None,
+                          pnl: bool= False,
+                          max_memory_bytes: int= 256 * 2**20,
+                          out: np.ndarray= None
+                          ) -> np.ndarray:
+        """
+        Reprice every bond of the book under many yield shocks, bonds x scenarios with one broadcast evaluation of the Excel PRICE formula per chunk
+        The bonds are processed in chunks so the temporaries of the evaluation stay under max_memory_bytes.
+
+        Args:
+            shocks_percent (np.ndarray): Yield shifts in percentage points, a vector of parallel shifts (one per scenario)
+                or a bonds x scenarios matrix (see get_twist_shocks)
+            ytm_percent (np.ndarray, optional): Yields to Maturity before the shocks in percentage. If None, it uses the ytm of the bonds. Defaults to None.
+            pnl (bool, optional): Return the price changes from the unshocked prices instead of the prices. Defaults to False.
+            max_memory_bytes (int, optional): Memory budget of the temporaries of one chunk. Defaults to 256MB.
+            out (np.ndarray, optional): Bonds x scenarios array to write into, e.g. a np.memmap for grids too large for memory. Defaults to None.
+
+        Returns:
+            np.ndarray: The prices (or P&L) in percentage of the face value, bonds x scenarios
+        """
+        if ytm_percent is None:
+            ytm_percent = self.ytm_percent
+        ytm_percent = np.broadcast_to(np.asarray(ytm_percent, dtype=float), (len(self),))
+        shocks_percent = np.asarray(shocks_percent, dtype=float)
+        num_scenarios = shocks_percent.shape[-1]
+        if shocks_percent.ndim == 1:
+            shocks_percent = shocks_percent[None, :]
+        elif shocks_percent.shape != (len(self), num_scenarios):
+            raise ValueError(f"shocks_percent must be a vector or a {len(self)} x scenarios matrix but got {shocks_percent.shape}")
+        if out is None:
+            out = np.empty((len(self), num_scenarios))
+        chunk_size = max(1, max_memory_bytes // (8 * _SCENARIO_TEMPORARIES * max(num_scenarios, 1)))
+        column = lambda values, chunk: values[chunk, None]
+        for start in range(0, len(self), chunk_size):
+            chunk = slice(start, start + chunk_size)
+            shocks = shocks_percent if len(shocks_percent) == 1 else shocks_percent[chunk]
+            inputs = [column(values, chunk) for values in (self.annual_coupon_rate, self.num_coupons, self.num_coupons_per_year,
+                                                           self.face_value_percent, self.DSC, self.coupon_period_days)]
+            out[chunk] = _bond.compute_price_excel_batch(column(ytm_percent, chunk) + shocks, *inputs)
+            if pnl:
+                out[chunk] -= _bond.compute_price_excel_batch(column(ytm_percent, chunk), *inputs)
+        return out
@@ -0,0 +1,128 @@
+from typing import Dict, Tuple
+
+import numpy as np
+
+from financebro.assets.fixed_income.bond_book import BondBook
+
+
+class BondScreener:
+    """
+    Repeated queries over a book: range predicates on the columns and top-k
+    The columns in INDEXED_COLUMNS are kept sorted once, a range on one of them is two binary searches. The most selective
+    indexed range gives the candidates and the other predicates are evaluated as boolean masks on those candidates only.
+
+    Args:
+        book (BondBook): The bonds to screen, build it with BondBook.from_bonds for Bond objects
+        tax_rate (float, optional): Tax rate on the interests (not in percentage), for the after tax yields. Defaults to 0.
+        tax_exempt (np.ndarray, optional): Boolean mask of the bonds whose interests are not taxed (e.g. munis). Defaults to False.
+    """
+    # Columns with a sorted index
+    INDEXED_COLUMNS = ('maturity_ordinal', 'ytm_percent', 'after_tax_ytm_percent', 'apy')
+
+    def __init__(self, book: BondBook, tax_rate: float= 0, tax_exempt: np.ndarray= False):
+        self.book = book
+        size = len(book)
+        tax_exempt = np.broadcast_to(np.asarray(tax_exempt, dtype=bool), (size,))
+        has_dates = book.maturity_ordinal is not None and book.settlement_ordinal is not None
+        self.columns = {
+            'maturity_ordinal': book.maturity_ordinal if book.maturity_ordinal is not None else np.full(size, -1, dtype=np.int64),
+            'price_percent': book.price_percent,
+            'annual_coupon_rate': book.annual_coupon_rate,
+            'ytm_percent': book.ytm_percent,
+            'after_tax_ytm_percent': np.where(tax_exempt, book.ytm_percent, book.ytm_percent * (1 - tax_rate)),
+            'apy': book.compute_apy() if has_dates else np.full(size, np.nan),
+        }
+        # column -> (positions sorted by value, sorted values, number of non NaN values), NaNs are sorted last
+        self._indexes = {}
+        for name in self.INDEXED_COLUMNS:
+            order = np.argsort(self.columns[name], kind='stable')
+            values = self.columns[name][order]
+            self._indexes[name] = (order, values, size - int(np.count_nonzero(np.isnan(values))) if values.dtype.kind == 'f' else size)
+
+    def __len__(self) -> int:
+        return len(self.book)
+
+    def _get_range(self, name: str, low, high) -> Tuple[int, int]:
+        # Slice of the sorted index with low <= value <= high
+        _, values, valid = self._indexes[name]
+        start = 0 if low is None else int(np.searchsorted(values[:valid], low, side='left'))
+        stop = valid if high is None else int(np.searchsorted(values[:valid], high, side='right'))
+        return start, max(start, stop)
+
+    def screen(self, **ranges: Tuple[float, float]) -> np.ndarray:
+        """
+        Bonds matching every range (both ends included, None for an open end), e.g.
+        screener.screen(maturity_ordinal=(date_to_ordinal('01/01/2026'), None), ytm_percent=(4, 6), annual_coupon_rate=(None, 0.05))
+
+        Args:
+            **ranges (Tuple[float, float]): Column -> (low, high), columns are the keys of self.columns
+
+        Raises:
+            ValueError: Unknown column
+
+        Returns:
+            np.ndarray: Positions of the matching bonds in the book, in book order
+        """
+        unknown = [name for name in ranges if name not in self.columns]
+        if unknown:
+            raise ValueError(f"Columns available : {list(self.columns)} but got {unknown}")
+        # Candidates from the most selective indexed range
+        slices = {name: self._get_range(name, *bounds) for name, bounds in ranges.items() if name in self._indexes}
+        if slices:
+            best = min(slices, key=lambda name: slices[name][1] - slices[name][0])
+            start, stop = slices.pop(best)
+            candidates = np.sort(self._indexes[best][0][start:stop])
+            ranges = {name: bounds for name, bounds in ranges.items() if name != best}
+        else:
+            candidates = np.arange(len(self))
+        mask = np.ones(len(candidates), dtype=bool)
+        for name, (low, high) in ranges.items():
+            values = self.columns[name][candidates]
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+        return candidates[mask]
+
+    def top_k(self, column: str, k: int, where: np.ndarray= None, largest: bool= True) -> np.ndarray:
+        """
+        The k bonds with the largest (or smallest) values of a column, with a partial sort so only the k best are ordered
+
+        Args:
+            column (str): Column to rank on, a key of self.columns
+            k (int): Number of bonds
+            where (np.ndarray, optional): Positions (e.g. from screen) or boolean mask of the bonds to rank. Defaults to every bond.
+            largest (bool, optional): Largest values first, else smallest first. Defaults to True.
+
+        Returns:
+            np.ndarray: Positions of the bonds in the book, best first. NaN values are never returned.
+        """
+        if where is None and column in self._indexes:
+            # Already sorted
+            order, _, valid = self._indexes[column]
+            return order[max(valid - k, 0):valid][::-1] if largest else order[:min(k, valid)]
+        if where is None:
+            index = np.arange(len(self))
+        else:
+            where = np.asarray(where)
+            index = np.flatnonzero(where) if where.dtype == bool else where
+        values = self.columns[column][index].astype(float)
+        keep = ~np.isnan(values)
+        index, keys = index[keep], (-values if largest else values)[keep]
+        k = min(k, len(index))
+        if k == 0:
+            return index[:0]
+        best = np.argpartition(keys, k - 1)[:k]
+        return index[best[np.argsort(keys[best], kind='stable')]]
+
+    def get_columns(self, index: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Values of every column for some bonds, e.g. the result of a query
+
+        Args:
+            index (np.ndarray): Positions of the bonds
+
+        Returns:
+            Dict[str, np.ndarray]: Column -> values, plus 'cusips'
+        """
+        return {'cusips': self.book.cusips[index], **{name: values[index] for name, values in self.columns.items()}}
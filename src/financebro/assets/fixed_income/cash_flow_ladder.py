@@ -0,0 +1,130 @@
+from typing import Iterable, Tuple
+
+import numpy as np
+
+import financebro.utils._math as _math
+from financebro.assets.fixed_income.bond_book import BondBook
+
+
+class CashFlowLadder:
+    """
+    Dense day-indexed ladder of the cash flows of a portfolio (coupons and redemptions), the array version of merging the
+    incomes dicts of many bonds. Day i of the ladder is the day serial start_ordinal + i.
+
+    Args:
+        start_ordinal (int): Day serial of the first day of the ladder
+        amounts (np.ndarray): Cash received on each day
+    """
+    def __init__(self, start_ordinal: int, amounts: np.ndarray):
+        self.start_ordinal = int(start_ordinal)
+        self.amounts = np.asarray(amounts, dtype=float)
+        self._cumulative = None
+
+    @classmethod
+    def from_book(cls, book: BondBook, quantities: np.ndarray= 1, face_value: np.ndarray= 1000) -> 'CashFlowLadder':
+        """
+        Project every coupon and redemption of a book on the ladder with one scatter-add over the day serials
+
+        Args:
+            book (BondBook): The bonds, with their dates
+            quantities (np.ndarray, optional): Number of bonds held of each line. Defaults to 1.
+            face_value (np.ndarray, optional): Face value of one bond of each line. Defaults to 1000.
+
+        Returns:
+            CashFlowLadder: The ladder, from the first to the last cash flow of the book
+        """
+        offsets, flow_ordinals = book.get_coupon_schedules()
+        counts = np.diff(offsets)
+        notional = np.broadcast_to(np.asarray(quantities, dtype=float) * face_value, (len(book),))
+        # Same amounts as Bond.compute_return: coupon on every schedule date and the face value with the last one
+        coupons = notional * book.annual_coupon_rate / book.num_coupons_per_year
+        weights = np.repeat(coupons, counts)
+        has_flows = counts > 0
+        weights[offsets[1:][has_flows] - 1] += notional[has_flows]
+        if flow_ordinals.size == 0:
+            return cls(0, np.zeros(0))
+        start_ordinal = flow_ordinals.min()
+        return cls(start_ordinal, np.bincount(flow_ordinals - start_ordinal, weights=weights))
+
+    @classmethod
+    def from_bonds(cls, bonds: Iterable, quantities: np.ndarray= 1) -> 'CashFlowLadder':
+        """
+        Ladder of Bond objects, see from_book
+
+        Args:
+            bonds (Iterable[Bond]): The bonds
+            quantities (np.ndarray, optional): Number of each bond held. Defaults to 1.
+
+        Returns:
+            CashFlowLadder: The ladder
+        """
+        bonds = list(bonds)
+        return cls.from_book(BondBook.from_bonds(bonds), quantities, [bond.face_value for bond in bonds])
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    @property
+    def ordinals(self) -> np.ndarray:
+        # Day serial of each day of the ladder
+        return self.start_ordinal + np.arange(len(self), dtype=np.int64)
+
+    @property
+    def cumulative(self) -> np.ndarray:
+        # Cash received up to each day included
+        return self._get_padded_cumulative()[1:]
+
+    def _get_padded_cumulative(self) -> np.ndarray:
+        # Cumulative sums with a leading 0 so a range is a difference of two lookups, computed once
+        if self._cumulative is None:
+            self._cumulative = np.concatenate([[0], np.cumsum(self.amounts)])
+        return self._cumulative
+
+    def get_amounts(self, ordinals: np.ndarray) -> np.ndarray:
+        """
+        Cash received on given days
+
+        Args:
+            ordinals (np.ndarray): Day serials, any shape
+
+        Returns:
+            np.ndarray: The amounts, 0 outside of the ladder
+        """
+        index = np.asarray(ordinals, dtype=np.int64) - self.start_ordinal
+        inside = (index >= 0) & (index < len(self))
+        amounts = np.zeros(index.shape)
+        amounts[inside] = self.amounts[index[inside]]
+        return amounts
+
+    def get_total(self, start_ordinal: np.ndarray, end_ordinal: np.ndarray) -> np.ndarray:
+        """
+        Cash received between two days (both included), in constant time from the cumulative sums
+
+        Args:
+            start_ordinal (np.ndarray): Day serials of the first days of the ranges
+            end_ordinal (np.ndarray): Day serials of the last days of the ranges
+
+        Returns:
+            np.ndarray: The totals of the ranges
+        """
+        cumulative = self._get_padded_cumulative()
+        # Position in the padded cumulative sums of the last day included, clipped to the ladder
+        position = lambda ordinal: np.clip(np.asarray(ordinal, dtype=np.int64) - self.start_ordinal + 1, 0, len(self))
+        return cumulative[position(end_ordinal)] - cumulative[position(np.asarray(start_ordinal) - 1)]
+
+    def get_monthly(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cash received by calendar month
+
+        Returns:
+            np.ndarray: The months as 'YYYY-MM' datetime64[M]
+            np.ndarray: The totals of the months
+        """
+        if len(self) == 0:
+            return np.zeros(0, dtype='datetime64[M]'), np.zeros(0)
+        years, months, _ = _math.ordinals_to_ymd(self.ordinals)
+        # datetime64[M] counts the months since 1970-01
+        month_index = (years - 1970)*12 + months - 1
+        first = month_index[0]
+        totals = np.bincount(month_index - first, weights=self.amounts)
+        return np.arange(first, first + len(totals)).astype('datetime64[M]'), totals
@@ -2,24 +2,63 @@ import financebro.utils._math as _math
 import financebro.utils._bond as _bond
 from datetime import date, datetime, timedelta
 
+
+class slot_cached_property:
+    """
+    Same as functools.cached_property but for classes with __slots__ (no __dict__ to cache into).
+    The value is stored in the slot '_<name>' that the class must declare, deleting that slot forces a recomputation on next access.
+    """
+    def __init__(self, func):
+        self.func = func
+        self.__doc__ = func.__doc__
+
+    def __set_name__(self, owner, name):
+        self.slot = '_' + name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        try:
+            return getattr(instance, self.slot)
+        except AttributeError:
+            value = self.func(instance)
+            setattr(instance, self.slot, value)
+            return value
+
+    def __set__(self, instance, value):
+        setattr(instance, self.slot, value)
+
+
 class FixedIncomeAsset:
+    # Slots of the cached analytics that depend on the price or the settlement date, see _invalidate
+    _CACHED_SLOTS = ()
+    __slots__ = ('_price_percent', 'price', 'annual_coupon_rate_percent', 'maturity_date', 'ytm_percent',
+                 '_settlement_date', 'face_value', 'date_convention', 'maturity_ordinal', 'settlement_ordinal',
+                 'YEAR_DAYS', 'annual_coupon_rate', 'annual_coupon', 'ytm', 'face_value_percent')
+
     def __init__(self,
                  price_percent: float, # in % of face value
                  ytm_percent: float,
                  annual_coupon_rate_percent: float, # in %
                  maturity_date: str,
-                 settlement_date: str= date.today().strftime("%m/%d/%Y"),
+                 settlement_date: str= None, # today if None
                  face_value: float= 1000, # Let's assume the face value is 1000 in the absence of any information
                  date_convention: str= 'us_nasd_30_360' # 'us_nasd_30_360' or 'not_retarded'
                  ):
 
-        self.price_percent = price_percent
+        if settlement_date is None:
+            # Evaluated here and not in the signature, otherwise it would be the day the module was imported
+            settlement_date = date.today().strftime("%m/%d/%Y")
+        self._price_percent = price_percent
         self.annual_coupon_rate_percent = annual_coupon_rate_percent
         self.maturity_date = maturity_date # Format 'YYYY/MM/DD'
         self.ytm_percent = ytm_percent
-        self.settlement_date = settlement_date
+        self._settlement_date = settlement_date
         self.face_value = face_value
         self.date_convention = date_convention
+        # Dates are parsed once, everything internal works on day serials
+        self.maturity_ordinal = _math.date_to_ordinal(maturity_date)
+        self.settlement_ordinal = _math.date_to_ordinal(settlement_date)
 
         # Compute some other values
         if date_convention == 'us_nasd_30_360':
@@ -38,8 +77,34 @@ class FixedIncomeAsset:
         self.ytm = self.ytm_percent/100
         self.face_value_percent = 100 # by definition
 
+    @property
+    def price_percent(self) -> float:
+        return self._price_percent
+
+    @price_percent.setter
+    def price_percent(self, price_percent: float):
+        self._price_percent = price_percent
+        self.price = price_percent/100 * self.face_value
+        self._invalidate()
+
+    @property
+    def settlement_date(self) -> str:
+        return self._settlement_date
 
+    @settlement_date.setter
+    def settlement_date(self, settlement_date: str):
+        self._settlement_date = settlement_date
+        self.settlement_ordinal = _math.date_to_ordinal(settlement_date)
+        self._invalidate()
+
+    def _invalidate(self):
+        # Drop the cached analytics, they are recomputed lazily on next access
+        for slot in self._CACHED_SLOTS:
+            try:
+                delattr(self, slot)
+            except AttributeError:
+                pass
 
     def compute_return(self):
         pass
-    
\ No newline at end of file
+
@@ -0,0 +1,494 @@
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+import financebro.utils._math as _math
+from financebro.assets.fixed_income.bond_book import BondBook
+from financebro.assets.fixed_income.short_rate_model import ShortRateModel
+from financebro.assets.fixed_income.yield_curve import _get_cash_flows
+from financebro.utils._parallel import _share, _attach
+
+# When the issuer redeems a bond on a call date
+# 'straight_value': when the remaining cash flows are worth more than the call price plus the accrued interest
+# 'never': a straight bond, the OAS is then the Z-spread
+# 'first_call': always on the first call date after settlement
+EXERCISE_RULES = ('straight_value', 'never', 'first_call')
+
+# State of the current worker process, attached once by _init_worker
+_worker_model = None
+_worker_arrays = None
+_worker_handles = None
+
+
+def _init_worker(model: ShortRateModel, spec: dict):
+    global _worker_model, _worker_arrays, _worker_handles
+    _worker_model = model
+    _worker_arrays, _worker_handles = _attach(spec)
+
+def _value_chunk_in_worker(exercise: str, derivatives: bool, seed: int, chunk: int, num_paths: int) -> Tuple[np.ndarray, np.ndarray]:
+    return _value_chunk(_worker_model, _worker_arrays, exercise, derivatives, seed, chunk, num_paths)
+
+def _value_chunk(model: ShortRateModel,
+                 arrays: Dict[str, np.ndarray],
+                 exercise: str,
+                 derivatives: bool,
+                 seed: int,
+                 chunk: int,
+                 num_paths: int
+                 ) -> Tuple[np.ndarray, np.ndarray]:
+    # Sums over the paths of one chunk of the values after the first call date of the active callable bonds, and of their
+    # derivatives by the spread. Paths are only simulated on the call dates, the flows in between are read from the tables.
+    x, log_discount = model.simulate(arrays['event_times'], num_paths, np.random.default_rng([seed, chunk]))
+    # One row per date, gathering the rows of the calls is a contiguous copy
+    x = np.ascontiguousarray(x.T)
+    discount = np.exp(log_discount.T)
+    # Cell of the grid and position in the cell, the same for every call on a date
+    cells = arrays['tables'].shape[2]
+    u = np.clip((x - arrays['grid_lower'][:, None]) / arrays['grid_step'][:, None], 0, cells)
+    cell = np.minimum(u.astype(np.int64), cells - 1)
+    u -= cell
+    call_column, call_event, call_times, active = arrays['call_column'], arrays['call_event'], arrays['call_times'], arrays['active']
+    size = len(arrays['callable'])
+    pv = np.zeros(size)
+    dpv = np.zeros(size)
+    alive = np.ones((size, num_paths), dtype=bool)
+    for calls in np.split(arrays['calls_by_rank'], arrays['rank_offsets'][1:-1]):
+        calls = calls[active[call_column[calls]]]
+        if calls.size == 0:
+            continue
+        columns, events, times = call_column[calls], call_event[calls], call_times[calls]
+        path_discount = discount[events]
+        was_alive = alive[columns]
+        if exercise == 'straight_value':
+            called = was_alive & (x[events] < arrays['boundaries'][calls][:, None])
+        elif exercise == 'first_call':
+            called = was_alive
+        else:
+            called = np.zeros_like(was_alive)
+        still_alive = was_alive & ~called
+        alive[columns] = still_alive
+        # Redeemed at the strike, or the flows until the next call
+        t, rows = u[events], cell[events] + (calls*cells)[:, None]
+        values = _evaluate_cells(arrays['tables'], rows, t)
+        np.copyto(values, arrays['strikes'][calls][:, None], where=called)
+        values *= was_alive
+        # The spread discount is the same on every path
+        spread_discount = np.exp(-arrays['spreads'][arrays['callable'][columns]] * times)
+        total = np.einsum('ij,ij->i', path_discount, values) * spread_discount
+        pv[columns] += total
+        if derivatives:
+            held_times = _evaluate_cells(arrays['slope_tables'], rows, t)
+            held_times *= still_alive
+            dpv[columns] -= times*total + np.einsum('ij,ij->i', path_discount, held_times) * spread_discount
+    return pv, dpv
+
+def _evaluate_cells(tables: np.ndarray, rows: np.ndarray, t: np.ndarray) -> np.ndarray:
+    # Cubics of the cells at t in [0, 1], rows are flat positions of the cells in tables (4 coefficients, calls, cells)
+    # One flat take per coefficient is much faster than a fancy index of (call, cell) pairs
+    tables = tables.reshape(4, -1)
+    values = tables[3].take(rows)
+    for k in (2, 1, 0):
+        values *= t
+        values += tables[k].take(rows)
+    return values
+
+
+class OASEngine:
+    """
+    Monte Carlo Option Adjusted Spreads of callable bonds under a short rate model
+    The short rate paths are simulated exactly on the call dates of the bonds only, by chunks of paths that fit in
+    max_memory_bytes. Between two call dates the cash flows are valued in closed form given the state of the model,
+    tabulated once per solve step on a grid of states, so the cost per path is one lookup per call date and not one per coupon.
+    On each call date the exercise rule decides on every path if the bond is redeemed, for 'straight_value' by comparing
+    the state with the one where the remaining flows are worth the strike, also solved once per step.
+    Every chunk has its own random stream np.random.default_rng([seed, chunk]): same seed, num_paths and max_memory_bytes
+    give the same paths, with or without workers. Every spread is valued on the same paths (common random numbers).
+    The OAS is the spread over the model curve, continuously compounded, that reprices the bond at its market price.
+
+    Args:
+        model (ShortRateModel): The short rate model, its curve date must be the settlement date of the bonds
+        book (BondBook): The bonds, it needs its dates
+        call_offsets (np.ndarray): Offsets of the calls of each bond in the flat calls (CSR layout), len(book) + 1
+        call_ordinals (np.ndarray): Flat day serials of the call dates, the ones not strictly between settlement and maturity are ignored
+        call_prices_percent (np.ndarray): Flat call prices in percentage of the face value
+        num_paths (int, optional): Number of simulated paths. Defaults to 100000.
+        seed (int, optional): Seed of the random streams. Defaults to 0.
+        exercise (str, optional): Exercise rule, one of EXERCISE_RULES. Defaults to 'straight_value'.
+        grid_size (int, optional): Number of states of the tables of each call date. Defaults to 65.
+        max_memory_bytes (int, optional): Memory budget of a chunk of paths and of a block of tables. Defaults to 256MB.
+        max_workers (int, optional): Number of worker processes for the chunks, 1 to stay in this process. Defaults to 1.
+    """
+    def __init__(self,
+                 model: ShortRateModel,
+                 book: BondBook,
+                 call_offsets: np.ndarray,
+                 call_ordinals: np.ndarray,
+                 call_prices_percent: np.ndarray,
+                 num_paths: int= 100000,
+                 seed: int= 0,
+                 exercise: str= 'straight_value',
+                 grid_size: int= 65,
+                 max_memory_bytes: int= 256*2**20,
+                 max_workers: int= 1
+                 ):
+        if exercise not in EXERCISE_RULES:
+            raise ValueError(f"Exercise rules implemented : {EXERCISE_RULES} but got {exercise}")
+        if book.settlement_ordinal is None or np.any(book.settlement_ordinal != model.curve.reference_ordinal):
+            raise ValueError("The bonds must settle on the curve date of the model")
+        self.model = model
+        self.book = book
+        self.num_paths = num_paths
+        self.seed = seed
+        self.exercise = exercise
+        self.grid_size = grid_size
+        self.max_memory_bytes = max_memory_bytes
+        self.max_workers = max_workers
+        size = len(book)
+
+        # Cash flows, sorted by bond then time
+        self._flow_owner, self._flow_times, amounts, self.accrued = _get_cash_flows(book)
+        flow_offsets = np.concatenate(([0], np.cumsum(np.bincount(self._flow_owner, minlength=size))))
+        last_flow_times = np.full(size, -np.inf)
+        has_flows = np.diff(flow_offsets) > 0
+        last_flow_times[has_flows] = self._flow_times[flow_offsets[1:][has_flows] - 1]
+
+        # Calls strictly between settlement and the last flow, sorted by bond then time
+        call_offsets = np.asarray(call_offsets, dtype=np.int64)
+        call_owner = np.repeat(np.arange(size), np.diff(call_offsets))
+        call_times = model.curve.get_times(np.asarray(call_ordinals, dtype=np.int64)).astype(float)
+        call_prices_percent = np.asarray(call_prices_percent, dtype=float)
+        keep = (call_times > 0) & (call_times < last_flow_times[call_owner])
+        order = np.lexsort((call_times[keep], call_owner[keep]))
+        call_owner, call_times, call_prices_percent = call_owner[keep][order], call_times[keep][order], call_prices_percent[keep][order]
+        self._call_offsets = np.concatenate(([0], np.cumsum(np.bincount(call_owner, minlength=size))))
+        call_rank = np.arange(len(call_owner)) - self._call_offsets[call_owner]
+
+        # Redeemed at the call price plus the interest accrued since the last coupon
+        frequency = book.num_coupons_per_year[call_owner]
+        periods = np.mod((call_times - self._flow_times[flow_offsets[call_owner]]) * frequency, 1)
+        periods[periods > 1 - 1e-9] = 0
+        strikes = call_prices_percent + 100*book.annual_coupon_rate[call_owner]/frequency * periods
+
+        # Number of calls of its bond strictly before each flow, 0 for the flows before the first call
+        scale = max(float(last_flow_times.max(initial=0)), 0) + 1
+        call_keys = call_owner*scale + call_times
+        flow_keys = self._flow_owner*scale + self._flow_times
+        self._flow_segment = np.searchsorted(call_keys, flow_keys, side='left') - self._call_offsets[self._flow_owner]
+
+        # Pairs (call, flow after the call), grouped by call
+        first_flow = np.searchsorted(flow_keys, call_keys, side='right')
+        pair_counts = flow_offsets[call_owner + 1] - first_flow
+        self._pair_offsets = np.concatenate(([0], np.cumsum(pair_counts)))
+        pair_call = np.repeat(np.arange(len(call_owner)), pair_counts)
+        pair_flow = first_flow[pair_call] + np.arange(self._pair_offsets[-1]) - self._pair_offsets[pair_call]
+        self._pair_owner = call_owner[pair_call]
+        self._pair_in_segment = self._flow_segment[pair_flow] == call_rank[pair_call] + 1
+        tau, T = call_times[pair_call], self._flow_times[pair_flow]
+        self._pair_dt = T - tau
+        self._pair_B = model.get_B(self._pair_dt)
+        with np.errstate(divide='ignore'):
+            # log of the amount times P(tau, T) at x = 0
+            self._pair_log_weights = np.log(amounts[pair_flow]) + model.get_log_zero_coupon_prices(tau, T, 0)
+        self._amounts = amounts
+        self._log_discount_factors = model.get_log_discount_factors(self._flow_times)
+
+        # Dates of the simulation and the grids of states of the tables, +-7 standard deviations of x
+        event_times, call_event = np.unique(call_times, return_inverse=True)
+        x_std = model.get_x_std(event_times)
+        grid_step = 14*x_std / (grid_size - 1)
+        grid_step[grid_step <= 0] = 1 # no volatility, x stays at 0 the first state
+        self._call_owner = call_owner
+        callable_bonds = np.flatnonzero(np.diff(self._call_offsets) > 0)
+        column = np.zeros(size, dtype=np.int64)
+        column[callable_bonds] = np.arange(len(callable_bonds))
+        num_calls = len(call_owner)
+        self._arrays = {
+            'event_times': event_times,
+            'grid_lower': -7*x_std,
+            'grid_step': grid_step,
+            'call_event': call_event.astype(np.int64),
+            'call_times': call_times,
+            'call_column': column[call_owner],
+            'callable': callable_bonds,
+            'calls_by_rank': np.argsort(call_rank, kind='stable'),
+            'rank_offsets': np.concatenate(([0], np.cumsum(np.bincount(call_rank, minlength=1)))),
+            'strikes': strikes,
+            # Updated by every valuation, for the bonds valued: the spreads, the flows until the next call (G) and the same
+            # weighted by their time from the call (H) as cubics of the cells of the grid, and the states under which
+            # the remaining flows are worth more than the strike
+            'spreads': np.zeros(size),
+            'active': np.zeros(len(callable_bonds), dtype=bool),
+            'tables': np.zeros((4, num_calls, grid_size - 1)),
+            'slope_tables': np.zeros((4, num_calls, grid_size - 1)),
+            'boundaries': np.zeros(num_calls),
+        }
+
+        # Chunks of paths within the memory budget, the arrays on the call dates plus the (paths, bonds) work arrays
+        path_bytes = 8*(6*len(event_times) + 12*len(callable_bonds)) + len(callable_bonds)
+        paths_per_chunk = int(max(1, min(num_paths, max_memory_bytes // max(path_bytes, 1))))
+        self._chunks = [(chunk, min(paths_per_chunk, num_paths - start)) for chunk, start in enumerate(range(0, num_paths, paths_per_chunk))]
+
+    @classmethod
+    def from_callable_bonds(cls, model: ShortRateModel, bonds: Iterable, **kwargs) -> 'OASEngine':
+        """
+        Build the engine of CallableBond objects, their call dates after settlement are the call schedule
+
+        Args:
+            model (ShortRateModel): The short rate model
+            bonds (Iterable[CallableBond]): The bonds, they must share the same date convention
+            **kwargs: Other arguments of OASEngine
+
+        Returns:
+            OASEngine: The engine, in the same order as the bonds
+        """
+        bonds = list(bonds)
+        # get_redemptions ends with maturity
+        redemptions = [bond.get_redemptions() for bond in bonds]
+        counts = np.array([len(ordinals) - 1 for ordinals, _ in redemptions], dtype=np.int64)
+        return cls(model, BondBook.from_bonds(bonds),
+                   np.concatenate(([0], np.cumsum(counts))),
+                   np.array([ordinal for ordinals, _ in redemptions for ordinal in ordinals[:-1]], dtype=np.int64),
+                   np.array([value for _, values in redemptions for value in values[:-1]], dtype=float),
+                   **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.book)
+
+    def _tabulate(self, spreads: np.ndarray, calls: np.ndarray, derivatives: bool) -> Dict[str, np.ndarray]:
+        # Tables and exercise boundaries of some calls, by blocks of calls within the memory budget
+        arrays = self._arrays
+        grid = np.arange(self.grid_size)
+        cells = self.grid_size - 1
+        results = {'tables': np.empty((4, len(calls), cells)),
+                   'slope_tables': np.empty((4, len(calls), cells)) if derivatives else None,
+                   'boundaries': np.zeros(len(calls))}
+        pair_counts = self._pair_offsets[calls + 1] - self._pair_offsets[calls]
+        ends = np.cumsum(pair_counts)
+        max_pairs = max(1, self.max_memory_bytes // (8*self.grid_size*4))
+        start = 0
+        while start < len(calls):
+            # At least one call per block
+            stop = max(int(np.searchsorted(ends, ends[start] - pair_counts[start] + max_pairs, side='right')), start + 1)
+            block = calls[start:stop]
+            counts = pair_counts[start:stop]
+            local = np.repeat(np.arange(len(block)), counts)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            pairs = np.repeat(self._pair_offsets[block] - starts, counts) + np.arange(counts.sum())
+            events = arrays['call_event'][block]
+            step = arrays['grid_step'][events][:, None]
+            x = arrays['grid_lower'][events][:, None] + step*grid
+            B = self._pair_B[pairs]
+            dt = self._pair_dt[pairs]
+            log_weights = self._pair_log_weights[pairs] - spreads[self._pair_owner[pairs]]*dt
+            values = np.exp(log_weights[:, None] - B[:, None]*x[local])
+            in_segment = self._pair_in_segment[pairs]
+            for key, weights in (('tables', in_segment), ('slope_tables', in_segment*dt)):
+                if results[key] is None:
+                    continue
+                weighted = values*weights[:, None]
+                total = np.add.reduceat(weighted, starts, axis=0)
+                # d/dx in grid units
+                slope = -np.add.reduceat(weighted*B[:, None], starts, axis=0) * step
+                f0, f1, d0, d1 = total[:, :-1], total[:, 1:], slope[:, :-1], slope[:, 1:]
+                results[key][:, start:stop] = (f0, d0, 3*(f1 - f0) - 2*d0 - d1, 2*(f0 - f1) + d0 + d1)
+            if self.exercise == 'straight_value':
+                results['boundaries'][start:stop] = self._get_boundaries(block, np.add.reduceat(values, starts, axis=0), x,
+                                                                         local, starts, log_weights, B)
+            start = stop
+        return results
+
+    def _get_boundaries(self, calls: np.ndarray, remaining: np.ndarray, x: np.ndarray, local: np.ndarray, starts: np.ndarray,
+                        log_weights: np.ndarray, B: np.ndarray) -> np.ndarray:
+        # State x* where the remaining flows are worth the strike, they are worth more below it (the value decreases with x)
+        # A first guess from the grid, then Newton steps on the exact value
+        log_strikes = np.log(self._arrays['strikes'][calls])
+        log_remaining = np.log(remaining)
+        above = np.count_nonzero(log_remaining > log_strikes[:, None], axis=1)
+        rows = np.arange(len(calls))
+        j = np.clip(above - 1, 0, self.grid_size - 2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            position = (log_remaining[rows, j] - log_strikes) / (log_remaining[rows, j] - log_remaining[rows, j + 1])
+        boundaries = x[rows, j] + np.nan_to_num(np.clip(position, 0, 1))*(x[rows, j + 1] - x[rows, j])
+        for _ in range(3):
+            values = np.exp(log_weights - B*boundaries[local])
+            value = np.add.reduceat(values, starts)
+            slope = -np.add.reduceat(values*B, starts)
+            boundaries -= (np.log(value) - log_strikes) * value / slope
+        # Never or always worth more than the strike on the grid, the states are clipped to the grid
+        return np.where(above == 0, -np.inf, np.where(above == self.grid_size, np.inf, boundaries))
+
+    @contextmanager
+    def _open(self):
+        # Yields evaluate(spreads, bonds, derivatives) -> (dirty values, derivatives by the spreads), right for the bonds
+        # valued only, with a pool of workers if needed
+        exercise, seed, chunks = self.exercise, self.seed, self._chunks
+        arrays = dict(self._arrays)
+        size = len(self)
+        # Before the first call date, in closed form
+        first_segment = self._flow_segment == 0
+
+        def prepare(spreads: np.ndarray, bonds: np.ndarray, derivatives: bool) -> Tuple[list, np.ndarray]:
+            # Updates of the valuation arrays, as (key, rows, values)
+            selected = np.zeros(size, dtype=bool)
+            selected[bonds] = True
+            calls = np.flatnonzero(selected[self._call_owner])
+            updates = [('spreads', slice(None), spreads), ('active', slice(None), selected[arrays['callable']])]
+            if calls.size:
+                results = self._tabulate(spreads, calls, derivatives)
+                updates.append(('boundaries', calls, results.pop('boundaries')))
+                updates += [(key, (slice(None), calls), values) for key, values in results.items() if values is not None]
+            return updates, calls
+
+        def merge(spreads: np.ndarray, results: Iterable) -> Tuple[np.ndarray, np.ndarray]:
+            values = np.where(first_segment, self._amounts*np.exp(self._log_discount_factors - spreads[self._flow_owner]*self._flow_times), 0)
+            pv = np.bincount(self._flow_owner, weights=values, minlength=size)
+            dpv = -np.bincount(self._flow_owner, weights=values*self._flow_times, minlength=size)
+            results = list(results)
+            if results:
+                sums = np.sum(results, axis=0) / self.num_paths
+                pv[arrays['callable']] += sums[0]
+                dpv[arrays['callable']] += sums[1]
+            return pv, dpv
+
+        if len(self._call_owner) == 0 or self.max_workers <= 1 or len(chunks) <= 1:
+            def evaluate(spreads: np.ndarray, bonds: np.ndarray, derivatives: bool) -> Tuple[np.ndarray, np.ndarray]:
+                updates, calls = prepare(spreads, bonds, derivatives)
+                for key, rows, values in updates:
+                    arrays[key][rows] = values
+                results = (_value_chunk(self.model, arrays, exercise, derivatives, seed, chunk, num_paths)
+                           for chunk, num_paths in chunks) if calls.size else ()
+                return merge(spreads, results)
+            arrays = {key: values.copy() for key, values in arrays.items()}
+            yield evaluate
+            return
+
+        spec, handles = _share(arrays)
+        try:
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(chunks)),
+                                     initializer=_init_worker,
+                                     initargs=(self.model, spec)) as executor:
+                def evaluate(spreads: np.ndarray, bonds: np.ndarray, derivatives: bool) -> Tuple[np.ndarray, np.ndarray]:
+                    updates, calls = prepare(spreads, bonds, derivatives)
+                    # Updated in place, no array is kept on the blocks so they can be closed
+                    for key, rows, values in updates:
+                        np.ndarray(arrays[key].shape, arrays[key].dtype, buffer=handles[key].buf)[rows] = values
+                    futures = [executor.submit(_value_chunk_in_worker, exercise, derivatives, seed, chunk, num_paths)
+                               for chunk, num_paths in chunks] if calls.size else []
+                    return merge(spreads, (future.result() for future in futures))
+                yield evaluate
+        finally:
+            for handle in handles.values():
+                handle.close()
+                handle.unlink()
+
+    def _spreads(self, oas_percent: np.ndarray) -> np.ndarray:
+        return np.array(np.broadcast_to(np.asarray(oas_percent, dtype=float)/100, (len(self),)))
+
+    def compute_price(self, oas_percent: np.ndarray= 0) -> np.ndarray:
+        """
+        Model prices of the callable bonds
+
+        Args:
+            oas_percent (np.ndarray, optional): Spreads over the model curve in percentage, one per bond or one for all. Defaults to 0.
+
+        Returns:
+            np.ndarray: The clean prices in percentage of the face value
+        """
+        with self._open() as evaluate:
+            dirty, _ = evaluate(self._spreads(oas_percent), np.arange(len(self)), False)
+        return dirty - self.accrued
+
+    def compute_straight_price(self, oas_percent: np.ndarray= 0) -> np.ndarray:
+        """
+        Prices of the same bonds without their calls, in closed form
+
+        Args:
+            oas_percent (np.ndarray, optional): Spreads over the model curve in percentage, one per bond or one for all. Defaults to 0.
+
+        Returns:
+            np.ndarray: The clean prices in percentage of the face value
+        """
+        spreads = self._spreads(oas_percent)
+        values = self._amounts*np.exp(self._log_discount_factors - spreads[self._flow_owner]*self._flow_times)
+        return np.bincount(self._flow_owner, weights=values, minlength=len(self)) - self.accrued
+
+    def compute_z_spread_percent(self, price_percent: np.ndarray= None, tol: float= 1e-12, max_iter: int= 100) -> np.ndarray:
+        """
+        Solve the Z-spreads, the spreads over the model curve that reprice the bonds without their calls, in closed form
+        It is the OAS with the exercise rule 'never'.
+
+        Args:
+            price_percent (np.ndarray, optional): Clean prices in percentage of the face value. If None it uses the prices of the bonds. Defaults to None.
+            tol (float, optional): Convergence tolerance on the spreads (not in percentage). Defaults to 1e-12.
+            max_iter (int, optional): Maximum iterations. Defaults to 100.
+
+        Returns:
+            np.ndarray: The Z-spreads in percentage, NaN where the solve did not converge
+        """
+        price_percent = self.book.price_percent if price_percent is None else np.broadcast_to(np.asarray(price_percent, dtype=float), (len(self),))
+        target = price_percent + self.accrued
+        size = len(self)
+
+        def f(x: np.ndarray, index: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+            spreads = np.zeros(size)
+            spreads[index] = x
+            flows = np.zeros(size, dtype=bool)
+            flows[index] = True
+            flows = flows[self._flow_owner]
+            owner, times = self._flow_owner[flows], self._flow_times[flows]
+            values = self._amounts[flows]*np.exp(self._log_discount_factors[flows] - spreads[owner]*times)
+            sums = [np.bincount(owner, weights=values*times**k, minlength=size)[index] for k in range(3)]
+            return sums[0] - target[index], -sums[1], sums[2]
+        z_spreads, _ = _math.solve_halley_batch(f, np.zeros(size), tol=tol, max_iter=max_iter)
+        return 100*z_spreads
+
+    def compute_oas_percent(self,
+                            price_percent: np.ndarray= None,
+                            x0: np.ndarray= None,
+                            tol: float= 1e-7,
+                            max_iter: int= 20,
+                            bracket_percent: float= 0.5
+                            ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Solve the Option Adjusted Spreads of every bond together, a solver step values the bonds not converged yet on the same paths
+        The value jumps a little where the exercise decision flips on a path, so its derivative misses the moves of the
+        exercise boundary and Newton converges slowly. One Newton step gives the second point of a secant solve instead,
+        then bisection for the bonds where it did not converge.
+
+        Args:
+            price_percent (np.ndarray, optional): Clean prices in percentage of the face value. If None it uses the prices of the bonds. Defaults to None.
+            x0 (np.ndarray, optional): Initial spreads in percentage. Defaults to the Z-spreads, an upper bound of the OAS.
+            tol (float, optional): Convergence tolerance on the spreads (not in percentage). Defaults to 1e-7.
+            max_iter (int, optional): Maximum secant steps. Defaults to 20.
+            bracket_percent (float, optional): Half width in percentage of the bisection bracket around the last secant step. Defaults to 0.5.
+
+        Returns:
+            np.ndarray: The OAS in percentage, NaN where no spread reprices the bond (e.g. a price far above the call prices)
+            np.ndarray: The values of the call options at the OAS, straight price minus callable price, in percentage of the face value
+        """
+        price_percent = self.book.price_percent if price_percent is None else np.broadcast_to(np.asarray(price_percent, dtype=float), (len(self),))
+        target = price_percent + self.accrued
+        spreads = self._spreads(self.compute_z_spread_percent(price_percent) if x0 is None else x0)
+        # No Z-spread, no OAS either
+        spreads[np.isnan(spreads)] = 0
+        with self._open() as evaluate:
+            pv, dpv = evaluate(spreads, np.arange(len(self)), True)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                newton = spreads - (pv - target)/dpv
+
+            def f(x: np.ndarray, index: np.ndarray) -> np.ndarray:
+                # Only the bonds not converged yet are valued
+                spreads[index] = x
+                pv, _ = evaluate(spreads, index, False)
+                return pv[index] - target[index]
+            oas, converged = _math.solve_secant_batch(f, spreads.copy(), newton, f0=pv - target, tol=tol, max_iter=max_iter)
+            retry = np.flatnonzero(~converged & np.isfinite(target) & np.isfinite(spreads))
+            if retry.size:
+                def f_retry(x: np.ndarray, index: np.ndarray) -> np.ndarray:
+                    return f(x, retry[index])
+                last = spreads[retry]
+                oas[retry] = _math.solve_bisection_batch(f_retry, last - bracket_percent/100, last + bracket_percent/100, tol=tol)
+        # The model price at the OAS is the market price
+        return 100*oas, self.compute_straight_price(100*oas) - price_percent
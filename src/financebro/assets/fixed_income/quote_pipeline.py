@@ -0,0 +1,190 @@
+import asyncio
+import time
+from collections import deque
+from itertools import islice
+from typing import AsyncIterable, Dict, List
+
+import numpy as np
+
+from financebro.assets.fixed_income.yield_service import YieldService
+
+# Latency percentiles reported by get_stats
+LATENCY_PERCENTILES = (50, 90, 99, 99.9)
+
+
+class QuotePipeline:
+    """
+    Asyncio pipeline from a stream of quotes to the analytics of the quoted bonds
+    Quotes (CUSIP, price) are read from an async iterator. A burst on one CUSIP is coalesced, only its last price is solved.
+    The pending CUSIPs are solved in micro-batches: the yields and the APYs go through the warm-started YieldService with the
+    rows of the quotes found when they were read, no Bond nor sub-book is built. Each batch is published to the subscriber queues.
+    Backpressure goes all the way up: a full subscriber queue holds the batches, and the pending quotes then stop the reads
+    from the feed once there are max_pending of them.
+
+    Args:
+        service (YieldService): Yield service on the book of the quoted bonds
+        max_batch_size (int, optional): Maximum number of quotes solved together. Defaults to 1000.
+        max_batch_delay (float, optional): Seconds a batch waits for more quotes after the first one, unless it is full. Defaults to 0.001.
+        max_pending (int, optional): Maximum number of pending CUSIPs before the feed is not read anymore. Defaults to 10000.
+        max_latency_samples (int, optional): Number of most recent quote latencies kept for the percentiles. Defaults to 100000.
+        end_timeout (float, optional): Seconds the end marker waits for room in a full subscriber queue, the oldest batch of
+            the queue is then dropped for it. Defaults to 1.
+    """
+    def __init__(self,
+                 service: YieldService,
+                 max_batch_size: int= 1000,
+                 max_batch_delay: float= 0.001,
+                 max_pending: int= 10000,
+                 max_latency_samples: int= 100000,
+                 end_timeout: float= 1
+                 ):
+        if max_batch_size < 1 or max_pending < max_batch_size:
+            raise ValueError(f"max_batch_size must be positive and at most max_pending but got {max_batch_size} and {max_pending}")
+        self.service = service
+        self.max_batch_size = max_batch_size
+        self.max_batch_delay = max_batch_delay
+        self.max_pending = max_pending
+        self.end_timeout = end_timeout
+        self._subscribers = []
+        self._pending = {} # cusip -> (price_percent, timestamp, row in the book), oldest CUSIP first
+        self._latencies = deque(maxlen=max_latency_samples)
+        self._counts = dict.fromkeys(('quotes', 'unknown', 'coalesced', 'published', 'batches', 'pauses', 'dropped'), 0)
+
+    def subscribe(self, max_size: int= 16) -> asyncio.Queue:
+        """
+        New subscriber to the analytics
+        Every batch is put in the queue as a dict of 'cusips' (list), 'price_percent', 'ytm_percent', 'apy' and 'timestamps'
+        (arrays), None once the feed is exhausted. The pipeline waits when the queue is full, except for the end marker
+        which replaces the oldest batch of a queue still full after end_timeout (or at once when the run fails or is cancelled).
+
+        Args:
+            max_size (int, optional): Maximum number of batches in the queue. Defaults to 16.
+
+        Returns:
+            asyncio.Queue: The queue of the subscriber
+        """
+        queue = asyncio.Queue(max_size)
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.remove(queue)
+
+    async def run(self, quotes: AsyncIterable):
+        """
+        Consume a feed until it is exhausted, the last pending quotes are published before the end marker
+
+        Args:
+            quotes (AsyncIterable): Quotes (cusip, price_percent) or (cusip, price_percent, timestamp), the timestamp of the quote
+                on the time.perf_counter clock (e.g. when it was sent) is where its latency starts. Defaults to the time it is read.
+                Quotes of CUSIPs that are not in the book are counted and dropped.
+        """
+        self._ready = asyncio.Event() # something is pending, or the feed is exhausted
+        self._full = asyncio.Event() # a whole batch is pending
+        self._space = asyncio.Event() # the feed can be read again
+        self._exhausted = False
+        reader = asyncio.ensure_future(self._read(quotes))
+        ended = []
+        try:
+            await self._publish_batches()
+            await reader # errors of the feed
+            # A slow subscriber still gets every batch, a stuck one does not hold the end of the run forever
+            for queue in self._subscribers:
+                try:
+                    await asyncio.wait_for(queue.put(None), self.end_timeout)
+                    ended.append(queue)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            reader.cancel()
+            # Never waits here, the run may be failing or cancelled
+            for queue in self._subscribers:
+                if queue in ended:
+                    continue
+                if queue.full():
+                    queue.get_nowait()
+                    self._counts['dropped'] += 1
+                queue.put_nowait(None)
+
+    async def _read(self, quotes: AsyncIterable):
+        rows, pending, counts = self.service._rows, self._pending, self._counts
+        try:
+            async for quote in quotes:
+                timestamp = quote[2] if len(quote) > 2 else time.perf_counter()
+                cusip = quote[0]
+                counts['quotes'] += 1
+                row = rows.get(cusip)
+                if row is None:
+                    counts['unknown'] += 1
+                    continue
+                if cusip in pending:
+                    counts['coalesced'] += 1 # keeps its place in line, a hot CUSIP does not starve the others
+                pending[cusip] = (quote[1], timestamp, row)
+                self._ready.set()
+                if len(pending) >= self.max_batch_size:
+                    self._full.set()
+                    if len(pending) >= self.max_pending:
+                        counts['pauses'] += 1
+                        self._space.clear()
+                        await self._space.wait()
+                    else:
+                        await asyncio.sleep(0) # an in-process feed may never give the batches a turn
+        finally:
+            self._exhausted = True
+            self._ready.set()
+
+    async def _publish_batches(self):
+        pending = self._pending
+        while True:
+            await self._ready.wait()
+            if not pending:
+                if self._exhausted:
+                    break
+                self._ready.clear()
+                continue
+            # Micro-batching window, the rest of the burst can land in the same batch
+            if len(pending) < self.max_batch_size and not self._exhausted and self.max_batch_delay > 0:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_batch_delay)
+                except asyncio.TimeoutError:
+                    pass
+            cusips = list(islice(pending, self.max_batch_size))
+            quotes = [pending.pop(cusip) for cusip in cusips]
+            if len(pending) < self.max_batch_size:
+                self._full.clear()
+            self._space.set()
+            update = self._compute(cusips, quotes)
+            for queue in self._subscribers:
+                await queue.put(update)
+            now = time.perf_counter()
+            self._latencies.extend((now - update['timestamps']).tolist())
+            self._counts['published'] += len(cusips)
+            self._counts['batches'] += 1
+
+    def _compute(self, cusips: List[str], quotes: list) -> dict:
+        price_percent, timestamps, rows = np.array(quotes, dtype=float).reshape(-1, 3).T
+        # Rows found when the quotes were read, the CUSIPs are not looked up again
+        rows = rows.astype(np.int64)
+        return {'cusips': cusips,
+                'price_percent': price_percent,
+                'ytm_percent': self.service.get_ytm_percent(cusips, price_percent, rows=rows),
+                'apy': self.service.get_apy(cusips, price_percent, rows=rows),
+                'timestamps': timestamps}
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Work done so far and end-to-end latencies, from the timestamp of a quote until its batch is in every subscriber queue
+
+        Returns:
+            Dict[str, float]: The counts 'quotes' (read from the feed), 'unknown' (dropped), 'coalesced' (replaced by a later
+                quote of the same CUSIP before being solved), 'published', 'batches' and 'pauses' (reads of the feed stopped
+                by backpressure), 'dropped' (batches replaced by the end marker in a full subscriber queue), the 'mean_batch_size'
+                and the latency percentiles 'latency_p50_ms'... of the most recent quotes.
+        """
+        stats = dict(self._counts)
+        stats['mean_batch_size'] = stats['published'] / max(stats['batches'], 1)
+        latencies = np.array(self._latencies) * 1000
+        for q in LATENCY_PERCENTILES:
+            stats[f'latency_p{q:g}_ms'] = float(np.percentile(latencies, q)) if latencies.size else np.nan
+        stats['latency_max_ms'] = float(latencies.max()) if latencies.size else np.nan
+        return stats
@@ -0,0 +1,145 @@
+from typing import Tuple
+
+import numpy as np
+
+from financebro.assets.fixed_income.yield_curve import YieldCurve
+
+
+class ShortRateModel:
+    """
+    One factor Hull-White short rate, r(t) = x(t) + phi(t) with dx = -a x dt + sigma dW and x(0) = 0
+    phi is fitted to the curve so the model reprices every zero-coupon bond of the curve, E[exp(-int_0^T r)] = P(0, T).
+    Vasicek is the special case of a curve that is its own closed form, see vasicek().
+    Times are in years from the curve date, like the curve.
+
+    Args:
+        curve (YieldCurve): Initial zero curve
+        mean_reversion (float, optional): Speed of mean reversion a, per year. Defaults to 0.03.
+        volatility (float, optional): Absolute volatility sigma of the short rate (not in percentage), per sqrt(year). Defaults to 0.01.
+    """
+    def __init__(self, curve: YieldCurve, mean_reversion: float= 0.03, volatility: float= 0.01):
+        if mean_reversion <= 0 or volatility < 0:
+            raise ValueError(f"mean_reversion must be positive and volatility non negative but got {mean_reversion} and {volatility}")
+        self.curve = curve
+        self.mean_reversion = float(mean_reversion)
+        self.volatility = float(volatility)
+
+    @classmethod
+    def vasicek(cls,
+                reference_ordinal: int,
+                short_rate: float,
+                long_rate: float,
+                mean_reversion: float= 0.1,
+                volatility: float= 0.01,
+                date_convention: str= 'us_nasd_30_360',
+                horizon_years: float= 100
+                ) -> 'ShortRateModel':
+        """
+        Vasicek model dr = a (b - r) dt + sigma dW, as the Hull-White model of the Vasicek zero curve
+
+        Args:
+            reference_ordinal (int): Day serial of the model date, the settlement date of the bonds it prices
+            short_rate (float): Short rate r(0) (not in percentage)
+            long_rate (float): Long term mean b of the short rate (not in percentage)
+            mean_reversion (float, optional): Speed of mean reversion a, per year. Defaults to 0.1.
+            volatility (float, optional): Absolute volatility sigma of the short rate, per sqrt(year). Defaults to 0.01.
+            date_convention (str, optional): Date convention of the times. Can be 'us_nasd_30_360' | 'not_retarded'. Defaults to 'us_nasd_30_360'.
+            horizon_years (float, optional): Last pillar of the tabulated curve, flat after it. Defaults to 100.
+
+        Returns:
+            ShortRateModel: The model
+        """
+        a, sigma = mean_reversion, volatility
+        times = np.arange(1, 12*horizon_years + 1) / 12 # monthly pillars
+        B = (1 - np.exp(-a*times)) / a
+        log_prices = (long_rate - sigma**2/(2*a**2))*(B - times) - sigma**2*B**2/(4*a) - B*short_rate
+        return cls(YieldCurve(reference_ordinal, times, -log_prices/times, date_convention), mean_reversion, volatility)
+
+    def get_log_discount_factors(self, times: np.ndarray) -> np.ndarray:
+        """
+        log P(0, t) of the initial curve
+
+        Args:
+            times (np.ndarray): Times in years
+
+        Returns:
+            np.ndarray: The log discount factors
+        """
+        return -self.curve._get_rate_times(np.asarray(times, dtype=float))
+
+    def get_B(self, tau: np.ndarray) -> np.ndarray:
+        # Sensitivity of log P(t, t + tau) to x(t)
+        return (1 - np.exp(-self.mean_reversion*np.asarray(tau, dtype=float))) / self.mean_reversion
+
+    def get_variance(self, tau: np.ndarray) -> np.ndarray:
+        """
+        Variance of int_t^{t+tau} x(u) du given x(t), V(tau) in Brigo-Mercurio
+
+        Args:
+            tau (np.ndarray): Lengths of the intervals in years
+
+        Returns:
+            np.ndarray: The variances
+        """
+        a, sigma = self.mean_reversion, self.volatility
+        tau = np.asarray(tau, dtype=float)
+        return sigma**2/a**2 * (tau - 2*(1 - np.exp(-a*tau))/a + (1 - np.exp(-2*a*tau))/(2*a))
+
+    def get_x_std(self, times: np.ndarray) -> np.ndarray:
+        # Standard deviation of x(t), x(0) = 0
+        a, sigma = self.mean_reversion, self.volatility
+        return sigma * np.sqrt((1 - np.exp(-2*a*np.asarray(times, dtype=float))) / (2*a))
+
+    def get_log_zero_coupon_prices(self, t: np.ndarray, T: np.ndarray, x: np.ndarray) -> np.ndarray:
+        """
+        log P(t, T) given x(t), the affine Hull-White zero-coupon bond price. Arguments are broadcasted together.
+
+        Args:
+            t (np.ndarray): Times of the valuation in years
+            T (np.ndarray): Times of the payment in years, on or after t
+            x (np.ndarray): State x(t) = r(t) - phi(t)
+
+        Returns:
+            np.ndarray: The log prices
+        """
+        t, T = np.asarray(t, dtype=float), np.asarray(T, dtype=float)
+        return (self.get_log_discount_factors(T) - self.get_log_discount_factors(t)
+                + (self.get_variance(T - t) - self.get_variance(T) + self.get_variance(t))/2
+                - self.get_B(T - t)*x)
+
+    def simulate(self, times: np.ndarray, num_paths: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact simulation of the state and of the path discount factors at some times, no discretization error
+        (x, int x) is jointly Gaussian from one time to the next, only the given times are simulated.
+
+        Args:
+            times (np.ndarray): Increasing positive times in years
+            num_paths (int): Number of paths
+            rng (np.random.Generator): Random stream, e.g. np.random.default_rng([seed, chunk]) for reproducible chunks
+
+        Returns:
+            np.ndarray: (num_paths, times) states x(t)
+            np.ndarray: (num_paths, times) log discount factors -int_0^t r(u) du of the paths, their exp averages to P(0, t)
+        """
+        a, sigma = self.mean_reversion, self.volatility
+        times = np.asarray(times, dtype=float)
+        h = np.diff(times, prepend=0)
+        decay = np.exp(-a*h)
+        var_x = sigma**2/(2*a) * (1 - decay**2)
+        var_integral = self.get_variance(h)
+        covariance = sigma**2/(2*a**2) * (1 - decay)**2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            loading = np.where(var_x > 0, covariance/np.sqrt(var_x), 0)
+        residual = np.sqrt(np.maximum(var_integral - loading**2, 0))
+        x = np.empty((num_paths, times.size))
+        integral = np.empty((num_paths, times.size))
+        x_previous = np.zeros(num_paths)
+        integral_previous = np.zeros(num_paths)
+        for k in range(times.size):
+            z1 = rng.standard_normal(num_paths)
+            z2 = rng.standard_normal(num_paths)
+            integral[:, k] = integral_previous + x_previous*self.get_B(h[k]) + loading[k]*z1 + residual[k]*z2
+            x[:, k] = x_previous*decay[k] + np.sqrt(var_x[k])*z1
+            x_previous, integral_previous = x[:, k], integral[:, k]
+        log_discount = self.get_log_discount_factors(times) - self.get_variance(times)/2 - integral
+        return x, log_discount
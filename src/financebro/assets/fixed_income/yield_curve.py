@@ -0,0 +1,215 @@
+from typing import Iterable, Tuple, Union
+
+import numpy as np
+
+import financebro.utils._math as _math
+from financebro.assets.fixed_income.bond_book import BondBook
+
+# Default pillars of bootstrapped curves, in years
+DEFAULT_PILLAR_YEARS = (0.25, 0.5, 1, 2, 3, 5, 7, 10, 15, 20, 30)
+
+
+class YieldCurve:
+    """
+    Zero-coupon yield curve, continuously compounded zero rates at pillar times
+    Between pillars r(t)*t is linear (log-linear discount factors), outside of them the zero rate is flat.
+    Times are in years from the curve date, counted with the date convention of the curve.
+
+    Args:
+        reference_ordinal (int): Day serial of the curve date, the settlement date of the bonds it prices
+        times (np.ndarray): Pillar times in years, increasing
+        zero_rates (np.ndarray): Zero rates at the pillars (not in percentage)
+        date_convention (str, optional): Date convention of the curve. Can be 'us_nasd_30_360' | 'not_retarded'. Defaults to 'us_nasd_30_360'.
+    """
+    def __init__(self,
+                 reference_ordinal: int,
+                 times: np.ndarray,
+                 zero_rates: np.ndarray,
+                 date_convention: str= 'us_nasd_30_360'
+                 ):
+        self.reference_ordinal = int(reference_ordinal)
+        self.times = np.asarray(times, dtype=float)
+        self.zero_rates = np.asarray(zero_rates, dtype=float)
+        if self.times.shape != self.zero_rates.shape or np.any(np.diff(self.times) <= 0):
+            raise ValueError("times must be increasing and match zero_rates")
+        self.date_convention = date_convention
+        if date_convention == 'us_nasd_30_360':
+            self.YEAR_DAYS = 360
+        elif date_convention == 'not_retarded':
+            self.YEAR_DAYS = 365
+        else:
+            raise ValueError(f"Convention implemented : 'us_nasd_30_360' and 'not_retarded' but got {date_convention}")
+
+    @classmethod
+    def bootstrap(cls,
+                  bonds: Union[BondBook, Iterable],
+                  pillar_years: Iterable[float]= DEFAULT_PILLAR_YEARS,
+                  tol: float= 1e-12,
+                  max_iter: int= 100
+                  ) -> 'YieldCurve':
+        """
+        Bootstrap the zero curve of a bond universe
+        Bonds are bucketed by maturity between consecutive pillars. Going from the short end, the rate of each pillar is
+        solved so that the bonds of its bucket are repriced on average at their market prices, the cash flows of a bucket
+        only depend on the pillars already solved and the current one. Pillars without bonds are dropped.
+
+        Args:
+            bonds (Union[BondBook, Iterable[Bond]]): The universe, all settling on the same date
+            pillar_years (Iterable[float], optional): Candidate pillar times in years. Defaults to DEFAULT_PILLAR_YEARS.
+            tol (float, optional): Convergence tolerance of the pillar rates. Defaults to 1e-12.
+            max_iter (int, optional): Maximum iterations per pillar. Defaults to 100.
+
+        Raises:
+            ValueError: Bonds settling on several dates, no usable bond or a pillar that could not be solved
+
+        Returns:
+            YieldCurve: The bootstrapped curve
+        """
+        book = bonds if isinstance(bonds, BondBook) else BondBook.from_bonds(bonds)
+        settlements = np.unique(book.settlement_ordinal) if book.settlement_ordinal is not None else []
+        if len(settlements) != 1:
+            raise ValueError(f"All the bonds must settle on the same date but got {len(settlements)} settlement dates")
+        times = np.asarray(pillar_years, dtype=float)
+
+        owner, flow_times, amounts, accrued = _get_cash_flows(book)
+        maturity_times = np.full(len(book), np.nan)
+        maturity_times[owner] = flow_times # the last flow of each bond wins
+        target = book.price_percent + accrued # market dirty prices
+        valid = np.isfinite(target) & np.isfinite(maturity_times)
+
+        # Keep the pillars with bonds, the last one also takes everything maturing after it
+        bucket = np.minimum(np.searchsorted(times, maturity_times), len(times) - 1)
+        used = np.unique(bucket[valid])
+        if used.size == 0:
+            raise ValueError("No bond to bootstrap the curve from")
+        curve = cls(settlements[0], times[used], np.zeros(used.size), book.date_convention)
+        bucket = np.minimum(np.searchsorted(curve.times, maturity_times), used.size - 1)
+
+        for k in range(used.size):
+            in_bucket = valid & (bucket == k)
+            flows = in_bucket[owner]
+            t, a = flow_times[flows], amounts[flows]
+            # r(t)*t is linear in the pillar rate: r(t)*t = fixed + rate * slope
+            curve.zero_rates[k] = 0
+            fixed = curve._get_rate_times(t)
+            curve.zero_rates[k] = 1
+            slope = curve._get_rate_times(t) - fixed
+            total = target[in_bucket].sum()
+
+            def f(x, index):
+                discounted = a * np.exp(-fixed - x[:, None]*slope)
+                return (discounted.sum(axis=1) - total,
+                        -(discounted*slope).sum(axis=1),
+                        (discounted*slope**2).sum(axis=1))
+
+            x0 = curve.zero_rates[k-1] if k else 0.03
+            rate, converged = _math.solve_halley_batch(f, np.array([x0]), tol, max_iter)
+            if not converged[0]:
+                raise ValueError(f"Could not solve the {curve.times[k]} years pillar")
+            curve.zero_rates[k] = rate[0]
+        return curve
+
+    def _get_rate_times(self, times: np.ndarray) -> np.ndarray:
+        # r(t)*t, linear between the pillars and flat rates outside
+        rate_times = np.interp(times, self.times, self.zero_rates*self.times)
+        rate_times = np.where(times < self.times[0], self.zero_rates[0]*times, rate_times)
+        return np.where(times > self.times[-1], self.zero_rates[-1]*times, rate_times)
+
+    def get_times(self, ordinals: np.ndarray) -> np.ndarray:
+        """
+        Year fractions from the curve date
+
+        Args:
+            ordinals (np.ndarray): Day serials of the dates, any shape
+
+        Returns:
+            np.ndarray: The times in years
+        """
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        days = _math.day_diff_array(np.full(ordinals.shape, self.reference_ordinal), ordinals, self.date_convention)
+        return days / self.YEAR_DAYS
+
+    def get_zero_rates(self, ordinals: np.ndarray) -> np.ndarray:
+        """
+        Interpolated zero rates (not in percentage) at arbitrary dates
+
+        Args:
+            ordinals (np.ndarray): Day serials of the dates, any shape
+
+        Returns:
+            np.ndarray: The continuously compounded zero rates
+        """
+        times = self.get_times(ordinals)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rates = self._get_rate_times(times) / times
+        return np.where(times > 0, rates, self.zero_rates[0])
+
+    def get_discount_factors(self, ordinals: np.ndarray) -> np.ndarray:
+        """
+        Discount factors at arbitrary dates
+
+        Args:
+            ordinals (np.ndarray): Day serials of the dates, any shape
+
+        Returns:
+            np.ndarray: The discount factors, 1 at the curve date
+        """
+        return np.exp(-self._get_rate_times(self.get_times(ordinals)))
+
+    def compute_price(self, book: BondBook) -> np.ndarray:
+        """
+        Reprice a whole book against the curve in one batched pass, each cash flow is discounted with the curve
+        Rich/cheap screening is book.price_percent - curve.compute_price(book) (positive when the bond is rich).
+        A flat curve at frequency*log(1 + y/frequency) gives back the Excel prices at the yield y, except for the bonds in
+        their last coupon period: Excel discounts their single flow with simple interest, 1 + y/frequency*DSC/E, where the
+        curve compounds. They come out slightly higher, e.g. by up to 0.008 (percent of the face value) at a 5% yield and
+        0.03 at 10%.
+
+        Args:
+            book (BondBook): The bonds, settling on the curve date
+
+        Returns:
+            np.ndarray: The clean prices in percentage of the face value, NaN for bonds without coupons left
+        """
+        owner, flow_times, amounts, accrued = _get_cash_flows(book)
+        dirty = np.bincount(owner, weights=amounts*np.exp(-self._get_rate_times(flow_times)), minlength=len(book))
+        return np.where(book.num_coupons > 0, dirty - accrued, np.nan)
+
+    def compute_par_rates(self, maturity_ordinals: np.ndarray, num_coupons_per_year: float= 2) -> np.ndarray:
+        """
+        Par yields, coupon rates of the bonds with a regular schedule that the curve prices at par
+
+        Args:
+            maturity_ordinals (np.ndarray): Day serials of the maturity dates
+            num_coupons_per_year (float, optional): Number of coupons per year. Defaults to 2.
+
+        Returns:
+            np.ndarray: The annual par coupon rates (not in percentage)
+        """
+        maturities = self.get_times(np.atleast_1d(maturity_ordinals)).astype(float)
+        # Coupons every 1/frequency years going backwards from maturity, a grid with one row per maturity
+        count = np.ceil(maturities * num_coupons_per_year - 1e-9).astype(np.int64)
+        steps = np.arange(max(count.max(initial=0), 1))
+        coupon_times = maturities[:, None] - steps[None, :] / num_coupons_per_year
+        annuity = np.sum(np.where(steps[None, :] < count[:, None], np.exp(-self._get_rate_times(coupon_times)), 0), axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            par_rates = num_coupons_per_year * (1 - np.exp(-self._get_rate_times(maturities))) / annuity
+        return par_rates.reshape(np.shape(maturity_ordinals))
+
+
+def _get_cash_flows(book: BondBook) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # Flat cash flows of a book in percentage of the face value: N coupons plus the redemption with the last one
+    # Flows are timed like Excel PRICE, (DSC/E + k)/frequency years, so a flat curve gives back the Excel prices of the
+    # bonds with more than 1 coupon left (Excel uses simple interest for the last coupon period)
+    # Returns the bond of each flow, its time, its amount and the accrued interest of each bond
+    num_coupons = np.maximum(book.num_coupons, 0)
+    offsets = np.concatenate([[0], np.cumsum(num_coupons)])
+    owner = np.repeat(np.arange(len(book)), num_coupons)
+    k = np.arange(offsets[-1]) - offsets[owner]
+    times = (book.DSC[owner]/book.coupon_period_days[owner] + k) / book.num_coupons_per_year[owner]
+    coupons = 100*book.annual_coupon_rate/book.num_coupons_per_year
+    amounts = coupons[owner]
+    has_flows = num_coupons > 0
+    amounts[offsets[1:][has_flows] - 1] += book.face_value_percent[has_flows]
+    accrued = coupons * (book.coupon_period_days - book.DSC) / book.coupon_period_days
+    return owner, times, amounts, accrued
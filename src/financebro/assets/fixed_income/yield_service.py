@@ -0,0 +1,184 @@
+from typing import Dict, Iterable
+
+import numpy as np
+
+import financebro.utils._math as _math
+import financebro.utils._bond as _bond
+from financebro.assets.fixed_income.bond_book import BondBook
+
+
+class YieldService:
+    """
+    Yields of a stream of quotes (CUSIP, price) on the bonds of a book
+    Every solve starts from the last yield solved for the CUSIP, moved by the price change over the slope dPrice/dYield of that
+    solve, or from the approximate YTM the first time. A tick-sized move is then solved with a single evaluation of the price.
+    The last quote of each CUSIP is also memoized (one entry per bond of the book at most), a quote seen again (same CUSIP,
+    settlement date and price) is not solved at all. The state is one array per column, indexed by the rows of the book,
+    so a batch of quotes costs a few gathers and scatters on top of the solve.
+
+    Args:
+        book (BondBook): Static data of the quoted bonds, one row per CUSIP, it needs its dates
+    """
+    def __init__(self, book: BondBook):
+        if book.maturity_ordinal is None or book.settlement_ordinal is None:
+            raise ValueError("The book needs maturity_ordinal and settlement_ordinal")
+        self.book = book
+        self._rows = {cusip: row for row, cusip in enumerate(np.asarray(book.cusips).tolist())}
+        self._year_days = 360 if book.date_convention == 'us_nasd_30_360' else 365
+        # Last solve of each row, NaN before the first one. The settlement date it was solved for keys the memo
+        self._last_settlement_ordinal = np.full(len(book), -1, dtype=np.int64)
+        self._last_price_percent = np.full(len(book), np.nan)
+        self._last_ytm_percent = np.full(len(book), np.nan)
+        self._last_dprice = np.full(len(book), np.nan)
+        self._counts = dict.fromkeys(('quotes', 'memo_hits', 'solves', 'warm_solves', 'iterations', 'cold_iterations'), 0)
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(~np.isnan(self._last_price_percent)))
+
+    def get_rows(self, cusips: Iterable[str]) -> np.ndarray:
+        """
+        Rows of the book of some CUSIPs
+
+        Args:
+            cusips (Iterable[str]): CUSIPs, they must be in the book
+
+        Raises:
+            ValueError: A CUSIP is not in the book
+
+        Returns:
+            np.ndarray: The rows
+        """
+        # Plain str, hashing NumPy strings is much slower
+        cusips = cusips.tolist() if isinstance(cusips, np.ndarray) else list(cusips)
+        try:
+            return np.fromiter(map(self._rows.__getitem__, cusips), dtype=np.int64, count=len(cusips))
+        except KeyError as error:
+            raise ValueError(f"Cusip not in the book : {error.args[0]}") from None
+
+    def get_ytm_percent(self, cusips: Iterable[str], price_percent: np.ndarray, rows: np.ndarray= None) -> np.ndarray:
+        """
+        Yields to Maturity of a batch of quotes, the quotes that are not memoized are solved together
+
+        Args:
+            cusips (Iterable[str]): CUSIP of each quote, they must be in the book
+            price_percent (np.ndarray): Quoted prices in percentage of the face value
+            rows (np.ndarray, optional): Rows of the quotes in the book when the caller already knows them (see get_rows),
+                the CUSIPs are not looked up then. Defaults to None.
+
+        Raises:
+            ValueError: A CUSIP is not in the book
+
+        Returns:
+            np.ndarray: The Yields to Maturity in percentage
+        """
+        rows = self.get_rows(cusips) if rows is None else np.asarray(rows, dtype=np.int64)
+        price_percent = np.asarray(price_percent, dtype=float)
+        settlement_ordinal = self.book.settlement_ordinal.take(rows)
+        last_price_percent = self._last_price_percent.take(rows)
+        last_ytm_percent = self._last_ytm_percent.take(rows)
+        hit = (last_price_percent == price_percent) & (self._last_settlement_ordinal.take(rows) == settlement_ordinal)
+        self._counts['quotes'] += len(rows)
+        if not np.any(hit):
+            # Usual case of a tick, every quote moved
+            return self._solve(rows, price_percent, settlement_ordinal, last_price_percent, last_ytm_percent)
+        ytm_percent = np.where(hit, last_ytm_percent, np.nan)
+        self._counts['memo_hits'] += int(np.count_nonzero(hit))
+        missing = np.flatnonzero(~hit)
+        if missing.size:
+            ytm_percent[missing] = self._solve(rows[missing], price_percent[missing], settlement_ordinal[missing],
+                                               last_price_percent[missing], last_ytm_percent[missing])
+        return ytm_percent
+
+    def get_apy(self, cusips: Iterable[str], price_percent: np.ndarray, rows: np.ndarray= None) -> np.ndarray:
+        """
+        APY of a batch of quotes, same formula as BondBook.compute_apy without building a sub-book
+
+        Args:
+            cusips (Iterable[str]): CUSIP of each quote, they must be in the book
+            price_percent (np.ndarray): Quoted prices in percentage of the face value
+            rows (np.ndarray, optional): Rows of the quotes in the book when the caller already knows them (see get_rows),
+                the CUSIPs are not looked up then. Defaults to None.
+
+        Raises:
+            ValueError: A CUSIP is not in the book
+
+        Returns:
+            np.ndarray: The APY in percentage
+        """
+        rows = self.get_rows(cusips) if rows is None else np.asarray(rows, dtype=np.int64)
+        book = self.book
+        return _bond.compute_apy_batch(price_percent,
+                                       book.annual_coupon_rate.take(rows),
+                                       book.num_coupons.take(rows),
+                                       book.num_coupons_per_year.take(rows),
+                                       book.face_value_percent.take(rows),
+                                       _math.day_diff_array(book.settlement_ordinal.take(rows), book.maturity_ordinal.take(rows)),
+                                       self._year_days)
+
+    def _solve(self, rows, price_percent, settlement_ordinal, last_price_percent, last_ytm_percent) -> np.ndarray:
+        book = self.book
+        rate, N, frequency, redemption, DSC, E = (column.take(rows) for column in (book.annual_coupon_rate,
+                                                                                   book.num_coupons,
+                                                                                   book.num_coupons_per_year,
+                                                                                   book.face_value_percent,
+                                                                                   book.DSC,
+                                                                                   book.coupon_period_days))
+        # First order step from the last solve of the CUSIP, the price moves little from one tick to the next
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x0 = last_ytm_percent + (price_percent - last_price_percent) / self._last_dprice.take(rows)
+        x0 = np.where(np.isfinite(x0), x0, last_ytm_percent)
+        cold = np.flatnonzero(np.isnan(last_ytm_percent))
+        if cold.size:
+            days_to_maturity = _math.day_diff_array(settlement_ordinal[cold], book.maturity_ordinal.take(rows[cold]))
+            x0[cold] = _bond.compute_approx_ytm_percent_batch(price_percent[cold], rate[cold], N[cold], frequency[cold],
+                                                              redemption[cold], days_to_maturity, self._year_days)
+        # No usable guess (e.g. settlement on the maturity date), back to the default one
+        x0[~np.isfinite(x0)] = 5
+        iterations = np.zeros(len(rows), dtype=np.int64)
+        dprice = np.empty(len(rows))
+        ytm_percent = _bond.compute_ytm_excel_batch(price_percent, rate, N, frequency, redemption, DSC, E,
+                                                    x0=x0, iterations=iterations, dprice=dprice)
+        total_iterations = int(iterations.sum())
+        cold_iterations = int(iterations[cold].sum())
+        self._counts['solves'] += len(rows)
+        self._counts['warm_solves'] += len(rows) - cold.size
+        self._counts['iterations'] += total_iterations
+        self._counts['cold_iterations'] += cold_iterations
+        # Several quotes of the same CUSIP in a batch write the same row, the last one wins like in a stream
+        solved = ~np.isnan(ytm_percent)
+        columns = [(self._last_settlement_ordinal, settlement_ordinal), (self._last_price_percent, price_percent),
+                   (self._last_ytm_percent, ytm_percent), (self._last_dprice, dprice)]
+        if not np.all(solved):
+            rows, columns = rows[solved], [(state, values[solved]) for state, values in columns]
+        for state, values in columns:
+            state[rows] = values
+        return ytm_percent
+
+    def clear(self):
+        """
+        Forget the memoized quotes and the last yields
+        """
+        self._last_settlement_ordinal[:] = -1
+        for values in (self._last_price_percent, self._last_ytm_percent, self._last_dprice):
+            values[:] = np.nan
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Work done so far
+        The iterations saved are estimated from the history: a warm solve is compared to the average cold solve (first
+        quote of a CUSIP, from the approximate YTM), nothing is solved twice.
+
+        Returns:
+            Dict[str, float]: The counts 'quotes', 'memo_hits', 'solves', 'warm_solves' (seeded from a previous yield),
+                'iterations' (solver steps of all the solves, 0 for a guess that is already the yield), 'cold_iterations' (of
+                the solves without a previous yield), then 'iterations_per_solve', 'cold_iterations_per_solve',
+                'warm_iterations_per_solve' and 'iterations_saved_per_solve' (per warm solve, NaN without cold and warm solves).
+        """
+        stats = dict(self._counts)
+        cold_solves = stats['solves'] - stats['warm_solves']
+        stats['iterations_per_solve'] = stats['iterations'] / max(stats['solves'], 1)
+        stats['cold_iterations_per_solve'] = stats['cold_iterations'] / cold_solves if cold_solves else np.nan
+        stats['warm_iterations_per_solve'] = ((stats['iterations'] - stats['cold_iterations']) / stats['warm_solves']
+                                              if stats['warm_solves'] else np.nan)
+        stats['iterations_saved_per_solve'] = stats['cold_iterations_per_solve'] - stats['warm_iterations_per_solve']
+        return stats
@@ -1,13 +1,22 @@
+import math
+import functools
 from datetime import datetime
+from typing import Tuple
+
+import numpy as np
 
 import financebro.utils._math as _math
+import financebro.utils._stats as _stats
 
 def get_isin_from_cusip(cusip_str, country_code):
     """
     >>> get_isin_from_cusip('037833100', 'US')
     'US0378331005'
+    >>> get_isin_from_cusip('037833100', 'us')
+    'US0378331005'
     """
-    isin_to_digest = country_code + cusip_str.upper()
+    # Same normalization as get_isin_from_cusip_array, country code and CUSIP in upper case
+    isin_to_digest = country_code.upper() + cusip_str.upper()
 
     get_numerical_code = lambda c: str(ord(c) - 55)
     encode_letters = lambda c: c if c.isdigit() else get_numerical_code(c)
@@ -23,6 +32,92 @@ def get_isin_from_cusip(cusip_str, country_code):
     return isin_to_digest + str(check_digit)
 
 
+def _to_codes(identifiers, length: int) -> Tuple[np.ndarray, np.ndarray]:
+    # Identifiers as a (n, length) array of ASCII codes, plus a mask of the ones that have the right length
+    identifiers = np.char.upper(np.asarray(identifiers, dtype=str))
+    encoded = np.char.encode(identifiers, 'ascii', errors='replace').astype(f'S{length}')
+    codes = encoded.reshape(-1).view(np.uint8).reshape(-1, length)
+    right_length = np.char.str_len(identifiers).reshape(-1) == length
+    return codes, right_length
+
+def _char_values(codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # '0'-'9' -> 0-9, 'A'-'Z' -> 10-35 (same encoding as get_isin_from_cusip)
+    is_digit = (codes >= ord('0')) & (codes <= ord('9'))
+    is_letter = (codes >= ord('A')) & (codes <= ord('Z'))
+    values = np.where(is_digit, codes.astype(np.int64) - ord('0'), codes.astype(np.int64) - 55)
+    return values, is_digit, is_letter
+
+def _isin_check_digits(codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Luhn check digit of the alphanumeric codes, letters expand to 2 digits so rows expand to different lengths
+    values, is_digit, is_letter = _char_values(codes)
+    n, length = codes.shape
+    digits = np.stack([values // 10, values % 10], axis=2).reshape(n, 2*length)
+    present = np.stack([is_letter, np.ones_like(is_letter)], axis=2).reshape(n, 2*length)
+    # Every second digit is doubled starting from the rightmost one
+    position_from_right = np.cumsum(present[:, ::-1], axis=1)[:, ::-1] - 1
+    doubled = np.where(position_from_right % 2 == 0, digits*2, digits)
+    digit_sum = np.sum((doubled // 10 + doubled % 10) * present, axis=1)
+    return (10 - digit_sum % 10) % 10, np.all(is_digit | is_letter, axis=1)
+
+def get_isin_from_cusip_array(cusips, country_code: str) -> np.ndarray:
+    """
+    Vectorized get_isin_from_cusip, invalid CUSIPs (not 9 alphanumeric characters) give ''
+
+    Args:
+        cusips (Iterable[str]): CUSIP numbers
+        country_code (str): Country code of the ISINs, e.g. 'US'
+
+    Returns:
+        np.ndarray: The ISIN numbers
+    """
+    cusips = np.char.upper(np.asarray(cusips, dtype=str))
+    to_digest = np.char.add(country_code.upper(), cusips)
+    codes, right_length = _to_codes(to_digest, 11)
+    check_digits, valid = _isin_check_digits(codes)
+    isins = np.char.add(to_digest, check_digits.astype(str).reshape(to_digest.shape))
+    return np.where((right_length & valid).reshape(to_digest.shape), isins, '')
+
+def validate_isin_array(isins) -> np.ndarray:
+    """
+    Check the ISIN check digits of many identifiers at once
+
+    Args:
+        isins (Iterable[str]): ISIN numbers
+
+    Returns:
+        np.ndarray: Boolean mask of the valid ISINs
+    """
+    isins = np.asarray(isins, dtype=str)
+    codes, right_length = _to_codes(isins, 12)
+    check_digits, valid = _isin_check_digits(codes[:, :11])
+    is_country = np.all((codes[:, :2] >= ord('A')) & (codes[:, :2] <= ord('Z')), axis=1)
+    return (right_length & valid & is_country & (codes[:, 11] == check_digits + ord('0'))).reshape(isins.shape)
+
+def validate_cusip_array(cusips) -> np.ndarray:
+    """
+    Check the CUSIP check digits (9th character) of many identifiers at once
+    From https://en.wikipedia.org/wiki/CUSIP#Check_digit_pseudocode
+
+    Args:
+        cusips (Iterable[str]): CUSIP numbers
+
+    Returns:
+        np.ndarray: Boolean mask of the valid CUSIPs
+    """
+    cusips = np.asarray(cusips, dtype=str)
+    codes, right_length = _to_codes(cusips, 9)
+    values, is_digit, is_letter = _char_values(codes[:, :8])
+    # '*', '@' and '#' are used by private placements
+    for special, value in ((b'*', 36), (b'@', 37), (b'#', 38)):
+        is_special = codes[:, :8] == ord(special)
+        values = np.where(is_special, value, values)
+        is_digit = is_digit | is_special
+    values = values * np.array([1, 2, 1, 2, 1, 2, 1, 2]) # every second character is doubled
+    check_digits = (10 - np.sum(values // 10 + values % 10, axis=1) % 10) % 10
+    valid = right_length & np.all(is_digit | is_letter, axis=1)
+    return (valid & (codes[:, 8] == check_digits + ord('0'))).reshape(cusips.shape)
+
+
 def get_cusip_from_isin(isin_str):
     """
     >>> get_cusip_from_isin('US0378331005')
@@ -64,28 +159,24 @@ def get_cusip_from_ticker(ticker_str):
     >>> get_cusip_from_ticker('AAPL')
     '037833100'
     """
-    url = f'https://www.marketwatch.com/investing/stock/{ticker_str}/profile'
-    resp = requests.get(url)
-    if resp.ok:
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        cusip = soup.find('span', {'class': 'ticker__cusip'}).text
-        return cusip
-    else:
-        raise ValueError(f"Failed to get CUSIP from {url}")
+    # Cached and pooled, see _resolver.IdentifierResolver
+    from financebro.utils._resolver import get_default_resolver
+    resolver = get_default_resolver()
+    cusip = resolver.get_cusip_from_ticker(ticker_str)
+    resolver.flush()
+    return cusip
     
 def get_ticker_from_cusip(cusip_str):
     """
     >>> get_ticker_from_cusip('037833100')
     'AAPL'
     """
-    url = f'https://www.marketwatch.com/investing/stock/{cusip_str}/profile'
-    resp = requests.get(url)
-    if resp.ok:
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        ticker = soup.find('span', {'class': 'company__ticker'}).text
-        return ticker
-    else:
-        raise ValueError(f"Failed to get ticker from {url}")
+    # Cached and pooled, see _resolver.IdentifierResolver
+    from financebro.utils._resolver import get_default_resolver
+    resolver = get_default_resolver()
+    ticker = resolver.get_ticker_from_cusip(cusip_str)
+    resolver.flush()
+    return ticker
     
 def get_ticker_from_isin(isin_str):
     """
@@ -144,10 +235,17 @@ def compute_price_excel(ytm_percent, rate, N, frequency, redemption, DSC, E) ->
     yld = ytm_percent/100
     A = E - DSC # number of days from beginning of settlement coupon period to settlement date.
     if N > 1:
-        T1: float = redemption / ((1 + yld/frequency) ** (N-1+ DSC/E)) # redemption present value
-        T2: float = 0
-        for k in range(1, N+1):
-            T2 += ( 100*rate/frequency ) / (1 + yld/frequency) ** (k-1+ DSC/E) # sum of the present value of the coupons
+        r = yld/frequency # yield per coupon period
+        v = 1 + r
+        T1: float = redemption / (v ** (N-1+ DSC/E)) # redemption present value
+        # sum of the present value of the coupons, sum_{k=1..N} v^-(k-1) is a geometric series
+        if abs(r) < 1e-15:
+            annuity = N # no discounting at 0 yield, the closed form below is 0/0
+        elif v > 0:
+            annuity = math.expm1(-N*math.log1p(r)) / math.expm1(-math.log1p(r)) # expm1/log1p stay accurate for small yields
+        else:
+            annuity = (1 - v**-N) / (1 - 1/v)
+        T2: float = ( 100*rate/frequency ) * annuity / v ** (DSC/E)
         T3 = 100*( rate/frequency ) * (A/E) # minus the interest owed to previous settler
         price_percent: float = T1 + T2 - T3 # in %
     elif N == 1 : # Only 1 coupon so self.maturity_date == self.next_coupon_date
@@ -159,6 +257,332 @@ def compute_price_excel(ytm_percent, rate, N, frequency, redemption, DSC, E) ->
     return price_percent
 
 
+def compute_price_duration_convexity_excel(ytm_percent, rate, N, frequency, redemption, DSC, E) -> Tuple[float, float, float, float]:
+    """
+    Compute the Excel price of the bond with its Macaulay duration, modified duration and convexity from one evaluation
+    Avoids repricing with bumped yields, the derivatives come from the closed form of the Excel price formula.
+    Works on scalars and on arrays of bonds.
+
+    Args:
+        ytm_percent (float): Yield to Maturity of the bond in percentage
+        rate (float): Annual coupon rate of the bond (not in percentage)
+        N (int): Number of coupons left
+        frequency (float): Number of coupons per year
+        redemption (float): Redemption value in percentage of the face value
+        DSC (float): Number of days from settlement to the next coupon date
+        E (float): Number of days in the coupon period
+
+    Returns:
+        float: The price of the bond in percentage of the face value
+        float: The Macaulay duration in years
+        float: The modified duration in years
+        float: The convexity in years^2
+    """
+    price_percent, dprice, d2price = compute_price_excel_derivatives_batch(ytm_percent, rate, N, frequency, redemption, DSC, E)
+    # Durations are computed on the full (dirty) price, the Excel price is the clean one
+    dirty_price_percent = price_percent + 100*(np.asarray(rate)/frequency) * ((np.asarray(E) - DSC)/E)
+    modified_duration = -100*dprice / dirty_price_percent # derivatives are per yield percent
+    convexity = 100**2*d2price / dirty_price_percent
+    r = np.asarray(ytm_percent)/100/frequency
+    compounding = np.where(np.asarray(N) > 1, 1 + r, 1 + r*np.asarray(DSC)/E) # N == 1 is discounted with simple interest
+    macaulay_duration = modified_duration * compounding
+    if np.ndim(price_percent) == 0:
+        return float(price_percent), float(macaulay_duration), float(modified_duration), float(convexity)
+    return price_percent, macaulay_duration, modified_duration, convexity
+
+
+def compute_price_excel_batch(ytm_percent, rate, N, frequency, redemption, DSC, E) -> np.ndarray:
+    """
+    Vectorized version of compute_price_excel, every argument can be a scalar or an array (broadcasted together)
+    Both the N > 1 and N == 1 branches of the Excel formula are evaluated with masks, bonds with N < 1 get NaN
+
+    Args:
+        ytm_percent (np.ndarray): Yield to Maturity of the bonds in percentage
+        rate (np.ndarray): Annual coupon rate of the bonds (not in percentage)
+        N (np.ndarray): Number of coupons left
+        frequency (np.ndarray): Number of coupons per year
+        redemption (np.ndarray): Redemption value in percentage of the face value
+        DSC (np.ndarray): Number of days from settlement to the next coupon date
+        E (np.ndarray): Number of days in the coupon period
+
+    Returns:
+        np.ndarray: The prices of the bonds in percentage of the face value
+    """
+    yld, rate, N, frequency, redemption, DSC, E = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (ytm_percent, rate, N, frequency, redemption, DSC, E)))
+    yld = yld/100
+    A = E - DSC
+    r = yld/frequency # yield per coupon period
+    coupon = 100*rate/frequency
+    accrued = coupon * (A/E)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        # N > 1: the coupon sum is a geometric series, sum_{k=1..N} v^-(k-1) = (1 - v^-N) / (1 - v^-1) with v = 1 + r
+        log_v = np.log1p(r)
+        annuity = np.where(r == 0, N, np.expm1(-N*log_v) / np.expm1(-log_v))
+        discount = np.exp(-(DSC/E)*log_v)
+        T1 = redemption * discount * np.exp(-(N-1)*log_v)
+        T2 = coupon * discount * annuity
+        price_many = T1 + T2 - accrued
+        # N == 1: simple interest discounting up to maturity
+        price_one = (coupon + redemption) / (r*(DSC/E) + 1) - accrued
+    price_percent = np.where(N > 1, price_many, np.where(N == 1, price_one, np.nan))
+    return price_percent
+
+
+def _annuity_moments(log_v: np.ndarray, N: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Closed forms of S_m = sum_{j=0..N-1} j^m v^-j for m = 0, 1, 2 with v = exp(log_v)
+    # They cancel catastrophically when v is close to 1, those bonds go through the derivatives of log S0 instead
+    shape = np.shape(log_v)
+    # Fresh 1-d arrays, the near zero bonds are assigned in place (0-d inputs give NumPy scalars otherwise)
+    log_v, N = (np.array(a, dtype=float, ndmin=1) for a in np.broadcast_arrays(log_v, N))
+    # Only 2 transcendental calls per bond (x**3 would be a pow call too, unlike x**2)
+    one_minus_x = -np.expm1(-log_v)
+    one_minus_xN = -np.expm1(-N*log_v)
+    x = 1 - one_minus_x
+    xN = 1 - one_minus_xN
+    x_xN = x*xN
+    with np.errstate(divide='ignore', invalid='ignore'):
+        S0 = one_minus_xN / one_minus_x
+        S1 = (x - N*xN + (N-1)*x_xN) / (one_minus_x*one_minus_x)
+        S2 = (x*(1 + x) - N*N*xN + (2*N*N - 2*N - 1)*x_xN - (N-1)*(N-1)*x*x_xN) / (one_minus_x*one_minus_x*one_minus_x)
+    near_zero = np.abs(log_v) < 1e-3
+    if np.any(near_zero):
+        L, N_small = log_v[near_zero], N[near_zero]
+        # S0 = N g(NL) / g(L) with g(z) = (1 - e^-z)/z, S1 and S2 from the first two derivatives of log S0 in L
+        g, h, dh = _annuity_log_terms(np.concatenate((N_small*L, L)))
+        n = L.size
+        S0_small = N_small * g[:n] / g[n:]
+        S1_small = S0_small * (N_small*h[:n] - h[n:])
+        S0[near_zero] = S0_small
+        S1[near_zero] = S1_small
+        with np.errstate(divide='ignore', invalid='ignore'):
+            S2[near_zero] = np.where(S0_small == 0, 0, S1_small*S1_small/S0_small - S0_small*(N_small*N_small*dh[:n] - dh[n:]))
+    return S0.reshape(shape), S1.reshape(shape), S2.reshape(shape)
+
+
+def _annuity_log_terms(z: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # g(z) = (1 - e^-z)/z, h(z) = -(log g)'(z) = 1/z - 1/(e^z - 1) and h'(z)
+    # h and h' cancel in closed form near 0, series up to z^7 there (truncation below 1e-16 for |z| < 0.1)
+    z2 = z*z
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        one_minus_x = -np.expm1(-z)
+        g = np.where(z == 0, 1, one_minus_x/z)
+        inv = 1/one_minus_x
+        h = 1/z - inv + 1
+        dh = inv*(inv - 1) - 1/z2
+    small = np.abs(z) < 0.1
+    h = np.where(small, 1/2 - z*(1/12 - z2*(1/720 - z2*(1/30240 - z2/1209600))), h)
+    dh = np.where(small, -1/12 + z2*(1/240 - z2*(1/6048 - z2/172800)), dh)
+    return g, h, dh
+
+
+def compute_price_excel_derivatives_batch(ytm_percent, rate, N, frequency, redemption, DSC, E) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Excel price of the bonds and its first and second derivatives with respect to the yield (in percentage), in closed form
+    Used by the batched YTM solver (Halley) and for duration and convexity.
+
+    Args:
+        ytm_percent (np.ndarray): Yield to Maturity of the bonds in percentage
+        rate (np.ndarray): Annual coupon rate of the bonds (not in percentage)
+        N (np.ndarray): Number of coupons left
+        frequency (np.ndarray): Number of coupons per year
+        redemption (np.ndarray): Redemption value in percentage of the face value
+        DSC (np.ndarray): Number of days from settlement to the next coupon date
+        E (np.ndarray): Number of days in the coupon period
+
+    Returns:
+        np.ndarray: The prices of the bonds in percentage of the face value
+        np.ndarray: dPrice/dYield, yield in percentage
+        np.ndarray: d2Price/dYield2, yield in percentage
+    """
+    yld, rate, N, frequency, redemption, DSC, E = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (ytm_percent, rate, N, frequency, redemption, DSC, E)))
+    yld = yld/100
+    r = yld/frequency # yield per coupon period
+    s = DSC/E # fraction of a period until the next coupon
+    coupon = 100*rate/frequency
+    accrued = coupon * ((E - DSC)/E)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        # N > 1: cash flows at t_j = j + s periods, price and derivatives with respect to L = log(1 + r)
+        log_v = np.log1p(r)
+        S0, S1, S2 = _annuity_moments(np.where(N > 1, log_v, 1.), N)
+        discount = np.exp(-s*log_v)
+        t_N = N - 1 + s
+        redemption_pv = redemption * np.exp(-(N-1)*log_v)
+        price_many = discount * (coupon*S0 + redemption_pv) - accrued
+        dprice_dL = -discount * (coupon*(S1 + s*S0) + t_N*redemption_pv)
+        d2price_dL2 = discount * (coupon*(S2 + 2*s*S1 + s**2*S0) + t_N**2*redemption_pv)
+        dL = 1 / (100*frequency*(1 + r)) # dL/dYield
+        dprice_many = dprice_dL * dL
+        d2price_many = d2price_dL2 * dL**2 - dprice_dL * dL**2
+        # N == 1: simple interest discounting up to maturity
+        denominator = 1 + r*s
+        dr = 1 / (100*frequency) # dr/dYield
+        price_one = (coupon + redemption) / denominator - accrued
+        dprice_one = -(coupon + redemption) * s / denominator**2 * dr
+        d2price_one = 2 * (coupon + redemption) * s**2 / (denominator*denominator*denominator) * dr**2
+    many, one = N > 1, N == 1
+    select = lambda values_many, values_one: np.where(many, values_many, np.where(one, values_one, np.nan))
+    return select(price_many, price_one), select(dprice_many, dprice_one), select(d2price_many, d2price_one)
+
+
+def compute_ytm_excel_batch(price_percent, rate, N, frequency, redemption, DSC, E,
+                            x0: float= 5, tol: float= 1e-10, max_iter: int= 100,
+                            lower: float= -50, upper: float= 1000, iterations: np.ndarray= None,
+                            dprice: np.ndarray= None) -> np.ndarray:
+    """
+    Vectorized Excel YIELD computation for many bonds at once
+    Bonds with 1 coupon left use the closed form of compute_ytm_excel_1_coupon. The others run one Halley iteration for all bonds at once
+    with the closed form derivatives of the Excel price, and the bonds that do not converge fall back to a bisection over [lower, upper].
+    From https://support.microsoft.com/en-gb/office/yield-function-f5f5ca43-c4bd-434f-8bd2-ed3c9727a4fe
+
+    Args:
+        price_percent (np.ndarray): Prices of the bonds in percentage of the face value
+        rate (np.ndarray): Annual coupon rate of the bonds (not in percentage)
+        N (np.ndarray): Number of coupons left
+        frequency (np.ndarray): Number of coupons per year
+        redemption (np.ndarray): Redemption value in percentage of the face value
+        DSC (np.ndarray): Number of days from settlement to the next coupon date
+        E (np.ndarray): Number of days in the coupon period
+        x0 (np.ndarray, optional): Initial guess of the yield in percentage. Defaults to 5.
+        tol (float, optional): Convergence tolerance on the yield. Defaults to 1e-10.
+        max_iter (int, optional): Maximum Halley iterations. Defaults to 100.
+        lower (float, optional): Lower end of the bisection bracket in percentage. Defaults to -50.
+        upper (float, optional): Upper end of the bisection bracket in percentage. Defaults to 1000.
+        iterations (np.ndarray, optional): Integer array the size of the bonds, filled in place with the number of Halley
+            iterations of each bond (0 for the closed form). Defaults to None.
+        dprice (np.ndarray, optional): Float array the size of the bonds, filled in place with dPrice/dYield (yield in
+            percentage) at the last Halley evaluation, next to the root. NaN for the closed form and the bisection. Useful
+            to guess the yield of the next price. Defaults to None.
+
+    Returns:
+        np.ndarray: The Yields to Maturity of the bonds in percentage, NaN if there is no solution in [lower, upper]
+    """
+    price_percent, rate, N, frequency, redemption, DSC, E, x0 = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (price_percent, rate, N, frequency, redemption, DSC, E, x0)))
+    ytm_percent = np.full(price_percent.shape, np.nan)
+
+    one = N == 1
+    ytm_percent[one] = compute_ytm_excel_1_coupon(price_percent[one], rate[one], frequency[one], redemption[one], DSC[one], E[one])
+
+    many = np.flatnonzero(N > 1)
+    args = [rate, N, frequency, redemption, DSC, E]
+    target = price_percent
+    if many.size < N.size:
+        args = [a[many] for a in args]
+        target = target[many]
+    slope = np.full(many.size, np.nan)
+    def f(x, index):
+        # The first iteration evaluates every bond, no gather needed
+        if index.size == many.size:
+            price, dprice_dx, d2price = compute_price_excel_derivatives_batch(x, *args)
+            slope[:] = dprice_dx
+            return price - target, dprice_dx, d2price
+        price, dprice_dx, d2price = compute_price_excel_derivatives_batch(x, *(a[index] for a in args))
+        slope[index] = dprice_dx
+        return price - target[index], dprice_dx, d2price
+    many_iterations = None if iterations is None else np.zeros(many.size, dtype=np.int64)
+    roots, converged = _math.solve_halley_batch(f, x0[many], tol=tol, max_iter=max_iter, iterations=many_iterations)
+    if iterations is not None:
+        iterations[...] = 0
+        iterations[many] = many_iterations
+    if not np.all(converged):
+        failed = np.flatnonzero(~converged)
+        slope[failed] = np.nan
+        def f_value(x, index):
+            return compute_price_excel_batch(x, *(a[failed[index]] for a in args)) - target[failed[index]]
+        roots[failed] = _math.solve_bisection_batch(f_value,
+                                                    np.full(failed.size, lower),
+                                                    np.full(failed.size, upper),
+                                                    tol=tol)
+    ytm_percent[many] = roots
+    if dprice is not None:
+        dprice[...] = np.nan
+        dprice[many] = slope
+    return ytm_percent
+
+
+def compute_ytr_excel_batch(price_percent, rate, settlement, redemption, redemption_percent, coupon_period_days,
+                            date_convention: str= 'us_nasd_30_360', x0: float= 5) -> np.ndarray:
+    """
+    Vectorized Excel YIELD of bonds to several possible redemptions (call dates at their call prices, maturity at par),
+    with one batched solve. The coupons are walked back from each redemption date like YIELD(settlement, call date, ...) in Excel.
+    Arguments are broadcasted together, e.g. (bonds, 1) prices against (bonds, redemptions) dates.
+
+    Args:
+        price_percent (np.ndarray): Prices of the bonds in percentage of the face value
+        rate (np.ndarray): Annual coupon rate of the bonds (not in percentage)
+        settlement (np.ndarray): Day serials of the settlement dates
+        redemption (np.ndarray): Day serials of the redemption dates
+        redemption_percent (np.ndarray): Redemption values in percentage of the face value
+        coupon_period_days (np.ndarray): Number of days between two coupons
+        date_convention (str, optional): Calendar convention. Can be 'us_nasd_30_360' | 'not_retarded'. Defaults to 'us_nasd_30_360'.
+        x0 (np.ndarray, optional): Initial guess of the yields in percentage. Defaults to 5.
+
+    Returns:
+        np.ndarray: The yields to each redemption in percentage, NaN for redemptions on or before settlement
+    """
+    price_percent, rate, settlement, redemption, redemption_percent, coupon_period_days, x0 = np.broadcast_arrays(
+        price_percent, rate, settlement, redemption, redemption_percent, coupon_period_days, x0)
+    shape = price_percent.shape
+    N, first_coupon = get_coupons_count_batch(settlement, redemption, coupon_period_days, date_convention)
+    DSC = _math.day_diff_array(settlement, first_coupon, date_convention)
+    frequency = (360 if date_convention == 'us_nasd_30_360' else 365) / np.asarray(coupon_period_days, dtype=float)
+    columns = (price_percent, rate, N, frequency, redemption_percent, DSC, coupon_period_days, x0)
+    price_percent, rate, N, frequency, redemption_percent, DSC, coupon_period_days, x0 = (np.ravel(x) for x in columns)
+    ytr_percent = compute_ytm_excel_batch(price_percent, rate, N, frequency, redemption_percent, DSC, coupon_period_days, x0=x0)
+    return ytr_percent.reshape(shape)
+
+
+def compute_approx_ytm_percent_batch(price_percent, rate, N, frequency, redemption, days_to_maturity, year_days: int) -> np.ndarray:
+    """
+    Vectorized approximate Yield to Maturity, same formula as Bond.compute_approx_ytm_percent. A good initial guess for
+    compute_ytm_excel_batch.
+
+    Args:
+        price_percent (np.ndarray): Prices of the bonds in percentage of the face value
+        rate (np.ndarray): Annual coupon rate of the bonds (not in percentage)
+        N (np.ndarray): Number of coupons left
+        frequency (np.ndarray): Number of coupons per year
+        redemption (np.ndarray): Redemption value in percentage of the face value
+        days_to_maturity (np.ndarray): Number of days from settlement to maturity
+        year_days (int): Number of days in a year of the calendar convention, 360 or 365
+
+    Returns:
+        np.ndarray: The approximate Yields to Maturity of the bonds in percentage
+    """
+    num_years = days_to_maturity / year_days
+    # Everything in percentage of the face value
+    total_interest = N * 100*rate/frequency
+    with np.errstate(divide='ignore', invalid='ignore'):
+        approx_ytm = (total_interest + redemption - price_percent) / num_years
+    return 100 * approx_ytm / ((price_percent + redemption)/2)
+
+
+def compute_apy_batch(price_percent, rate, N, frequency, redemption, days_to_maturity, year_days: int) -> np.ndarray:
+    """
+    Vectorized APY, same formula as Bond.compute_apy
+
+    Args:
+        price_percent (np.ndarray): Prices of the bonds in percentage of the face value
+        rate (np.ndarray): Annual coupon rate of the bonds (not in percentage)
+        N (np.ndarray): Number of coupons left
+        frequency (np.ndarray): Number of coupons per year
+        redemption (np.ndarray): Redemption value in percentage of the face value
+        days_to_maturity (np.ndarray): Number of days from settlement to maturity
+        year_days (int): Number of days in a year of the calendar convention, 360 or 365
+
+    Returns:
+        np.ndarray: The APY of the bonds in percentage
+    """
+    # Everything in percentage of the face value
+    interest_return = N * 100*rate/frequency
+    total_return = interest_return + redemption - price_percent
+    with np.errstate(divide='ignore', invalid='ignore'):
+        apy = 100*(total_return/price_percent) / days_to_maturity * year_days
+    return apy
+
+
 def compute_price_textbook(ytm_percent: float, annual_coupon: float, num_years: int, face_value: float) -> float:
     """
     Compute the approximate price of the bond in percentage of the face value
@@ -183,9 +607,182 @@ def compute_price_textbook(ytm_percent: float, annual_coupon: float, num_years:
     
 
 def get_coupons_date(settlement_date: str, maturity_date: str, coupon_period_days:int, date_convention: str= 'us_nasd_30_360'):
-    iter_date = maturity_date
-    coupon_dates = []
-    while datetime.strptime(iter_date, "%m/%d/%Y") >= datetime.strptime(settlement_date, "%m/%d/%Y"):
-        coupon_dates.insert(0, iter_date)
-        iter_date = _math.remove_days(iter_date, coupon_period_days, date_convention)
-    return coupon_dates
\ No newline at end of file
+    coupon_ordinals = get_coupons_ordinals(_math.date_to_ordinal(settlement_date), _math.date_to_ordinal(maturity_date), coupon_period_days, date_convention)
+    return [_math.ordinal_to_date(coupon_ordinal) for coupon_ordinal in coupon_ordinals]
+
+@functools.lru_cache(maxsize=4096)
+def get_coupons_ordinals(settlement: int, maturity: int, coupon_period_days:int, date_convention: str= 'us_nasd_30_360') -> np.ndarray:
+    """
+    Coupon schedule of a bond as day serials, from the first coupon after settlement up to maturity
+    Bonds of an inventory share a handful of maturities and periods so schedules are memoized (bounded LRU), use
+    get_coupons_ordinals.cache_info() for hit/miss statistics. The returned array is shared between callers and read-only.
+
+    Args:
+        settlement (int): Day serial of the settlement date
+        maturity (int): Day serial of the maturity date
+        coupon_period_days (int): Number of days between two coupons
+        date_convention (str, optional): Calendar convention. Can be 'us_nasd_30_360' | 'not_retarded'. Defaults to 'us_nasd_30_360'.
+
+    Returns:
+        np.ndarray: Coupon dates as day serials in increasing order
+    """
+    if date_convention == 'not_retarded':
+        num_coupons = max((maturity - settlement) // coupon_period_days + 1, 0)
+        coupon_ordinals = maturity - coupon_period_days * np.arange(num_coupons - 1, -1, -1, dtype=np.int64)
+    else:
+        # Walk backwards from maturity in one pass, append then reverse
+        iter_date = maturity
+        backwards = []
+        while iter_date >= settlement:
+            backwards.append(iter_date)
+            iter_date = _math.remove_days_ordinal(iter_date, coupon_period_days, date_convention)
+        coupon_ordinals = np.array(backwards[::-1], dtype=np.int64)
+    coupon_ordinals.flags.writeable = False
+    return coupon_ordinals
+
+
+def _unique_schedules(settlement: np.ndarray, maturity: np.ndarray, coupon_period_days: np.ndarray):
+    # Bonds of an inventory share a handful of (settlement, maturity, period) triplets, only walk each one once
+    settlement, maturity, coupon_period_days = settlement.ravel(), maturity.ravel(), coupon_period_days.ravel()
+    # Packed in one int64 when it fits (day serials of real dates are < 2**22), much faster than np.unique on rows. Same order.
+    if (settlement.size and min(settlement.min(), maturity.min(), coupon_period_days.min()) >= 0
+            and max(settlement.max(), maturity.max()) < 2**22 and coupon_period_days.max() < 2**19):
+        keys, inverse = np.unique((settlement << 41) | (maturity << 19) | coupon_period_days, return_inverse=True)
+        return keys >> 41, (keys >> 19) & (2**22 - 1), keys & (2**19 - 1), inverse.ravel()
+    keys = np.stack([settlement, maturity, coupon_period_days], axis=1)
+    keys, inverse = np.unique(keys, axis=0, return_inverse=True)
+    return keys[:, 0], keys[:, 1], keys[:, 2], inverse.ravel()
+
+def _walk_back_us_nasd_30_360(settlement: np.ndarray, maturity: np.ndarray, coupon_period_days: np.ndarray):
+    # Step all the schedules backwards from maturity together, yields the positions still on or after settlement with their coupon dates
+    # Dates stay (year, month, day) during the walk as 30/360 only needs integer arithmetic on them, compared as YYYYMMDD keys
+    to_key = lambda year, month, day: year*10000 + month*100 + day
+    settlement_key = to_key(*_math.ordinals_to_ymd(settlement))
+    index = np.flatnonzero(maturity >= settlement)
+    year, month, day = _math.ordinals_to_ymd(maturity[index])
+    while index.size:
+        yield index, year, month, day
+        year, month, day = _math.remove_days_us_nasd_30_360_ymd(year, month, day, coupon_period_days[index])
+        keep = to_key(year, month, day) >= settlement_key[index]
+        index, year, month, day = index[keep], year[keep], month[keep], day[keep]
+
+def get_coupons_ordinals_batch(settlement: np.ndarray, maturity: np.ndarray, coupon_period_days: np.ndarray,
+                               date_convention: str= 'us_nasd_30_360') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Coupon schedules of many bonds at once, all bonds step back from maturity together
+    Identical (settlement, maturity, period) triplets are only generated once.
+    The schedule of bond i is coupon_ordinals[offsets[i]:offsets[i+1]].
+
+    Args:
+        settlement (np.ndarray): Day serials of the settlement dates
+        maturity (np.ndarray): Day serials of the maturity dates
+        coupon_period_days (np.ndarray): Number of days between two coupons
+        date_convention (str, optional): Calendar convention. Can be 'us_nasd_30_360' | 'not_retarded'. Defaults to 'us_nasd_30_360'.
+
+    Returns:
+        np.ndarray: Offsets of each schedule in the flat array (size number of bonds + 1)
+        np.ndarray: Flat array of the coupon dates as day serials, increasing within each schedule
+    """
+    settlement, maturity, coupon_period_days = (x.ravel() for x in np.broadcast_arrays(*(np.asarray(x, dtype=np.int64) for x in (settlement, maturity, coupon_period_days))))
+    if date_convention == 'not_retarded':
+        counts = np.maximum((maturity - settlement) // coupon_period_days + 1, 0)
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        remaining = np.repeat(offsets[1:], counts) - 1 - np.arange(offsets[-1]) # coupons left after each date
+        return offsets, np.repeat(maturity, counts) - np.repeat(coupon_period_days, counts) * remaining
+    elif date_convention != 'us_nasd_30_360':
+        raise ValueError(f"Invalid mode: {date_convention}")
+    unique_settlement, unique_maturity, unique_period, inverse = _unique_schedules(settlement, maturity, coupon_period_days)
+
+    bond_index, years, months, days = [], [], [], []
+    for index, year, month, day in _walk_back_us_nasd_30_360(unique_settlement, unique_maturity, unique_period):
+        bond_index.append(index)
+        years.append(year)
+        months.append(month)
+        days.append(day)
+    empty = [np.zeros(0, dtype=np.int64)]
+    bond_index = np.concatenate(bond_index or empty)
+    dates = _math.ymd_to_ordinals(np.concatenate(years or empty), np.concatenate(months or empty), np.concatenate(days or empty))
+    unique_dates = dates[np.lexsort((dates, bond_index))]
+    unique_counts = np.bincount(bond_index, minlength=len(unique_settlement))
+    unique_offsets = np.concatenate([[0], np.cumsum(unique_counts)])
+
+    # Expand the unique schedules back to every bond
+    counts = unique_counts[inverse]
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    positions = np.repeat(unique_offsets[:-1][inverse] - offsets[:-1], counts) + np.arange(offsets[-1])
+    return offsets, unique_dates[positions]
+
+
+def get_coupons_count_batch(settlement: np.ndarray, maturity: np.ndarray, coupon_period_days: np.ndarray,
+                            date_convention: str= 'us_nasd_30_360') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Number of coupons and first coupon date of many bonds at once, without materializing the schedules
+    Arguments are broadcasted together so e.g. bonds x candidate periods can be evaluated as a 2-D array.
+
+    Args:
+        settlement (np.ndarray): Day serials of the settlement dates
+        maturity (np.ndarray): Day serials of the maturity dates
+        coupon_period_days (np.ndarray): Number of days between two coupons
+        date_convention (str, optional): Calendar convention. Can be 'us_nasd_30_360' | 'not_retarded'. Defaults to 'us_nasd_30_360'.
+
+    Returns:
+        np.ndarray: Number of coupons left
+        np.ndarray: Day serials of the first coupon dates (maturity if no coupon is left)
+    """
+    settlement, maturity, coupon_period_days = np.broadcast_arrays(*(np.asarray(x, dtype=np.int64) for x in (settlement, maturity, coupon_period_days)))
+    shape = settlement.shape
+    if date_convention == 'not_retarded':
+        num_coupons = np.maximum((maturity - settlement) // coupon_period_days + 1, 0)
+        first_coupon = maturity - np.maximum(num_coupons - 1, 0) * coupon_period_days
+        return num_coupons, first_coupon
+    elif date_convention != 'us_nasd_30_360':
+        raise ValueError(f"Invalid mode: {date_convention}")
+    unique_settlement, unique_maturity, unique_period, inverse = _unique_schedules(settlement, maturity, coupon_period_days)
+
+    num_coupons = np.zeros(len(unique_settlement), dtype=np.int64)
+    first_year, first_month, first_day = _math.ordinals_to_ymd(unique_maturity)
+    for index, year, month, day in _walk_back_us_nasd_30_360(unique_settlement, unique_maturity, unique_period):
+        num_coupons[index] += 1
+        first_year[index], first_month[index], first_day[index] = year, month, day
+    first_coupon = _math.ymd_to_ordinals(first_year, first_month, first_day)
+    return num_coupons[inverse].reshape(shape), first_coupon[inverse].reshape(shape)
+
+
+# Candidate coupon periods when the inventory does not give it, see Bond.infer_coupons_dates
+COUPON_PERIOD_DAYS_TRIALS = (15, 30, 60, 90, 120, 180, 360)
+
+def infer_coupon_period_days_batch(price_percent: np.ndarray, ytm_percent: np.ndarray, rate: np.ndarray, redemption: np.ndarray,
+                                   settlement: np.ndarray, maturity: np.ndarray, date_convention: str= 'us_nasd_30_360',
+                                   trials: Tuple[int, ...]= COUPON_PERIOD_DAYS_TRIALS) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Infer the coupon period of many bonds at once from the price computation, same rule as Bond.infer_coupons_dates
+    Every candidate period of every bond is priced in one bonds x trials array and the first trial that gives back the quoted price wins.
+    Bonds with no matching trial are reported instead of raising for the whole load.
+
+    Args:
+        price_percent (np.ndarray): Quoted prices of the bonds in percentage of the face value
+        ytm_percent (np.ndarray): Quoted Yields to Maturity of the bonds in percentage
+        rate (np.ndarray): Annual coupon rate of the bonds (not in percentage)
+        redemption (np.ndarray): Redemption value in percentage of the face value
+        settlement (np.ndarray): Day serials of the settlement dates
+        maturity (np.ndarray): Day serials of the maturity dates
+        date_convention (str, optional): Calendar convention. Can be 'us_nasd_30_360' | 'not_retarded'. Defaults to 'us_nasd_30_360'.
+        trials (Tuple[int, ...], optional): Candidate coupon periods in days, in order of preference. Defaults to COUPON_PERIOD_DAYS_TRIALS.
+
+    Returns:
+        np.ndarray: The inferred coupon period in days of each bond, 0 where no trial matches
+        np.ndarray: Boolean mask of the bonds whose period was found
+        np.ndarray: Diagnostic, the price obtained with each trial (bonds x trials, NaN when no coupon is left)
+    """
+    price_percent, ytm_percent, rate, redemption = (np.asarray(x, dtype=float)[:, None] for x in np.broadcast_arrays(price_percent, ytm_percent, rate, redemption))
+    settlement, maturity = (np.asarray(x, dtype=np.int64)[:, None] for x in np.broadcast_arrays(settlement, maturity))
+    trials = np.asarray(trials, dtype=np.int64)
+    num_coupons, first_coupon = get_coupons_count_batch(settlement, maturity, trials[None, :], date_convention)
+    DSC = _math.day_diff_array(settlement, first_coupon)
+    tried_prices = compute_price_excel_batch(ytm_percent, rate, num_coupons, 360/trials, redemption, DSC, trials)
+    match = np.abs(np.round(tried_prices, 3) - price_percent) < 0.01
+    found = match.any(axis=1)
+    coupon_period_days = np.where(found, trials[match.argmax(axis=1)], 0)
+    if _stats.enabled and not np.all(found):
+        _stats.record_event('infer_coupon_period_days_batch', 'not found', count=int(np.sum(~found)), bonds=found.size)
+    return coupon_period_days, found, tried_prices
@@ -1,7 +1,125 @@
 import datetime
 import calendar
-import scipy.optimize as optimize
-from typing import Callable
+import numpy as np
+from typing import Callable, Tuple
+
+import financebro.utils._stats as _stats
+
+# Dates are parsed once into integer day serials (proleptic Gregorian ordinals, 1 = 01/01/0001, see datetime.date.toordinal)
+# Every internal computation works on those ints or on int64 arrays of them, 'MM/DD/YYYY' strings only appear at the API boundary
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal() # ordinal of numpy's datetime64 epoch
+
+
+def date_to_ordinal(time: str) -> int:
+    """
+    Parse a date into its day serial
+
+    Args:
+        time (str): Date in format 'MM/DD/YYYY'
+
+    Returns:
+        int: Day serial of the date (see datetime.date.toordinal)
+    """
+    if len(time) == 10 and time[2] == '/' and time[5] == '/':
+        # Fast path, much cheaper than strptime
+        return datetime.date(int(time[6:]), int(time[:2]), int(time[3:5])).toordinal()
+    return datetime.datetime.strptime(time, "%m/%d/%Y").toordinal()
+
+def ordinal_to_date(ordinal: int) -> str:
+    """
+    Format a day serial as a date
+
+    Args:
+        ordinal (int): Day serial of the date (see datetime.date.toordinal)
+
+    Returns:
+        str: Date in format 'MM/DD/YYYY'
+    """
+    return datetime.date.fromordinal(int(ordinal)).strftime("%m/%d/%Y")
+
+def dates_to_ordinals(times) -> np.ndarray:
+    """
+    Parse an array of dates into day serials in one vectorized pass
+
+    Args:
+        times (Iterable[str]): Dates in format 'MM/DD/YYYY'
+
+    Returns:
+        np.ndarray: Day serials of the dates (int64)
+    """
+    times = np.asarray(times, dtype='U10')
+    # Read the characters as code points, 'MM/DD/YYYY' -> digits at fixed positions
+    digits = times.reshape(-1).view(np.uint32).reshape(-1, 10).astype(np.int64) - ord('0')
+    separators = (digits[:, 2] == ord('/') - ord('0')) & (digits[:, 5] == ord('/') - ord('0'))
+    numbers = digits[:, [0, 1, 3, 4, 6, 7, 8, 9]]
+    if not (np.all(separators) and np.all((numbers >= 0) & (numbers <= 9))):
+        # Not zero padded, let the scalar parser deal with it
+        return np.array([date_to_ordinal(time) for time in times.ravel()], dtype=np.int64).reshape(times.shape)
+    months = digits[:, 0]*10 + digits[:, 1]
+    days = digits[:, 3]*10 + digits[:, 4]
+    years = digits[:, 6]*1000 + digits[:, 7]*100 + digits[:, 8]*10 + digits[:, 9]
+    return ymd_to_ordinals(years, months, days).reshape(times.shape)
+
+def ordinals_to_dates(ordinals: np.ndarray) -> np.ndarray:
+    """
+    Format an array of day serials as dates
+
+    Args:
+        ordinals (np.ndarray): Day serials of the dates
+
+    Returns:
+        np.ndarray: Dates in format 'MM/DD/YYYY'
+    """
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    # numpy formats datetime64 as 'YYYY-MM-DD', shuffle the characters into 'MM/DD/YYYY'
+    iso = (ordinals.ravel() - _EPOCH_ORDINAL).astype('datetime64[D]').astype('U10')
+    chars = iso.view('U1').reshape(-1, 10)[:, [5, 6, 4, 8, 9, 7, 0, 1, 2, 3]]
+    chars[:, [2, 5]] = '/'
+    return np.ascontiguousarray(chars).view('U10').reshape(ordinals.shape)
+
+def ordinals_to_ymd(ordinals: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Split day serials into years, months and days
+
+    Args:
+        ordinals (np.ndarray): Day serials of the dates
+
+    Returns:
+        np.ndarray: Years
+        np.ndarray: Months (1-12)
+        np.ndarray: Days of the month (1-31)
+    """
+    days64 = (np.asarray(ordinals, dtype=np.int64) - _EPOCH_ORDINAL).astype('datetime64[D]')
+    months64 = days64.astype('datetime64[M]')
+    years = months64.astype('datetime64[Y]').astype(np.int64) + 1970
+    months = months64.astype(np.int64) % 12 + 1
+    days = (days64 - months64).astype(np.int64) + 1
+    return years, months, days
+
+def ymd_to_ordinals(years: np.ndarray, months: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """
+    Build day serials from years, months and days (days must exist in their month)
+
+    Args:
+        years (np.ndarray): Years
+        months (np.ndarray): Months (1-12)
+        days (np.ndarray): Days of the month (1-31)
+
+    Returns:
+        np.ndarray: Day serials of the dates
+    """
+    months64 = ((np.asarray(years, dtype=np.int64) - 1970) * 12 + np.asarray(months, dtype=np.int64) - 1).astype('datetime64[M]')
+    return months64.astype('datetime64[D]').astype(np.int64) + np.asarray(days, dtype=np.int64) - 1 + _EPOCH_ORDINAL
+
+def _is_end_of_month(ordinals: np.ndarray) -> np.ndarray:
+    days64 = (np.asarray(ordinals, dtype=np.int64) - _EPOCH_ORDINAL).astype('datetime64[D]')
+    return (days64 + 1).astype('datetime64[M]') != days64.astype('datetime64[M]')
+
+_DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+def _days_in_month(years: np.ndarray, months: np.ndarray) -> np.ndarray:
+    leap = (years % 4 == 0) & ((years % 100 != 0) | (years % 400 == 0))
+    return _DAYS_IN_MONTH[months - 1] + ((months == 2) & leap)
 
 
 def day_diff(start_time: str, end_time: str, date_convention: str= 'us_nasd_30_360') -> int:
@@ -19,10 +137,27 @@ def day_diff(start_time: str, end_time: str, date_convention: str= 'us_nasd_30_3
     Returns:
         int: Difference in days between the two dates
     """    
+    return day_diff_ordinal(date_to_ordinal(start_time), date_to_ordinal(end_time), date_convention)
+
+def day_diff_ordinal(start: int, end: int, date_convention: str= 'us_nasd_30_360') -> int:
+    """
+    Compute the difference in days between two day serials
+
+    Args:
+        start (int): Start day serial
+        end (int): End day serial
+        date_convention (str, optional): Calendar convention.  Can be 'us_nasd_30_360' | 'not_retarded'. Defaults to 'us_nasd_30_360'.
+
+    Raises:
+        ValueError: Invalid date convention mode
+
+    Returns:
+        int: Difference in days between the two dates
+    """
     if date_convention == 'not_retarded':
-        diff = day_diff_normal(start_time, end_time)
+        diff = end - start
     elif date_convention == 'us_nasd_30_360':
-        diff = day_diff_us_nasd_30_360(start_time, end_time, excel= True)
+        diff = day_diff_us_nasd_30_360_ordinal(start, end, excel= True)
     else:
         raise ValueError(f"Invalid mode: {date_convention}")
     return diff
@@ -38,12 +173,7 @@ def day_diff_normal(start_time: str, end_time: str) -> int:
     Returns:
         int: Difference in days between the two dates
     """    
-    # Convert string of format MM/DD/YYYY to datetime object
-    start_time = datetime.datetime.strptime(start_time, "%m/%d/%Y")
-    end_time = datetime.datetime.strptime(end_time, "%m/%d/%Y")
-    diff = end_time - start_time
-    days = diff.days
-    return days
+    return date_to_ordinal(end_time) - date_to_ordinal(start_time)
 
 def day_diff_us_nasd_30_360(start_time: str, end_time: str, excel: bool= True) -> int:
     """
@@ -59,10 +189,23 @@ def day_diff_us_nasd_30_360(start_time: str, end_time: str, excel: bool= True) -
     Returns:
         int: Difference in days between the two dates
     """    
+    return day_diff_us_nasd_30_360_ordinal(date_to_ordinal(start_time), date_to_ordinal(end_time), excel)
+
+def day_diff_us_nasd_30_360_ordinal(start: int, end: int, excel: bool= True) -> int:
+    """
+    Same as day_diff_us_nasd_30_360 but on day serials
+
+    Args:
+        start (int): Start day serial
+        end (int): End day serial
+        excel (bool, optional): Use Excel function DAYS360 output. Defaults to True.
+
+    Returns:
+        int: Difference in days between the two dates
+    """
     # https://sqlsunday.com/2014/08/17/30-360-day-count-convention/ 
-    # Convert string of format MM/DD/YYYY to datetime object
-    start_time = datetime.datetime.strptime(start_time, "%m/%d/%Y")
-    end_time = datetime.datetime.strptime(end_time, "%m/%d/%Y")
+    start_time = datetime.date.fromordinal(start)
+    end_time = datetime.date.fromordinal(end)
     start_day = start_time.day
     start_month = start_time.month
     end_day = end_time.day
@@ -81,6 +224,51 @@ def day_diff_us_nasd_30_360(start_time: str, end_time: str, excel: bool= True) -
     days = 360 * (end_time.year - start_time.year) + 30 * (end_month - start_month) + (end_day - start_day)
     return days
 
+def day_diff_array(start: np.ndarray, end: np.ndarray, date_convention: str= 'us_nasd_30_360', excel: bool= True) -> np.ndarray:
+    """
+    Vectorized day_diff over arrays of day serials
+
+    Args:
+        start (np.ndarray): Start day serials
+        end (np.ndarray): End day serials
+        date_convention (str, optional): Calendar convention.  Can be 'us_nasd_30_360' | 'not_retarded'. Defaults to 'us_nasd_30_360'.
+        excel (bool, optional): For 'us_nasd_30_360', use Excel function DAYS360 output. Defaults to True.
+
+    Raises:
+        ValueError: Invalid date convention mode
+
+    Returns:
+        np.ndarray: Difference in days between the dates
+    """
+    if date_convention == 'not_retarded':
+        diff = np.asarray(end, dtype=np.int64) - np.asarray(start, dtype=np.int64)
+    elif date_convention == 'us_nasd_30_360':
+        diff = day_diff_us_nasd_30_360_array(start, end, excel)
+    else:
+        raise ValueError(f"Invalid mode: {date_convention}")
+    return diff
+
+def day_diff_us_nasd_30_360_array(start: np.ndarray, end: np.ndarray, excel: bool= True) -> np.ndarray:
+    """
+    Vectorized day_diff_us_nasd_30_360 over arrays of day serials, with the same Excel and strict variants
+
+    Args:
+        start (np.ndarray): Start day serials
+        end (np.ndarray): End day serials
+        excel (bool, optional): Use Excel function DAYS360 output. Defaults to True.
+
+    Returns:
+        np.ndarray: Difference in days between the dates
+    """
+    start_year, start_month, start_day = ordinals_to_ymd(start)
+    end_year, end_month, end_day = ordinals_to_ymd(end)
+    start_end_of_february = (start_month == 2) & _is_end_of_month(start)
+    if not excel:
+        end_day = np.where(start_end_of_february & _is_end_of_month(end), 30, end_day)
+    start_day = np.where(start_end_of_february | (start_day == 31), 30, start_day)
+    end_day = np.where((end_day == 31) & (start_day == 30), 30, end_day)
+    return 360 * (end_year - start_year) + 30 * (end_month - start_month) + (end_day - start_day)
+
 
 def remove_days(time: str, days: int, date_convention: str= 'us_nasd_30_360') -> str:
     """
@@ -94,10 +282,24 @@ def remove_days(time: str, days: int, date_convention: str= 'us_nasd_30_360') ->
     Returns:
         str: Date in format 'MM/DD/YYYY'
     """    
+    return ordinal_to_date(remove_days_ordinal(date_to_ordinal(time), days, date_convention))
+
+def remove_days_ordinal(ordinal: int, days: int, date_convention: str= 'us_nasd_30_360') -> int:
+    """
+    Remove days from a day serial given a calendar convention
+
+    Args:
+        ordinal (int): Day serial of the date
+        days (int): Number of days to remove
+        date_convention (str, optional): Calendar convention. Can be 'us_nasd_30_360' | 'not_retarded'. Defaults to 'us_nasd_30_360'.
+
+    Returns:
+        int: Day serial of the new date
+    """
     if date_convention == 'not_retarded':
-        new_date = remove_days_normal(time, days)
+        new_date = ordinal - days
     elif date_convention == 'us_nasd_30_360':
-        new_date = remove_days_us_nasd_30_360(time, days)
+        new_date = remove_days_us_nasd_30_360_ordinal(ordinal, days)
     else:
         raise ValueError(f"Invalid mode: {date_convention}")
     return new_date
@@ -113,10 +315,7 @@ def remove_days_normal(time: str, days: int) -> str:
     Returns:
         str: Date in format 'MM/DD/YYYY'
     """    
-    dtime = datetime.datetime.strptime(time, "%m/%d/%Y")
-    dtime = dtime - datetime.timedelta(days= days)
-    dtime = dtime.strftime("%m/%d/%Y")
-    return dtime
+    return ordinal_to_date(date_to_ordinal(time) - days)
 
 def remove_days_us_nasd_30_360(time: str, days: int) -> str:
     """
@@ -129,7 +328,20 @@ def remove_days_us_nasd_30_360(time: str, days: int) -> str:
     Returns:
         str: Date in format 'MM/DD/YYYY'
     """    
-    dtime = datetime.datetime.strptime(time, "%m/%d/%Y")
+    return ordinal_to_date(remove_days_us_nasd_30_360_ordinal(date_to_ordinal(time), days))
+
+def remove_days_us_nasd_30_360_ordinal(ordinal: int, days: int) -> int:
+    """
+    Same as remove_days_us_nasd_30_360 but on day serials
+
+    Args:
+        ordinal (int): Day serial of the date
+        days (int): Number of days to remove
+
+    Returns:
+        int: Day serial of the new date
+    """
+    dtime = datetime.date.fromordinal(ordinal)
 
     num_years = days // 360
     num_months = (days % 360) // 30
@@ -146,9 +358,75 @@ def remove_days_us_nasd_30_360(time: str, days: int) -> str:
         new_year -= 1
     # Edge case for February
     new_day = calendar.monthrange(new_year, new_month)[1] if new_month == 2 and new_day in [29, 30] else new_day
-    dtime = datetime.datetime(new_year, new_month, new_day)
-    dtime = dtime.strftime("%m/%d/%Y")
-    return dtime
+    return datetime.date(new_year, new_month, new_day).toordinal()
+
+def remove_days_array(ordinals: np.ndarray, days: np.ndarray, date_convention: str= 'us_nasd_30_360') -> np.ndarray:
+    """
+    Vectorized remove_days over arrays of day serials
+
+    Args:
+        ordinals (np.ndarray): Day serials of the dates
+        days (np.ndarray): Number of days to remove
+        date_convention (str, optional): Calendar convention. Can be 'us_nasd_30_360' | 'not_retarded'. Defaults to 'us_nasd_30_360'.
+
+    Returns:
+        np.ndarray: Day serials of the new dates
+    """
+    if date_convention == 'not_retarded':
+        new_dates = np.asarray(ordinals, dtype=np.int64) - np.asarray(days, dtype=np.int64)
+    elif date_convention == 'us_nasd_30_360':
+        new_dates = remove_days_us_nasd_30_360_array(ordinals, days)
+    else:
+        raise ValueError(f"Invalid mode: {date_convention}")
+    return new_dates
+
+def remove_days_us_nasd_30_360_array(ordinals: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """
+    Vectorized remove_days_us_nasd_30_360 over arrays of day serials
+
+    Args:
+        ordinals (np.ndarray): Day serials of the dates
+        days (np.ndarray): Number of days to remove
+
+    Returns:
+        np.ndarray: Day serials of the new dates
+    """
+    ordinals, days = np.broadcast_arrays(np.asarray(ordinals, dtype=np.int64), np.asarray(days, dtype=np.int64))
+    return ymd_to_ordinals(*remove_days_us_nasd_30_360_ymd(*ordinals_to_ymd(ordinals), days))
+
+def remove_days_us_nasd_30_360_ymd(year: np.ndarray, month: np.ndarray, day: np.ndarray, days: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Same as remove_days_us_nasd_30_360_array but on (year, month, day) arrays, only integer arithmetic
+    Cheaper when stepping many times (coupon schedules), convert to day serials once at the end.
+
+    Args:
+        year (np.ndarray): Years
+        month (np.ndarray): Months (1-12)
+        day (np.ndarray): Days of the month (1-31)
+        days (np.ndarray): Number of days to remove
+
+    Returns:
+        np.ndarray: Years of the new dates
+        np.ndarray: Months of the new dates
+        np.ndarray: Days of the new dates
+    """
+    num_years = days // 360
+    num_months = (days % 360) // 30
+    num_days = (days % 360) % 30
+    new_year = year - num_years
+    new_month = month - num_months
+    # Edge case for February
+    new_day = np.where(day == _days_in_month(year, month), 30 - num_days, day - num_days)
+    wrap_day = new_day <= 0
+    new_month = np.where(wrap_day, new_month - 1, new_month)
+    new_day = np.where(wrap_day, new_day + 30, new_day)
+    wrap_month = new_month <= 0
+    new_month = np.where(wrap_month, new_month + 12, new_month)
+    new_year = np.where(wrap_month, new_year - 1, new_year)
+    # Edge case for February
+    end_of_february = (new_month == 2) & ((new_day == 29) | (new_day == 30))
+    new_day = np.where(end_of_february, _days_in_month(new_year, new_month), new_day)
+    return new_year, new_month, new_day
 
 def solve_newton(f: Callable, x0: float, tol: float=1e-10, max_iter: int=100):
     """
@@ -163,6 +441,209 @@ def solve_newton(f: Callable, x0: float, tol: float=1e-10, max_iter: int=100):
     Returns:
         _type_: _description_
     """    
-    root = optimize.newton(f, x0, tol=tol, maxiter=max_iter)
+    from scipy import optimize # only needed here, keep it out of the import of the package
+    if not _stats.enabled:
+        return optimize.newton(f, x0, tol=tol, maxiter=max_iter)
+    try:
+        root, result = optimize.newton(f, x0, tol=tol, maxiter=max_iter, full_output=True)
+    except RuntimeError as error:
+        _stats.record_event('solve_newton', 'not converged', x0=x0, error=str(error))
+        raise
+    _stats.record_iterations('solve_newton', result.iterations)
     return root
 
+
+
+def solve_halley_batch(f: Callable, x0: np.ndarray, tol: float=1e-10, max_iter: int=100,
+                       iterations: np.ndarray= None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Solve f(x) = 0 for a whole array of independent equations with the Halley method (Newton with a second order correction)
+    Equations are masked off as soon as they converge so later iterations only evaluate the remaining ones.
+    An equation stops without moving when its residual is already below tol*|f'| (e.g. a warm start on an unchanged
+    quote), and right after a Halley step when the error left by the step is below tol: the error is cubic in the step,
+    about (f''/f')^2 |step|^3 / 12 (checked without the 1/12, as a margin), so a good initial guess is solved with a single
+    evaluation.
+
+    Args:
+        f (function): f(x, index) -> (f, df, d2f) evaluated at x for the equations in index (an array of positions)
+        x0 (np.ndarray): Initial guesses
+        tol (float, optional): Convergence tolerance on x. Defaults to 1e-10.
+        max_iter (int, optional): Maximum iterations, for the YTM computation, Excel uses 100. Defaults to 100.
+        iterations (np.ndarray, optional): Integer array the size of x0, incremented in place with the number of steps taken
+            by each equation (0 when x0 is already a root). Defaults to None.
+
+    Returns:
+        np.ndarray: The roots, NaN where the method did not converge
+        np.ndarray: Boolean mask of the equations that converged
+    """
+    x = np.array(x0, dtype=float, copy=True)
+    converged = np.zeros(x.shape, dtype=bool)
+    active = np.arange(x.size)
+    # Above it the cubic error estimate is not trusted, the third derivative could matter
+    max_predicted_step = np.cbrt(tol)
+    iteration = 0
+    for iteration in range(1, max_iter + 1):
+        if active.size == 0:
+            iteration -= 1
+            break
+        fx, dfx, d2fx = f(x[active], active)
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            solved = np.abs(fx) < tol*np.abs(dfx)
+            newton_step = fx / dfx
+            halley_step = 2*fx*dfx / (2*dfx**2 - fx*d2fx)
+            step = np.where(solved, 0, np.where(np.isfinite(halley_step), halley_step, newton_step))
+            size = np.abs(step)
+            done = solved | (size < tol) | ((size < max_predicted_step) & ((d2fx/dfx)**2 * (size*size*size) < tol))
+        if iterations is not None:
+            iterations[active[~solved]] += 1
+        x[active] -= step
+        lost = ~np.isfinite(x[active])
+        converged[active[done & ~lost]] = True
+        active = active[~(done | lost)]
+    x[~converged] = np.nan
+    if _stats.enabled:
+        _stats.record_iterations('solve_halley_batch', iteration, x.size)
+        if not np.all(converged):
+            _stats.record_event('solve_halley_batch', 'not converged', count=int(np.sum(~converged)), equations=x.size)
+    return x, converged
+
+def solve_secant_batch(f: Callable, x0: np.ndarray, x1: np.ndarray, f0: np.ndarray= None, tol: float=1e-10, max_iter: int=100,
+                       iterations: np.ndarray= None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Solve f(x) = 0 for a whole array of independent equations with the secant method, when the derivative is costly or inexact
+    (e.g. Monte Carlo values). Equations are masked off as soon as they converge.
+
+    Args:
+        f (function): f(x, index) -> f evaluated at x for the equations in index (an array of positions)
+        x0 (np.ndarray): First points
+        x1 (np.ndarray): Second points, e.g. a Newton step from x0
+        f0 (np.ndarray, optional): f at x0 if it is already known. Defaults to evaluating it.
+        tol (float, optional): Convergence tolerance on the step size. Defaults to 1e-10.
+        max_iter (int, optional): Maximum iterations. Defaults to 100.
+        iterations (np.ndarray, optional): Integer array the size of x0, incremented in place with the number of iterations of
+            each equation. Defaults to None.
+
+    Returns:
+        np.ndarray: The roots, NaN where the method did not converge
+        np.ndarray: Boolean mask of the equations that converged
+    """
+    x_previous = np.array(x0, dtype=float, copy=True)
+    x = np.array(x1, dtype=float, copy=True)
+    f_previous = f(x_previous, np.arange(x.size)) if f0 is None else np.array(f0, dtype=float, copy=True)
+    converged = np.zeros(x.shape, dtype=bool)
+    active = np.arange(x.size)
+    iteration = 0
+    for iteration in range(1, max_iter + 1):
+        if active.size == 0:
+            iteration -= 1
+            break
+        if iterations is not None:
+            iterations[active] += 1
+        fx = f(x[active], active)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = np.where(fx == 0, 0, fx * (x[active] - x_previous[active]) / (fx - f_previous[active]))
+        x_previous[active] = x[active]
+        f_previous[active] = fx
+        x[active] -= step
+        done = np.abs(step) < tol
+        lost = ~np.isfinite(x[active])
+        converged[active[done & ~lost]] = True
+        active = active[~(done | lost)]
+    x[~converged] = np.nan
+    if _stats.enabled:
+        _stats.record_iterations('solve_secant_batch', iteration, x.size)
+        if not np.all(converged):
+            _stats.record_event('solve_secant_batch', 'not converged', count=int(np.sum(~converged)), equations=x.size)
+    return x, converged
+
+def solve_bisection_batch(f: Callable, lower: np.ndarray, upper: np.ndarray, tol: float=1e-10, max_iter: int=200) -> np.ndarray:
+    """
+    Solve f(x) = 0 for a whole array of independent equations by bisection, used as a fallback when Halley does not converge
+
+    Args:
+        f (function): f(x, index) -> f evaluated at x for the equations in index (an array of positions)
+        lower (np.ndarray): Lower ends of the brackets
+        upper (np.ndarray): Upper ends of the brackets
+        tol (float, optional): Width of the bracket at which we stop. Defaults to 1e-10.
+        max_iter (int, optional): Maximum iterations. Defaults to 200.
+
+    Returns:
+        np.ndarray: The roots, NaN where f does not change sign over the bracket
+    """
+    index = np.arange(np.size(lower))
+    lower = np.array(lower, dtype=float, copy=True)
+    upper = np.array(upper, dtype=float, copy=True)
+    f_lower = f(lower, index)
+    f_upper = f(upper, index)
+    valid = np.sign(f_lower) * np.sign(f_upper) <= 0
+    iterations = 0
+    for iterations in range(max_iter):
+        if np.all(upper - lower < tol):
+            break
+        middle = (lower + upper) / 2
+        f_middle = f(middle, index)
+        go_left = np.sign(f_middle) == np.sign(f_lower)
+        lower = np.where(go_left, middle, lower)
+        f_lower = np.where(go_left, f_middle, f_lower)
+        upper = np.where(go_left, upper, middle)
+    root = (lower + upper) / 2
+    root[~valid] = np.nan
+    if _stats.enabled:
+        _stats.record_iterations('solve_bisection_batch', iterations, root.size)
+        if not np.all(valid):
+            _stats.record_event('solve_bisection_batch', 'no sign change', count=int(np.sum(~valid)), equations=root.size)
+    return root
+
+def get_chebyshev_nodes(degree: int) -> np.ndarray:
+    """
+    Chebyshev points of the first kind on [-1, 1], where an interpolant of the given degree is sampled
+
+    Args:
+        degree (int): Degree of the interpolant
+
+    Returns:
+        np.ndarray: The degree + 1 nodes, in decreasing order
+    """
+    return np.cos(np.pi * (np.arange(degree + 1) + 0.5) / (degree + 1))
+
+def fit_chebyshev_batch(values: np.ndarray) -> np.ndarray:
+    """
+    Chebyshev coefficients of many interpolants at once, from their values at get_chebyshev_nodes(degree)
+
+    Args:
+        values (np.ndarray): (functions, degree + 1) values of each function at the nodes of its interval
+
+    Returns:
+        np.ndarray: (functions, degree + 1) coefficients, lowest degree first
+    """
+    values = np.asarray(values, dtype=float)
+    size = values.shape[-1]
+    angles = np.pi * (np.arange(size) + 0.5) / size
+    coefficients = 2/size * values @ np.cos(np.outer(angles, np.arange(size)))
+    coefficients[..., 0] /= 2
+    return coefficients
+
+def evaluate_chebyshev_batch(coefficients: np.ndarray, lower: np.ndarray, upper: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """
+    Evaluate many Chebyshev interpolants at once with the Clenshaw recurrence, one point per interpolant
+
+    Args:
+        coefficients (np.ndarray): (functions, degree + 1) coefficients from fit_chebyshev_batch, faster in Fortran order
+        lower (np.ndarray): Lower ends of the intervals of the functions
+        upper (np.ndarray): Upper ends of the intervals of the functions
+        x (np.ndarray): Points where to evaluate each function, in its interval
+
+    Returns:
+        np.ndarray: The values of the interpolants
+    """
+    t2 = 2 * (2*np.asarray(x, dtype=float) - lower - upper) / (upper - lower)
+    b1 = np.zeros(t2.shape)
+    b2 = np.zeros(t2.shape)
+    b0 = np.empty(t2.shape)
+    # In place, b0 = 2t b1 - b2 + c_j
+    for j in range(coefficients.shape[-1] - 1, 0, -1):
+        np.multiply(t2, b1, out=b0)
+        b0 -= b2
+        b0 += coefficients[..., j]
+        b0, b1, b2 = b2, b0, b1
+    return t2/2*b1 - b2 + coefficients[..., 0]
@@ -0,0 +1,98 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+from financebro.assets.fixed_income.bond_book import BondBook
+
+# Analytics the workers can compute, name -> method of the sub-book
+PARALLEL_ANALYTICS = {'price_percent': BondBook.compute_price,
+                      'ytm_percent': BondBook.compute_ytm_percent,
+                      'apy': BondBook.compute_apy}
+
+# Arrays of the current worker process, attached once by _init_worker
+_worker_columns = None
+_worker_outputs = None
+_worker_handles = None
+
+
+def _share(arrays: Dict[str, np.ndarray]) -> Tuple[Dict[str, Tuple[str, str, Tuple[int, ...]]], Dict[str, shared_memory.SharedMemory]]:
+    # Copy the arrays in shared memory blocks, the spec (name, dtype, shape) is all a worker needs to attach
+    spec, handles = {}, {}
+    for key, values in arrays.items():
+        handles[key] = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        np.ndarray(values.shape, values.dtype, buffer=handles[key].buf)[...] = values
+        spec[key] = (handles[key].name, values.dtype.str, values.shape)
+    return spec, handles
+
+def _attach(spec: Dict[str, Tuple[str, str, Tuple[int, ...]]]) -> Tuple[Dict[str, np.ndarray], list]:
+    arrays, handles = {}, []
+    for key, (name, dtype, shape) in spec.items():
+        handle = shared_memory.SharedMemory(name=name)
+        handles.append(handle)
+        arrays[key] = np.ndarray(shape, dtype, buffer=handle.buf)
+    return arrays, handles
+
+def _init_worker(column_spec: dict, output_spec: dict):
+    global _worker_columns, _worker_outputs, _worker_handles
+    _worker_columns, column_handles = _attach(column_spec)
+    _worker_outputs, output_handles = _attach(output_spec)
+    _worker_handles = column_handles + output_handles
+
+def _evaluate_shard(start: int, stop: int, date_convention: str):
+    # Zero-copy sub-book over the shared columns, results are written in place so nothing is pickled back
+    book = BondBook._from_columns({field: _worker_columns.get(field) for field in BondBook.FIELDS}, date_convention)[start:stop]
+    for name, outputs in _worker_outputs.items():
+        outputs[start:stop] = PARALLEL_ANALYTICS[name](book)
+
+
+def evaluate_book_parallel(book: BondBook,
+                           analytics: Iterable[str]= ('price_percent', 'ytm_percent', 'apy'),
+                           max_workers: int= None,
+                           chunk_size: int= 50000
+                           ) -> Dict[str, np.ndarray]:
+    """
+    Evaluate the analytics of a book on several cores
+    The book is split in shards of chunk_size bonds evaluated by a process pool. The columns are passed to the workers
+    through shared memory (no pickled Bond objects) and each worker writes its results in place, so the merged results
+    keep the order of the book.
+
+    Args:
+        book (BondBook): The book to evaluate, it needs its dates for 'apy'
+        analytics (Iterable[str], optional): Analytics to compute, keys of PARALLEL_ANALYTICS. Defaults to ('price_percent', 'ytm_percent', 'apy').
+        max_workers (int, optional): Number of worker processes. Defaults to the number of cores.
+        chunk_size (int, optional): Number of bonds per shard. Defaults to 50000.
+
+    Returns:
+        Dict[str, np.ndarray]: Analytic name -> values, same as calling the BondBook methods on the whole book
+    """
+    analytics = list(analytics)
+    unknown = [name for name in analytics if name not in PARALLEL_ANALYTICS]
+    if unknown:
+        raise ValueError(f"Analytics implemented : {list(PARALLEL_ANALYTICS)} but got {unknown}")
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    size = len(book)
+    shards = [(start, min(start + chunk_size, size)) for start in range(0, size, chunk_size)]
+
+    # Not worth starting processes for a single shard
+    if max_workers <= 1 or len(shards) <= 1:
+        return {name: PARALLEL_ANALYTICS[name](book) for name in analytics}
+
+    columns = {field: np.ascontiguousarray(getattr(book, field)) for field in BondBook.FIELDS if getattr(book, field) is not None}
+    column_spec, column_handles = _share(columns)
+    output_spec, output_handles = _share({name: np.full(size, np.nan) for name in analytics})
+    try:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(shards)),
+                                 initializer=_init_worker,
+                                 initargs=(column_spec, output_spec)) as executor:
+            for future in [executor.submit(_evaluate_shard, start, stop, book.date_convention) for start, stop in shards]:
+                future.result()
+        # Copied out, a block can't be closed while an array still points to it
+        return {name: np.ndarray((size,), float, buffer=output_handles[name].buf).copy() for name in analytics}
+    finally:
+        for handle in [*column_handles.values(), *output_handles.values()]:
+            handle.close()
+            handle.unlink()
@@ -0,0 +1,150 @@
+from datetime import date
+from typing import Callable, Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+import financebro.utils._math as _math
+import financebro.utils._bond as _bond
+from financebro.assets.fixed_income.bond_book import BondBook
+
+
+# Columns of the Fidelity bond search export that we use, everything is read as text and normalized afterwards
+FIDELITY_COLUMNS = ('Cusip', 'Price Ask', 'Ask Yield to Maturity', 'Ask Yield to Worst', 'Coupon', 'Maturity Date', 'Next Call Date')
+FIDELITY_REQUIRED_COLUMNS = ('Cusip', 'Price Ask', 'Ask Yield to Maturity', 'Coupon', 'Maturity Date')
+
+
+def read_fidelity_data(path: str,
+                       settlement_date: str= None,
+                       chunksize: int= 10000,
+                       date_convention: str= 'us_nasd_30_360',
+                       rejects: Callable[[pd.DataFrame], None]= None
+                       ) -> Iterator[Tuple[BondBook, BondBook]]:
+    """
+    Stream a Fidelity bond inventory file chunk by chunk, only one chunk is in memory at a time
+    Columns are normalized in a vectorized way, the coupon period (not in the export) is inferred in batch.
+    Callable bonds (with a 'Next Call Date') are split out and considered called on their next call date, the only one in the export
+    (use CallableBond for a full call schedule).
+
+    Args:
+        path (str): Path of the Fidelity CSV export
+        settlement_date (str, optional): Settlement date in format 'MM/DD/YYYY'. Defaults to today.
+        chunksize (int, optional): Number of rows read at a time. Defaults to 10000.
+        date_convention (str, optional): Date convention of the bonds. Can be 'us_nasd_30_360' | 'not_retarded'. Defaults to 'us_nasd_30_360'.
+        rejects (Callable[[pd.DataFrame], None], optional): Called with the malformed rows of each chunk (raw text plus a 'Reject Reason' column). Defaults to None, rejected rows are dropped.
+
+    Yields:
+        BondBook: The non callable bonds of the chunk
+        BondBook: The callable bonds of the chunk, priced to their next call date
+    """
+    if settlement_date is None:
+        settlement_date = date.today().strftime("%m/%d/%Y")
+    settlement = _math.date_to_ordinal(settlement_date)
+    header = pd.read_csv(path, nrows=0).columns
+    missing = [column for column in FIDELITY_REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise ValueError(f"Not a Fidelity bond export, missing columns {missing}")
+    usecols = [column for column in FIDELITY_COLUMNS if column in header]
+    for chunk in pd.read_csv(path, usecols=usecols, dtype={column: str for column in usecols},
+                             chunksize=chunksize, skip_blank_lines=True):
+        books, rejected = preprocess_fidelity_chunk(chunk, settlement, date_convention)
+        if rejects is not None and len(rejected):
+            rejects(rejected)
+        yield books
+
+
+def preprocess_fidelity_chunk(chunk: pd.DataFrame, settlement: int, date_convention: str= 'us_nasd_30_360') -> Tuple[Tuple[BondBook, BondBook], pd.DataFrame]:
+    """
+    Normalize one chunk of a Fidelity export into books
+
+    Args:
+        chunk (pd.DataFrame): Raw rows of the export, read as text
+        settlement (int): Day serial of the settlement date
+        date_convention (str, optional): Date convention of the bonds. Can be 'us_nasd_30_360' | 'not_retarded'. Defaults to 'us_nasd_30_360'.
+
+    Returns:
+        Tuple[BondBook, BondBook]: The non callable and the callable bonds of the chunk
+        pd.DataFrame: The rejected rows with a 'Reject Reason' column
+    """
+    # Fidelity wraps the CUSIP as ="037833100" so Excel keeps the leading zeros
+    cusips = chunk['Cusip'].str.strip().str.replace(r'^="?|"$', '', regex=True).str.upper()
+    to_number = lambda column: pd.to_numeric(chunk[column].str.replace(r'[%$,\s]', '', regex=True), errors='coerce').to_numpy(dtype=float)
+    to_ordinal = lambda column: _series_to_ordinals(chunk[column])
+    price_percent = to_number('Price Ask')
+    ytm_percent = to_number('Ask Yield to Maturity')
+    annual_coupon_rate_percent = to_number('Coupon')
+    maturity = to_ordinal('Maturity Date')
+    if 'Next Call Date' in chunk:
+        call = to_ordinal('Next Call Date')
+    else:
+        call = np.full(len(chunk), -1, dtype=np.int64)
+    is_callable = (call > settlement) & (call < maturity)
+    if 'Ask Yield to Worst' in chunk:
+        ytw_percent = to_number('Ask Yield to Worst')
+        ytm_percent = np.where(is_callable & ~np.isnan(ytw_percent), ytw_percent, ytm_percent)
+    maturity = np.where(is_callable, call, maturity)
+
+    reasons = np.full(len(chunk), '', dtype=object)
+    well_formed = cusips.str.fullmatch(r'[0-9A-Z*@#]{9}', na=False).to_numpy()
+    for bad, reason in ((~well_formed, 'invalid Cusip'),
+                        (~_bond.validate_cusip_array(cusips.fillna('').to_numpy(dtype=str)), 'invalid Cusip check digit'),
+                        (np.isnan(price_percent), 'invalid Price Ask'),
+                        (np.isnan(ytm_percent), 'invalid Ask Yield to Maturity'),
+                        (np.isnan(annual_coupon_rate_percent), 'invalid Coupon'),
+                        (maturity < 0, 'invalid Maturity Date'),
+                        ((maturity >= 0) & (maturity <= settlement), 'matured')):
+        reasons = np.where(bad & (reasons == ''), reason, reasons)
+    valid = reasons == ''
+
+    coupon_period_days, found, _ = _bond.infer_coupon_period_days_batch(price_percent[valid], ytm_percent[valid],
+                                                                        annual_coupon_rate_percent[valid]/100, 100,
+                                                                        settlement, maturity[valid], date_convention)
+    reasons[np.flatnonzero(valid)[~found]] = 'could not infer the coupon period'
+    keep = np.flatnonzero(valid)[found]
+    coupon_period_days = coupon_period_days[found]
+
+    books = tuple(BondBook.from_dates(cusips.to_numpy()[keep[mask]],
+                                      price_percent[keep[mask]],
+                                      ytm_percent[keep[mask]],
+                                      annual_coupon_rate_percent[keep[mask]]/100,
+                                      maturity[keep[mask]],
+                                      settlement,
+                                      coupon_period_days[mask],
+                                      date_convention=date_convention)
+                  for mask in (~is_callable[keep], is_callable[keep]))
+    rejected = chunk[reasons != ''].assign(**{'Reject Reason': reasons[reasons != '']})
+    return books, rejected
+
+
+def preprocess_fidelity_data(path: str,
+                             settlement_date: str= None,
+                             chunksize: int= 10000,
+                             date_convention: str= 'us_nasd_30_360',
+                             rejects: Callable[[pd.DataFrame], None]= None
+                             ) -> Tuple[BondBook, BondBook]:
+    """
+    Load a whole Fidelity bond inventory, see read_fidelity_data
+
+    Args:
+        path (str): Path of the Fidelity CSV export
+        settlement_date (str, optional): Settlement date in format 'MM/DD/YYYY'. Defaults to today.
+        chunksize (int, optional): Number of rows read at a time. Defaults to 10000.
+        date_convention (str, optional): Date convention of the bonds. Can be 'us_nasd_30_360' | 'not_retarded'. Defaults to 'us_nasd_30_360'.
+        rejects (Callable[[pd.DataFrame], None], optional): Called with the malformed rows of each chunk. Defaults to None.
+
+    Returns:
+        BondBook: The non callable bonds
+        BondBook: The callable bonds, priced to their next call date
+    """
+    bonds, callable_bonds = [], []
+    for book, callable_book in read_fidelity_data(path, settlement_date, chunksize, date_convention, rejects):
+        bonds.append(book)
+        callable_bonds.append(callable_book)
+    return BondBook.concatenate(bonds), BondBook.concatenate(callable_bonds)
+
+
+def _series_to_ordinals(dates: pd.Series) -> np.ndarray:
+    # 'MM/DD/YYYY' text to day serials, -1 for missing or malformed dates
+    parsed = pd.to_datetime(dates.str.strip(), format="%m/%d/%Y", errors='coerce')
+    days = parsed.to_numpy(dtype='datetime64[D]').astype(np.int64) + _math._EPOCH_ORDINAL
+    return np.where(parsed.isna().to_numpy(), -1, days)
@@ -0,0 +1,239 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+import financebro.utils._bond as _bond
+
+
+class MarketWatchSource:
+    """
+    HTTP source of ticker <-> CUSIP mappings scraping the marketwatch profile pages, with one pooled session reused by every request
+    Any object with the same fetch_cusip / fetch_ticker methods can replace it in IdentifierResolver (e.g. a local stub server for tests).
+
+    Args:
+        base_url (str, optional): Root of the website, point it to a stub server to test. Defaults to 'https://www.marketwatch.com'.
+        pool_size (int, optional): Number of pooled connections, should match the number of workers. Defaults to 8.
+        timeout (float, optional): Timeout of each request in seconds. Defaults to 10.
+    """
+    def __init__(self, base_url: str= 'https://www.marketwatch.com', pool_size: int= 8, timeout: float= 10):
+        import requests
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _fetch_span(self, identifier: str, span_class: str) -> str:
+        from bs4 import BeautifulSoup
+        url = f'{self.base_url}/investing/stock/{identifier}/profile'
+        resp = self.session.get(url, timeout=self.timeout)
+        if not resp.ok:
+            raise ValueError(f"Failed to get {span_class} from {url}")
+        span = BeautifulSoup(resp.text, 'html.parser').find('span', {'class': span_class})
+        if span is None:
+            raise ValueError(f"No {span_class} in {url}")
+        return span.text.strip()
+
+    def fetch_cusip(self, ticker: str) -> str:
+        return self._fetch_span(ticker, 'ticker__cusip')
+
+    def fetch_ticker(self, cusip: str) -> str:
+        return self._fetch_span(cusip, 'company__ticker')
+
+
+class _RateLimiter:
+    # Token bucket shared by the worker threads
+    def __init__(self, rate_per_second: float, burst: int= 1):
+        self.interval = 1 / rate_per_second
+        self.burst = burst
+        self.tokens = burst
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.last) / self.interval)
+                self.last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                sleep = (1 - self.tokens) * self.interval
+            time.sleep(sleep)
+
+
+class IdentifierResolver:
+    """
+    Resolve tickers, CUSIPs and ISINs with a persistent on-disk cache
+    Only ticker <-> CUSIP needs the network, ISINs are derived locally from the CUSIP (see get_isin_from_cusip).
+    Lists of identifiers are resolved concurrently under a global rate limit, failures are reported as None instead of raising.
+
+    Args:
+        cache_path (str, optional): JSON file of the cache, None to keep it in memory only. Defaults to None.
+        ttl_seconds (float, optional): Time to live of a cached mapping. Defaults to 7 days.
+        source (object, optional): Object with fetch_cusip(ticker) and fetch_ticker(cusip). Defaults to MarketWatchSource().
+        max_workers (int, optional): Number of concurrent requests. Defaults to 8.
+        rate_per_second (float, optional): Maximum number of requests per second. Defaults to 5.
+    """
+    def __init__(self,
+                 cache_path: str= None,
+                 ttl_seconds: float= 7*24*3600,
+                 source= None,
+                 max_workers: int= 8,
+                 rate_per_second: float= 5
+                 ):
+        self.cache_path = cache_path
+        self.ttl_seconds = ttl_seconds
+        self.source = source if source is not None else MarketWatchSource(pool_size=max_workers)
+        self.max_workers = max_workers
+        self.rate_limiter = _RateLimiter(rate_per_second, burst=max_workers)
+        self.lock = threading.Lock()
+        self.cache = {'ticker_to_cusip': {}, 'cusip_to_ticker': {}} # key -> [value, timestamp]
+        self._dirty = False # something was fetched since the last flush
+        if cache_path is not None and os.path.exists(cache_path):
+            with open(cache_path) as f:
+                self.cache.update(json.load(f))
+
+    def _get_cached(self, table: str, key: str) -> Optional[str]:
+        with self.lock:
+            entry = self.cache[table].get(key)
+        if entry is not None and time.time() - entry[1] < self.ttl_seconds:
+            return entry[0]
+        return None
+
+    def _set_cached(self, table: str, key: str, value: str):
+        now = time.time()
+        with self.lock:
+            self.cache[table][key] = [value, now]
+            # Fill the reverse mapping too, one request serves both directions
+            reverse, reverse_key = ('cusip_to_ticker', value) if table == 'ticker_to_cusip' else ('ticker_to_cusip', value)
+            self.cache[reverse][reverse_key] = [key, now]
+            self._dirty = True
+
+    def flush(self):
+        """
+        Write the cache to cache_path, atomically so a crash never leaves a corrupted cache
+        Nothing is written when nothing was fetched since the last flush, so flushing after a cache hit is free.
+        """
+        if self.cache_path is None or not self._dirty:
+            return
+        with self.lock:
+            content = json.dumps(self.cache)
+            self._dirty = False
+        try:
+            directory = os.path.dirname(os.path.abspath(self.cache_path))
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                f.write(content)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            self._dirty = True # try again on the next flush
+            raise
+
+    def _resolve(self, table: str, key: str, fetch) -> str:
+        value = self._get_cached(table, key)
+        if value is None:
+            self.rate_limiter.wait()
+            value = fetch(key)
+            self._set_cached(table, key, value)
+        return value
+
+    def get_cusip_from_ticker(self, ticker_str: str) -> str:
+        """
+        >>> get_cusip_from_ticker('AAPL')
+        '037833100'
+        """
+        return self._resolve('ticker_to_cusip', ticker_str.upper(), self.source.fetch_cusip)
+
+    def get_ticker_from_cusip(self, cusip_str: str) -> str:
+        """
+        >>> get_ticker_from_cusip('037833100')
+        'AAPL'
+        """
+        return self._resolve('cusip_to_ticker', cusip_str.upper(), self.source.fetch_ticker)
+
+    def get_isin_from_ticker(self, ticker_str: str, country_code: str) -> str:
+        """
+        >>> get_isin_from_ticker('AAPL', 'US')
+        'US0378331005'
+        """
+        return _bond.get_isin_from_cusip(self.get_cusip_from_ticker(ticker_str), country_code)
+
+    def get_ticker_from_isin(self, isin_str: str) -> str:
+        """
+        >>> get_ticker_from_isin('US0378331005')
+        'AAPL'
+        """
+        return self.get_ticker_from_cusip(_bond.get_cusip_from_isin(isin_str))
+
+    def _resolve_many(self, resolve, identifiers: Iterable[str]) -> Dict[str, Optional[str]]:
+        def safe_resolve(identifier):
+            try:
+                return resolve(identifier)
+            except Exception:
+                return None
+        identifiers = list(dict.fromkeys(identifiers)) # unique, in order
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            resolved = dict(zip(identifiers, executor.map(safe_resolve, identifiers)))
+        self.flush()
+        return resolved
+
+    def get_cusips_from_tickers(self, tickers: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Resolve many tickers concurrently
+
+        Args:
+            tickers (Iterable[str]): Tickers to resolve
+
+        Returns:
+            Dict[str, Optional[str]]: Ticker -> CUSIP, None when it could not be resolved
+        """
+        return self._resolve_many(self.get_cusip_from_ticker, tickers)
+
+    def get_tickers_from_cusips(self, cusips: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Resolve many CUSIPs concurrently
+
+        Args:
+            cusips (Iterable[str]): CUSIPs to resolve
+
+        Returns:
+            Dict[str, Optional[str]]: CUSIP -> ticker, None when it could not be resolved
+        """
+        return self._resolve_many(self.get_ticker_from_cusip, cusips)
+
+    def get_tickers_from_isins(self, isins: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Resolve many ISINs concurrently
+
+        Args:
+            isins (Iterable[str]): ISINs to resolve
+
+        Returns:
+            Dict[str, Optional[str]]: ISIN -> ticker, None when it could not be resolved
+        """
+        return self._resolve_many(self.get_ticker_from_isin, isins)
+
+
+_default_resolver = None
+
+def get_default_resolver() -> IdentifierResolver:
+    """
+    Resolver used by the get_*_from_ticker / get_ticker_from_* helpers of _bond, created on first use
+    Its cache lives in $FINANCEBRO_CACHE_DIR (defaults to ~/.cache/financebro).
+
+    Returns:
+        IdentifierResolver: The shared resolver
+    """
+    global _default_resolver
+    if _default_resolver is None:
+        cache_dir = os.environ.get('FINANCEBRO_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'financebro'))
+        _default_resolver = IdentifierResolver(os.path.join(cache_dir, 'identifiers.json'))
+    return _default_resolver
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+from datetime import date
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+import financebro.utils._math as _math
+from financebro.assets.fixed_income.bond_book import BondBook
+
+# Bump when the layout of the snapshot changes, older snapshots are then rebuilt
+SNAPSHOT_VERSION = 1
+# Solved analytics stored next to the book columns
+SNAPSHOT_ANALYTICS = ('solved_price_percent', 'solved_ytm_percent', 'apy')
+
+
+def hash_file(path: str, chunk_size: int= 1 << 20) -> str:
+    """
+    Content hash of a file, read in chunks so large inventories are never fully in memory
+
+    Args:
+        path (str): Path of the file
+        chunk_size (int, optional): Number of bytes read at a time. Defaults to 1MB.
+
+    Returns:
+        str: sha256 hex digest of the content
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_book_snapshot(book: BondBook, directory: str, analytics: Dict[str, np.ndarray]= None):
+    """
+    Save a book in a columnar on-disk format, one raw .npy file per column so it can be reopened memory-mapped
+    Coupon schedules are stored as offsets plus a flat array of day serials (see BondBook.get_coupon_schedules).
+
+    Args:
+        book (BondBook): The book to save, it needs its dates
+        directory (str): Directory of the snapshot, created if needed
+        analytics (Dict[str, np.ndarray], optional): Solved analytics to store next to the book. Defaults to SNAPSHOT_ANALYTICS computed from the book.
+    """
+    if analytics is None:
+        analytics = compute_snapshot_analytics(book)
+    os.makedirs(directory, exist_ok=True)
+    columns = {field: getattr(book, field) for field in BondBook.FIELDS if getattr(book, field) is not None}
+    columns['coupon_offsets'], columns['coupon_ordinals'] = book.get_coupon_schedules()
+    columns.update(analytics)
+    for name, values in columns.items():
+        np.save(os.path.join(directory, f'{name}.npy'), np.ascontiguousarray(values), allow_pickle=False)
+    # Written last, a snapshot without meta.json is incomplete
+    with open(os.path.join(directory, 'meta.json'), 'w') as f:
+        json.dump({'version': SNAPSHOT_VERSION, 'date_convention': book.date_convention, 'size': len(book),
+                   'columns': sorted(columns)}, f)
+
+
+def load_book_snapshot(directory: str, mmap: bool= True) -> Tuple[BondBook, Dict[str, np.ndarray]]:
+    """
+    Reopen a book saved with save_book_snapshot
+    Memory-mapped columns are read-only and shared between processes through the page cache, startup does not read the data.
+
+    Args:
+        directory (str): Directory of the snapshot
+        mmap (bool, optional): Memory-map the columns instead of reading them. Defaults to True.
+
+    Raises:
+        ValueError: Incomplete snapshot or snapshot of another version
+
+    Returns:
+        BondBook: The book
+        Dict[str, np.ndarray]: The other stored arrays, the solved analytics and the coupon schedules ('coupon_offsets', 'coupon_ordinals')
+    """
+    meta_path = os.path.join(directory, 'meta.json')
+    if not os.path.exists(meta_path):
+        raise ValueError(f"No complete snapshot in {directory}")
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if meta['version'] != SNAPSHOT_VERSION:
+        raise ValueError(f"Snapshot version {meta['version']} but expected {SNAPSHOT_VERSION}")
+    columns = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r' if mmap else None, allow_pickle=False)
+               for name in meta['columns']}
+    book = BondBook._from_columns({field: columns.pop(field, None) for field in BondBook.FIELDS}, meta['date_convention'])
+    return book, columns
+
+
+def compute_snapshot_analytics(book: BondBook) -> Dict[str, np.ndarray]:
+    """
+    Solve the analytics stored in a snapshot
+
+    Args:
+        book (BondBook): The book
+
+    Returns:
+        Dict[str, np.ndarray]: The analytics, see SNAPSHOT_ANALYTICS
+    """
+    return {'solved_price_percent': book.compute_price(),
+            'solved_ytm_percent': book.compute_ytm_percent(),
+            'apy': book.compute_apy()}
+
+
+def load_or_build_fidelity_snapshot(path: str,
+                                    snapshot_directory: str,
+                                    settlement_date: str= None,
+                                    date_convention: str= 'us_nasd_30_360',
+                                    mmap: bool= True,
+                                    build: Callable= None
+                                    ) -> Tuple[Tuple[BondBook, Dict[str, np.ndarray]], Tuple[BondBook, Dict[str, np.ndarray]]]:
+    """
+    Open the snapshot of a Fidelity inventory, building it first if the file changed since the last snapshot
+    Snapshots are keyed by the content hash of the file, the date convention and SNAPSHOT_VERSION, stale snapshots of the
+    same file are deleted. The settlement date is not part of the key: a snapshot built for an earlier settlement is rolled
+    forward on load (BondBook.roll_forward), the bonds matured in between are dropped like at build time and the coupon
+    schedules and the analytics are solved again. A settlement before the one of the snapshot rebuilds it. The rest of
+    the build (callable or not, inferred coupon periods) is kept from the settlement it was built for.
+
+    Args:
+        path (str): Path of the Fidelity CSV export
+        snapshot_directory (str): Directory holding the snapshots
+        settlement_date (str, optional): Settlement date in format 'MM/DD/YYYY'. Defaults to today.
+        date_convention (str, optional): Date convention of the bonds. Can be 'us_nasd_30_360' | 'not_retarded'. Defaults to 'us_nasd_30_360'.
+        mmap (bool, optional): Memory-map the columns instead of reading them. Defaults to True.
+        build (Callable, optional): build(path, settlement_date, date_convention) -> (bonds, callable_bonds). Defaults to preprocess_fidelity_data.
+
+    Returns:
+        Tuple[BondBook, Dict[str, np.ndarray]]: The non callable bonds and their analytics, see load_book_snapshot
+        Tuple[BondBook, Dict[str, np.ndarray]]: The callable bonds and their analytics, see load_book_snapshot
+    """
+    if settlement_date is None:
+        settlement_date = date.today().strftime("%m/%d/%Y")
+    if build is None:
+        from financebro.utils._preprocess import preprocess_fidelity_data
+        build = lambda path, settlement_date, date_convention: preprocess_fidelity_data(path, settlement_date, date_convention=date_convention)
+    name = os.path.splitext(os.path.basename(path))[0]
+    key = hashlib.sha256(f'{hash_file(path)}|{date_convention}|{SNAPSHOT_VERSION}'.encode()).hexdigest()[:16]
+    directory = os.path.join(snapshot_directory, f'{name}-{key}')
+    parts = ('bonds', 'callable_bonds')
+    settlement = _math.date_to_ordinal(settlement_date)
+
+    snapshots = None
+    if all(os.path.exists(os.path.join(directory, part, 'meta.json')) for part in parts):
+        snapshots = tuple(load_book_snapshot(os.path.join(directory, part), mmap) for part in parts)
+        # Can only roll forward, an earlier settlement date needs a new build
+        if any(len(book) and np.any(book.settlement_ordinal > settlement) for book, _ in snapshots):
+            snapshots = None
+    if snapshots is None:
+        os.makedirs(snapshot_directory, exist_ok=True)
+        books = build(path, settlement_date, date_convention)
+        # Build aside then rename so concurrent readers never see a half written snapshot
+        building = tempfile.mkdtemp(prefix=f'.{name}-', dir=snapshot_directory)
+        for part, book in zip(parts, books):
+            save_book_snapshot(book, os.path.join(building, part))
+        if os.path.isdir(directory):
+            shutil.rmtree(directory, ignore_errors=True) # incomplete, a previous build crashed, or built for a later settlement
+        try:
+            os.rename(building, directory)
+        except OSError:
+            # Another process finished first
+            shutil.rmtree(building, ignore_errors=True)
+        for other in os.listdir(snapshot_directory):
+            if re.fullmatch(rf'{re.escape(name)}-[0-9a-f]{{16}}', other) and other != f'{name}-{key}':
+                shutil.rmtree(os.path.join(snapshot_directory, other), ignore_errors=True)
+        snapshots = tuple(load_book_snapshot(os.path.join(directory, part), mmap) for part in parts)
+
+    return tuple(_roll_snapshot(book, arrays, settlement) for book, arrays in snapshots)
+
+
+def _roll_snapshot(book: BondBook, arrays: Dict[str, np.ndarray], settlement: int) -> Tuple[BondBook, Dict[str, np.ndarray]]:
+    # A snapshot opened at its own settlement date is returned as is, still memory-mapped
+    if len(book) == 0 or np.all(book.settlement_ordinal == settlement):
+        return book, arrays
+    book.roll_forward(settlement)
+    # Same rule as the build, a bond is matured on its maturity date
+    alive = book.maturity_ordinal > settlement
+    if not np.all(alive):
+        book = book[alive]
+    arrays = {name: values for name, values in arrays.items() if name not in SNAPSHOT_ANALYTICS}
+    arrays['coupon_offsets'], arrays['coupon_ordinals'] = book.get_coupon_schedules()
+    arrays.update(compute_snapshot_analytics(book))
+    return book, arrays
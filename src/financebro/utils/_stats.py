@@ -0,0 +1,225 @@
+import functools
+import importlib
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+# Opt-in instrumentation of the hot paths
+# enable() swaps the functions of INSTRUMENTED for timed wrappers and disable() puts the originals back, so when it is off
+# the only cost left is the `if _stats.enabled` test of the solvers and of the coupon inference
+
+# (module, class or None, attribute, category), resolved on enable() so this module imports nothing from financebro
+INSTRUMENTED = (
+    ('financebro.utils._math', None, 'date_to_ordinal', 'date'),
+    ('financebro.utils._math', None, 'ordinal_to_date', 'date'),
+    ('financebro.utils._math', None, 'dates_to_ordinals', 'date'),
+    ('financebro.utils._math', None, 'ordinals_to_dates', 'date'),
+    ('financebro.utils._math', None, 'day_diff', 'date'),
+    ('financebro.utils._math', None, 'day_diff_ordinal', 'date'),
+    ('financebro.utils._math', None, 'day_diff_array', 'date'),
+    ('financebro.utils._math', None, 'remove_days', 'date'),
+    ('financebro.utils._math', None, 'remove_days_ordinal', 'date'),
+    ('financebro.utils._math', None, 'remove_days_array', 'date'),
+    ('financebro.utils._math', None, 'solve_newton', 'solver'),
+    ('financebro.utils._math', None, 'solve_halley_batch', 'solver'),
+    ('financebro.utils._math', None, 'solve_bisection_batch', 'solver'),
+    ('financebro.utils._bond', None, 'get_coupons_date', 'schedule'),
+    ('financebro.utils._bond', None, 'get_coupons_ordinals', 'schedule'),
+    ('financebro.utils._bond', None, 'get_coupons_ordinals_batch', 'schedule'),
+    ('financebro.utils._bond', None, 'get_coupons_count_batch', 'schedule'),
+    ('financebro.utils._bond', None, 'infer_coupon_period_days_batch', 'schedule'),
+    ('financebro.utils._bond', None, 'compute_price_excel', 'pricing'),
+    ('financebro.utils._bond', None, 'compute_price_excel_batch', 'pricing'),
+    ('financebro.utils._bond', None, 'compute_price_excel_derivatives_batch', 'pricing'),
+    ('financebro.utils._bond', None, 'compute_price_textbook', 'pricing'),
+    ('financebro.utils._bond', None, 'compute_ytm_excel_1_coupon', 'ytm'),
+    ('financebro.utils._bond', None, 'compute_ytm_excel_batch', 'ytm'),
+    ('financebro.assets.fixed_income.bond', 'Bond', 'compute_price', 'pricing'),
+    ('financebro.assets.fixed_income.bond', 'Bond', 'compute_ytm_percent', 'ytm'),
+    ('financebro.assets.fixed_income.bond', 'Bond', 'compute_return', 'pricing'),
+    ('financebro.assets.fixed_income.bond', 'Bond', 'compute_apy', 'pricing'),
+    ('financebro.assets.fixed_income.bond', 'Bond', '_infer_coupons_ordinals', 'schedule'),
+    ('financebro.assets.fixed_income.bond_book', 'BondBook', 'compute_price', 'pricing'),
+    ('financebro.assets.fixed_income.bond_book', 'BondBook', 'compute_ytm_percent', 'ytm'),
+    ('financebro.assets.fixed_income.bond_book', 'BondBook', 'get_coupon_schedules', 'schedule'),
+)
+# Memoized functions whose hits and misses are reported, (module, attribute)
+CACHES = (('financebro.utils._bond', 'get_coupons_ordinals'),)
+# Maximum number of events kept, the oldest are dropped
+MAX_EVENTS = 1000
+
+enabled = False
+_originals = {}
+_categories = {}
+_timings = defaultdict(lambda: [0, 0.0, 0.0, 0.0]) # name -> [calls, total seconds, self seconds, max seconds]
+_iterations = defaultdict(lambda: [0, 0, 0, 0]) # name -> [solves, equations, iterations, max iterations]
+_counters = defaultdict(int)
+_events = deque(maxlen=MAX_EVENTS)
+_cache_base = {}
+_local = threading.local() # stack of the time spent in the callees of the running instrumented calls
+
+
+def _timed(name: str, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            callees = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            timing = _timings[name]
+            timing[0] += 1
+            timing[1] += elapsed
+            timing[2] += elapsed - callees
+            timing[3] = max(timing[3], elapsed)
+    # Keep cache_info / cache_clear of memoized functions reachable
+    for attribute in ('cache_info', 'cache_clear'):
+        if hasattr(func, attribute):
+            setattr(wrapper, attribute, getattr(func, attribute))
+    return wrapper
+
+def _resolve(module: str, owner: str):
+    module = importlib.import_module(module)
+    return module if owner is None else getattr(module, owner)
+
+
+def enable():
+    """
+    Start recording, the functions of INSTRUMENTED are replaced by timed wrappers
+    References taken before enable() (e.g. `from financebro.utils._math import day_diff`) keep calling the raw function.
+    """
+    global enabled
+    if enabled:
+        return
+    for module, owner, attribute, category in INSTRUMENTED:
+        target = _resolve(module, owner)
+        name = attribute if owner is None else f'{owner}.{attribute}'
+        _originals[(module, owner, attribute)] = target.__dict__[attribute]
+        _categories[name] = category
+        setattr(target, attribute, _timed(name, target.__dict__[attribute]))
+    if not _cache_base:
+        _reset_caches()
+    enabled = True
+
+def disable():
+    """
+    Stop recording and put the original functions back, the recorded stats are kept until reset()
+    """
+    global enabled
+    if not enabled:
+        return
+    for (module, owner, attribute), original in _originals.items():
+        setattr(_resolve(module, owner), attribute, original)
+    _originals.clear()
+    enabled = False
+
+def reset():
+    """
+    Forget everything recorded so far
+    """
+    _timings.clear()
+    _iterations.clear()
+    _counters.clear()
+    _events.clear()
+    _reset_caches()
+
+def _reset_caches():
+    for module, attribute in CACHES:
+        info = getattr(importlib.import_module(module), attribute).cache_info()
+        _cache_base[attribute] = (info.hits, info.misses)
+
+
+def record_iterations(name: str, iterations: int, equations: int= 1):
+    """
+    Record a solve, called by the solvers when the instrumentation is enabled
+
+    Args:
+        name (str): Name of the solver
+        iterations (int): Number of iterations of the solve
+        equations (int, optional): Number of equations solved together. Defaults to 1.
+    """
+    stats = _iterations[name]
+    stats[0] += 1
+    stats[1] += equations
+    stats[2] += iterations
+    stats[3] = max(stats[3], iterations)
+
+def record_event(name: str, message: str, **details):
+    """
+    Record an unusual event (non-convergence, failed inference...), the last MAX_EVENTS are kept
+
+    Args:
+        name (str): Name of the function
+        message (str): What happened
+        **details: Anything useful to investigate, e.g. the inputs
+    """
+    _counters[f'{name}.{message}'] += 1
+    _events.append({'name': name, 'message': message, 'time': time.time(), **details})
+
+def increment(name: str, count: int= 1):
+    _counters[name] += count
+
+
+def snapshot() -> Dict[str, dict]:
+    """
+    Everything recorded since the last reset()
+
+    Returns:
+        Dict[str, dict]: With the keys
+            'timings': name -> calls, total_seconds (callees included), self_seconds and max_seconds
+            'categories': category ('date', 'schedule', 'pricing', 'ytm', 'solver') -> self seconds, they add up to the instrumented time
+            'iterations': solver -> solves, equations, iterations and max_iterations
+            'counters': name -> count, e.g. 'solve_newton.not converged'
+            'caches': memoized function -> hits and misses
+            'events': list of the recorded events
+    """
+    timings = {name: {'calls': calls, 'total_seconds': total, 'self_seconds': own, 'max_seconds': longest}
+               for name, (calls, total, own, longest) in _timings.items()}
+    categories = defaultdict(float)
+    for name, timing in timings.items():
+        categories[_categories.get(name, 'other')] += timing['self_seconds']
+    caches = {}
+    for module, attribute in CACHES:
+        info = getattr(importlib.import_module(module), attribute).cache_info()
+        hits, misses = _cache_base.get(attribute, (0, 0))
+        caches[attribute] = {'hits': info.hits - hits, 'misses': info.misses - misses}
+    return {'timings': timings,
+            'categories': dict(categories),
+            'iterations': {name: {'solves': solves, 'equations': equations, 'iterations': iterations, 'max_iterations': longest}
+                           for name, (solves, equations, iterations, longest) in _iterations.items()},
+            'counters': dict(_counters),
+            'caches': caches,
+            'events': list(_events)}
+
+@contextmanager
+def collect(reset_first: bool= True) -> Iterator[dict]:
+    """
+    Record the block, the yielded dict is filled with the snapshot when the block exits
+
+    >>> with collect() as stats:
+    ...     book.compute_ytm_percent()
+    >>> stats['iterations']['solve_halley_batch']
+
+    Args:
+        reset_first (bool, optional): Forget what was recorded before the block. Defaults to True.
+    """
+    was_enabled = enabled
+    if reset_first:
+        reset()
+    enable()
+    stats = {}
+    try:
+        yield stats
+    finally:
+        stats.update(snapshot())
+        if not was_enabled:
+            disable()
@@ -0,0 +1,56 @@
+"""
+Import time budget of the package, each import runs in a fresh interpreter
+`import financebro` must not load any heavy dependency, they are only imported with the names that need them.
+"""
+import json
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = ('numpy', 'scipy', 'pandas', 'requests', 'bs4')
+# Budget of the bare `import financebro`, best of REPEAT fresh interpreters. It takes about 1ms, the margin is for slow runners
+BUDGET_MS = 20
+REPEAT = 5
+
+# statement -> heavy modules it may load
+STATEMENTS = {
+    'import financebro': (),
+    'from financebro import Bond': ('numpy',),
+    'from financebro import BondBook': ('numpy',),
+    'from financebro import preprocess_fidelity_data': ('numpy', 'pandas'),
+}
+
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+{statement}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+'''
+
+
+def measure(statement: str, repeat: int= 1) -> dict:
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', PROBE.format(statement=statement, heavy=HEAVY_MODULES)],
+                                capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output))
+    return {'seconds': min(run['seconds'] for run in runs), 'loaded': runs[0]['loaded']}
+
+
+@pytest.mark.parametrize('statement', STATEMENTS)
+def test_heavy_modules_are_lazy(statement):
+    unexpected = [module for module in measure(statement)['loaded'] if module not in STATEMENTS[statement]]
+    assert not unexpected, f"{statement} loads {unexpected}"
+
+
+def test_import_budget():
+    milliseconds = 1000*measure('import financebro', REPEAT)['seconds']
+    assert milliseconds <= BUDGET_MS, f"import financebro takes {milliseconds:.1f}ms, budget {BUDGET_MS}ms"
+
+
+def test_public_names_resolve():
+    import financebro
+    for name in financebro.__all__:
+        getattr(financebro, name)
@@ -0,0 +1,215 @@
+"""
+Parity of the vectorized and ordinal code paths with the scalar ones they replaced
+The reference date functions are the string based implementations the ordinal ones replaced, kept here as the baseline.
+"""
+import calendar
+import datetime
+
+import numpy as np
+import pytest
+
+import financebro.utils._math as _math
+import financebro.utils._bond as _bond
+from financebro.assets.fixed_income.bond import Bond
+from financebro.assets.fixed_income.bond_book import BondBook
+
+SETTLEMENT_DATE = '04/27/2024'
+PERIODS = [15, 30, 60, 90, 120, 180, 360]
+
+
+def reference_day_diff_us_nasd_30_360(start_time: str, end_time: str, excel: bool= True) -> int:
+    start_time = datetime.datetime.strptime(start_time, "%m/%d/%Y")
+    end_time = datetime.datetime.strptime(end_time, "%m/%d/%Y")
+    start_day, start_month = start_time.day, start_time.month
+    end_day, end_month = end_time.day, end_time.month
+    if start_month == 2 and start_day == calendar.monthrange(start_time.year, start_month)[1]:
+        start_day = 30
+        if not excel and end_day == calendar.monthrange(end_time.year, end_month)[1]:
+            end_day = 30
+    if start_day == 31:
+        start_day = 30
+    if end_day == 31 and start_day == 30:
+        end_day = 30
+    return 360 * (end_time.year - start_time.year) + 30 * (end_month - start_month) + (end_day - start_day)
+
+
+def reference_remove_days(time: str, days: int, date_convention: str= 'us_nasd_30_360') -> str:
+    dtime = datetime.datetime.strptime(time, "%m/%d/%Y")
+    if date_convention == 'not_retarded':
+        return (dtime - datetime.timedelta(days=days)).strftime("%m/%d/%Y")
+    num_years, num_months, num_days = days // 360, (days % 360) // 30, (days % 360) % 30
+    new_year, new_month = dtime.year - num_years, dtime.month - num_months
+    new_day = 30 - num_days if dtime.day == calendar.monthrange(dtime.year, dtime.month)[1] else dtime.day - num_days
+    if new_day <= 0:
+        new_month -= 1
+        new_day += 30
+    if new_month <= 0:
+        new_month += 12
+        new_year -= 1
+    new_day = calendar.monthrange(new_year, new_month)[1] if new_month == 2 and new_day in [29, 30] else new_day
+    return datetime.datetime(new_year, new_month, new_day).strftime("%m/%d/%Y")
+
+
+def reference_coupons_date(settlement_date: str, maturity_date: str, coupon_period_days: int, date_convention: str) -> list:
+    # Walk back from maturity one period at a time
+    settlement = datetime.datetime.strptime(settlement_date, "%m/%d/%Y")
+    coupon_date, coupon_dates = maturity_date, []
+    while datetime.datetime.strptime(coupon_date, "%m/%d/%Y") >= settlement:
+        coupon_dates.insert(0, coupon_date)
+        coupon_date = reference_remove_days(coupon_date, coupon_period_days, date_convention)
+    return coupon_dates
+
+
+def random_dates(rng: np.random.Generator, size: int) -> list:
+    # Random days plus every month end, where the 30/360 rules differ
+    days = rng.integers(0, 4000, size)
+    dates = [(datetime.date(2020, 1, 1) + datetime.timedelta(days=int(day))).strftime('%m/%d/%Y') for day in days]
+    return dates + [datetime.date(year, month, calendar.monthrange(year, month)[1]).strftime('%m/%d/%Y')
+                    for year in range(2020, 2030) for month in range(1, 13)]
+
+
+def make_bonds(size: int, seed: int= 0) -> list:
+    rng = np.random.default_rng(seed)
+    settlement = _math.date_to_ordinal(SETTLEMENT_DATE)
+    maturities = _math.ordinals_to_dates(settlement + rng.integers(10, 9000, size))
+    return [Bond(f'{index:09d}', price, ytm, rate, maturity_date, coupon_period_days=int(period), settlement_date=SETTLEMENT_DATE)
+            for index, price, ytm, rate, maturity_date, period in zip(range(size),
+                                                                      np.round(rng.uniform(80, 120, size), 3),
+                                                                      np.round(rng.uniform(1, 8, size), 3),
+                                                                      np.round(rng.uniform(0, 8, size), 3),
+                                                                      maturities,
+                                                                      rng.choice([30, 90, 180, 360], size))]
+
+
+# user-001: batch Excel price
+def test_price_excel_batch_matches_scalar():
+    rng = np.random.default_rng(0)
+    size = 5000
+    ytm_percent = rng.uniform(-0.5, 15, size)
+    ytm_percent[:50] = 0
+    rate, N, frequency = rng.uniform(0, 0.1, size), rng.integers(1, 80, size), rng.choice([1, 2, 4, 12, 24], size)
+    E = 360 / frequency
+    DSC = rng.uniform(0, 1, size) * E
+    batch = _bond.compute_price_excel_batch(ytm_percent, rate, N, frequency, 100, DSC, E)
+    scalar = np.array([_bond.compute_price_excel(*args, 100, dsc, e)
+                       for *args, dsc, e in zip(ytm_percent, rate, N, frequency, DSC, E)])
+    assert np.max(np.abs(batch - scalar)) <= 1e-9
+
+
+def test_book_price_matches_bonds():
+    bonds = make_bonds(300)
+    book = BondBook.from_bonds(bonds)
+    scalar = np.array([bond.compute_price() for bond in bonds])
+    assert np.max(np.abs(book.compute_price() - scalar)) <= 1e-9
+
+
+# user-002: batch Halley YTM
+def test_book_ytm_matches_bonds():
+    bonds = make_bonds(300, seed=1)
+    book = BondBook.from_bonds(bonds)
+    scalar = np.array([bond.compute_ytm_percent() for bond in bonds])
+    np.testing.assert_allclose(book.compute_ytm_percent(), scalar, rtol=0, atol=1e-8)
+
+
+def test_ytm_excel_batch_round_trip():
+    rng = np.random.default_rng(2)
+    size = 5000
+    ytm_percent = rng.uniform(-2, 15, size)
+    rate, N, frequency = rng.uniform(0, 0.1, size), rng.integers(1, 80, size), rng.choice([1, 2, 4, 12, 24], size)
+    E = 360 / frequency
+    DSC = rng.uniform(0.01, 1, size) * E
+    price_percent = _bond.compute_price_excel_batch(ytm_percent, rate, N, frequency, 100, DSC, E)
+    solved = _bond.compute_ytm_excel_batch(price_percent, rate, N, frequency, 100, DSC, E)
+    assert np.max(np.abs(solved - ytm_percent)) <= 1e-8
+
+
+# user-004: ordinal dates
+def test_ordinal_dates_round_trip():
+    dates = random_dates(np.random.default_rng(3), 2000)
+    ordinals = _math.dates_to_ordinals(dates)
+    assert list(_math.ordinals_to_dates(ordinals)) == dates
+    assert [_math.date_to_ordinal(date) for date in dates] == ordinals.tolist()
+
+
+@pytest.mark.parametrize('excel', [True, False])
+def test_day_diff_us_nasd_30_360_matches_baseline(excel):
+    rng = np.random.default_rng(4)
+    dates = random_dates(rng, 1000)
+    starts, ends = rng.choice(dates, 5000), rng.choice(dates, 5000)
+    batch = _math.day_diff_us_nasd_30_360_array(_math.dates_to_ordinals(starts), _math.dates_to_ordinals(ends), excel)
+    expected = [reference_day_diff_us_nasd_30_360(start, end, excel) for start, end in zip(starts, ends)]
+    assert batch.tolist() == expected
+    assert [_math.day_diff_us_nasd_30_360(start, end, excel) for start, end in zip(starts[:500], ends[:500])] == expected[:500]
+
+
+@pytest.mark.parametrize('date_convention', ['us_nasd_30_360', 'not_retarded'])
+def test_remove_days_matches_baseline(date_convention):
+    rng = np.random.default_rng(5)
+    dates = rng.choice(random_dates(rng, 1000), 5000)
+    days = rng.choice(PERIODS + [365, 720, 45, 17], 5000)
+    batch = _math.ordinals_to_dates(_math.remove_days_array(_math.dates_to_ordinals(dates), days, date_convention))
+    assert list(batch) == [reference_remove_days(date, int(day), date_convention) for date, day in zip(dates, days)]
+
+
+# user-005 and user-007: coupon schedules in bulk
+@pytest.mark.parametrize('date_convention', ['us_nasd_30_360', 'not_retarded'])
+def test_coupon_schedules_batch_match_baseline(date_convention):
+    rng = np.random.default_rng(6)
+    size = 1000
+    settlement = _math.date_to_ordinal('01/01/2024') + rng.integers(0, 400, size)
+    maturity = settlement + rng.integers(-30, 10000, size)
+    periods = rng.choice(PERIODS, size)
+    offsets, coupon_ordinals = _bond.get_coupons_ordinals_batch(settlement, maturity, periods, date_convention)
+    counts, _ = _bond.get_coupons_count_batch(settlement, maturity, periods, date_convention)
+    assert np.array_equal(np.diff(offsets), counts)
+    for i, (start, end, period) in enumerate(zip(_math.ordinals_to_dates(settlement), _math.ordinals_to_dates(maturity), periods)):
+        expected = reference_coupons_date(start, end, int(period), date_convention)
+        assert list(_math.ordinals_to_dates(coupon_ordinals[offsets[i]:offsets[i + 1]])) == expected
+        assert _bond.get_coupons_date(start, end, int(period), date_convention) == expected
+
+
+def test_book_from_dates_matches_from_bonds():
+    book = BondBook.from_bonds(make_bonds(300, seed=7))
+    rebuilt = BondBook.from_dates(book.cusips, book.price_percent, book.ytm_percent, book.annual_coupon_rate,
+                                  book.maturity_ordinal, book.settlement_ordinal, book.coupon_period_days)
+    for field in BondBook.FIELDS[1:]:
+        np.testing.assert_allclose(getattr(rebuilt, field), getattr(book, field), rtol=0, atol=1e-12, err_msg=field)
+
+
+# user-011: vectorized identifiers
+@pytest.mark.parametrize('country_code', ['US', 'us'])
+def test_isin_from_cusip_array_matches_scalar(country_code):
+    rng = np.random.default_rng(8)
+    alphabet = np.array(list('0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'))
+    cusips = [''.join(characters) for characters in rng.choice(alphabet, (2000, 9))] + ['037833100', '38259p508']
+    isins = _bond.get_isin_from_cusip_array(cusips, country_code)
+    assert isins.tolist() == [_bond.get_isin_from_cusip(cusip, country_code) for cusip in cusips]
+    assert np.all(_bond.validate_isin_array(isins))
+    assert _bond.get_isin_from_cusip_array(['ab', '037833100X'], country_code).tolist() == ['', '']
+
+
+def test_validate_cusip_array():
+    valid = ['037833100', '25152RXA6', '6174467Y9', '78015K7C2', '38259P508', '594918104', '68389X105', 'G1151C101']
+    assert np.all(_bond.validate_cusip_array(valid))
+    assert not np.any(_bond.validate_cusip_array(['037833101', 'ab', '']))
+    assert _bond.validate_isin_array(['US0378331005', 'US0378331006', 'US03783310']).tolist() == [True, False, False]
+
+
+# user-015: roll forward
+@pytest.mark.parametrize('date_convention', ['us_nasd_30_360', 'not_retarded'])
+def test_roll_forward_matches_rebuild(date_convention):
+    rng = np.random.default_rng(9)
+    size = 5000
+    settlement = _math.date_to_ordinal(SETTLEMENT_DATE)
+    maturity = settlement + rng.integers(1, 3000, size)
+    periods = rng.choice([30, 90, 180, 360], size)
+    rate = rng.uniform(0, 0.08, size)
+    build = lambda settlement_ordinal: BondBook.from_dates(np.char.mod('%09d', np.arange(size)), 100, 4, rate, maturity,
+                                                           settlement_ordinal, periods, date_convention=date_convention)
+    book = build(settlement)
+    for days in (1, 8, 45, 399):
+        book.roll_forward(settlement + days)
+        rebuilt = build(settlement + days)
+        assert np.array_equal(book.num_coupons, rebuilt.num_coupons)
+        assert np.array_equal(book.DSC, rebuilt.DSC)
+        np.testing.assert_array_equal(book.compute_price(), rebuilt.compute_price())